@@ -0,0 +1,181 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+from sweep import load_csv, warmup_bars
+from sfp_signals import compute_signal_frame
+from instrument import InstrumentSpec, BTCUSDT
+
+# ── Execution model (mirrors sfp_bot) ─────────────────────────────────────────
+INITIAL_BALANCE = 1_000.0
+LEVERAGE        = 10
+SIZE_FRACTION   = 0.99       # notional = 99% of free USDT, as in the live entry
+TAKER_FEE       = 0.0006     # market entry / stop exit
+MAKER_FEE       = 0.0002     # resting TP limit
+SEARCH_CHUNK    = 256        # initial bars scanned per exit search step
+
+
+def signal_arrays(df: pd.DataFrame, params: dict | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Full-series entry mask and TP (pivot high) level for one parameter set."""
+    sig = compute_signal_frame(df, params)
+    return sig["entries"], sig["tp"]
+
+
+def _first_exit(high: np.ndarray, close: np.ndarray,
+                start: int, stop: float, tp: float) -> int:
+    """First bar >= start where the TP limit fills or the close is at/below the stop."""
+    n, i, step = len(close), start, SEARCH_CHUNK
+    while i < n:
+        j = min(n, i + step)
+        with np.errstate(invalid="ignore"):
+            hit = np.flatnonzero((high[i:j] >= tp) | (close[i:j] <= stop))
+        if hit.size:
+            return i + int(hit[0])
+        i, step = j, step * 2
+    return -1
+
+
+def simulate(df: pd.DataFrame, entries: np.ndarray, tp_levels: np.ndarray,
+             initial_balance: float = INITIAL_BALANCE,
+             leverage: float = LEVERAGE,
+             size_fraction: float = SIZE_FRACTION,
+             spec: InstrumentSpec = BTCUSDT,
+             taker_fee: float = TAKER_FEE,
+             maker_fee: float = MAKER_FEE) -> pd.DataFrame:
+    """
+    Trade simulator with the live bot's rules.
+
+    - Signals are evaluated on each closed candle; an entry is a market buy
+      filled at that candle's close, only while flat.
+    - Stop = entry candle low, checked on later closed candles:
+      close <= stop → market sell at that close.
+    - TP = pivot high at entry floored to the tick grid, resting reduce-only limit from the next
+      candle on: high >= tp → filled at max(tp, open). A TP fill during a
+      candle takes precedence over that candle's close-based stop.
+    - After any exit no entry is taken on the same candle (last_entry_candle_ts).
+    - Size = spec.qty_for_notional(size_fraction * balance, price) (safe_qty),
+      skipped below the minimum or if margin at `leverage` exceeds balance.
+
+    The walk jumps from entry to exit with vectorized scans, so cost scales
+    with the number of trades rather than bars.
+
+    Returns
+    -------
+    pd.DataFrame — one row per closed trade.
+    """
+    open_ = df["open"].to_numpy(dtype=float)
+    high  = df["high"].to_numpy(dtype=float)
+    low   = df["low"].to_numpy(dtype=float)
+    close = df["close"].to_numpy(dtype=float)
+    index = df.index
+    n     = len(close)
+
+    entry_idx = np.flatnonzero(entries)
+    balance   = float(initial_balance)
+    rows      = []
+    k         = 0
+    while k < len(entry_idx):
+        e     = int(entry_idx[k])
+        price = close[e]
+        qty   = spec.qty_for_notional(size_fraction * balance, price)
+        if qty <= 0 or spec.notional(qty, price) / leverage > balance:
+            k += 1
+            continue
+
+        stop = low[e]
+        tp   = np.nan if np.isnan(tp_levels[e]) else spec.round_price(tp_levels[e])
+        x = _first_exit(high, close, e + 1, stop, tp)
+        if x < 0:
+            break                                         # still open at end of data
+        if high[x] >= tp:
+            exit_price, fee_rate, reason = max(tp, open_[x]), maker_fee, "TP_LIMIT_FILLED"
+        else:
+            exit_price, fee_rate, reason = close[x], taker_fee, "STOP_INVALIDATION"
+
+        fees = spec.notional(qty, price) * taker_fee + spec.notional(qty, exit_price) * fee_rate
+        pnl  = spec.notional(qty, exit_price - price) - fees
+        balance += pnl
+        rows.append({
+            "entry_time": index[e], "exit_time": index[x],
+            "entry_idx": e, "exit_idx": x,
+            "entry_price": price, "exit_price": exit_price,
+            "stop": stop, "tp": tp, "qty": qty,
+            "fees": fees, "pnl": pnl, "return_pct": pnl / (balance - pnl) * 100,
+            "balance": balance, "reason": reason,
+        })
+        k = int(np.searchsorted(entry_idx, x, side="right"))
+        if balance <= 0:
+            break
+    return pd.DataFrame(rows, columns=[
+        "entry_time", "exit_time", "entry_idx", "exit_idx", "entry_price", "exit_price",
+        "stop", "tp", "qty", "fees", "pnl", "return_pct", "balance", "reason",
+    ])
+
+
+# vectorbt Portfolio.trades.records_readable → simulate() column names
+VBT_TRADE_COLUMNS = {
+    "Entry Timestamp": "entry_time",
+    "Exit Timestamp":  "exit_time",
+    "Avg Entry Price": "entry_price",
+    "Avg Exit Price":  "exit_price",
+    "Size":            "qty",
+    "PnL":             "pnl",
+}
+
+
+def normalize_trades(trades: pd.DataFrame) -> pd.DataFrame:
+    """
+    Trade list from simulate() or from vectorbt's trades.records_readable,
+    in simulate()'s column names (entry_time, exit_time, entry_price,
+    exit_price, pnl, return_pct, ...). simulate() output is returned as is.
+    """
+    if "entry_time" in trades:
+        return trades
+    out = trades.rename(columns=VBT_TRADE_COLUMNS)
+    if "Return" in out:
+        out["return_pct"] = out.pop("Return") * 100
+    if "Entry Fees" in out and "Exit Fees" in out:
+        out["fees"] = out.pop("Entry Fees") + out.pop("Exit Fees")
+    for c in ("entry_time", "exit_time"):
+        out[c] = pd.to_datetime(out[c])
+    return out
+
+
+def summarize(trades: pd.DataFrame, initial_balance: float = INITIAL_BALANCE) -> dict:
+    """Key stats from simulate() output (drawdown on closed-trade equity)."""
+    if trades.empty:
+        return {"trades": 0, "win_rate": np.nan, "total_return_pct": 0.0,
+                "max_drawdown_pct": 0.0, "profit_factor": np.nan, "fees": 0.0,
+                "final_balance": initial_balance}
+    equity = np.r_[initial_balance, trades["balance"].to_numpy()]
+    peak   = np.maximum.accumulate(equity)
+    pnl    = trades["pnl"].to_numpy()
+    losses = -pnl[pnl < 0].sum()
+    return {
+        "trades":           len(trades),
+        "win_rate":         float((pnl > 0).mean() * 100),
+        "total_return_pct": float((equity[-1] / initial_balance - 1) * 100),
+        "max_drawdown_pct": float(((peak - equity) / peak).max() * 100),
+        "profit_factor":    float(pnl[pnl > 0].sum() / losses) if losses > 0 else np.inf,
+        "fees":             float(trades["fees"].sum()),
+        "final_balance":    float(equity[-1]),
+    }
+
+
+def run_backtest(df: pd.DataFrame, params: dict | None = None, **execution) -> dict:
+    """Signals + simulation in one call. Returns {"trades": DataFrame, "stats": dict}."""
+    entries, tp = signal_arrays(df, params)
+    trades = simulate(df, entries, tp, **execution)
+    return {"trades": trades,
+            "stats":  summarize(trades, execution.get("initial_balance", INITIAL_BALANCE))}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Backtest the SFP strategy with live exit rules")
+    ap.add_argument("csv", nargs="?", default="BTC_30m_binance.csv")
+    ap.add_argument("--balance", type=float, default=INITIAL_BALANCE)
+    args = ap.parse_args()
+
+    result = run_backtest(load_csv(args.csv), initial_balance=args.balance)
+    for k, v in result["stats"].items():
+        print(f"{k:<18} {v}")
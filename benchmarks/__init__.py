@@ -0,0 +1,10 @@
+"""
+Standalone performance benchmarks.
+
+    python -m benchmarks.run                       # run, fail on regressions vs baseline.json
+    python -m benchmarks.run --save benchmarks/results.json   # also write results
+    python -m benchmarks.run --update-baseline     # store as the baseline (per mode)
+    python -m benchmarks.run --tolerance 0.1       # fail if p50 is >10% above baseline
+    python -m benchmarks.parity                    # kernels vs original pandas signals
+    python -m benchmarks.checks                    # I/O paths against local stand-ins
+"""
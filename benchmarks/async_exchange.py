@@ -0,0 +1,85 @@
+import time
+import bisect
+import asyncio
+
+from benchmarks.synthetic import make_ohlcv, TF_MS
+
+
+class AsyncMockExchange:
+    """
+    ccxt.async_support-style stand-in for the scanner: many USDT swaps, each
+    with its own synthetic candle history ending at the current 30m boundary.
+
+    fetch_ohlcv sleeps `latency` seconds to model a round trip, records the
+    peak number of requests in flight, and raises for symbols listed in
+    `failing`. set_candles() replaces one symbol's history (e.g. to plant an
+    entry on the last closed candle).
+    """
+
+    def __init__(self, n_symbols: int = 50, n_candles: int = 1_000,
+                 latency: float = 0.01, failing=(), seed: int = 0):
+        self.latency   = latency
+        self.failing   = set(failing)
+        self.calls: dict = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.closed    = False
+        self.candles: dict = {}
+        self.markets: dict = {}
+        for i in range(n_symbols):
+            base = f"C{i:03d}"
+            sym  = f"{base}/USDT:USDT"
+            self.markets[sym] = {"id": f"{base}USDT", "symbol": sym, "base": base,
+                                 "quote": "USDT", "settle": "USDT", "swap": True,
+                                 "linear": True, "active": True}
+            self.set_candles(sym, make_ohlcv(n_candles, seed=seed + i))
+        # Listed but not scanned: spot, inverse and inactive markets
+        self.markets["C000/USDT"] = {"id": "C000USDT_SPBL", "symbol": "C000/USDT", "quote": "USDT",
+                                     "spot": True, "swap": False, "linear": None}
+        self.markets["C000/USD:C000"] = {"id": "C000USD", "symbol": "C000/USD:C000", "quote": "USD",
+                                         "settle": "C000", "swap": True, "linear": False}
+        self.markets["DEAD/USDT:USDT"] = {"id": "DEADUSDT", "symbol": "DEAD/USDT:USDT", "quote": "USDT",
+                                          "settle": "USDT", "swap": True, "linear": True,
+                                          "active": False}
+
+    def _count(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def set_candles(self, symbol: str, df):
+        """Use df's ts/open/high/low/close/volume (last row = forming candle) for symbol."""
+        cols = df[["ts", "open", "high", "low", "close", "volume"]].to_numpy(dtype=float)
+        self.candles[symbol] = [[int(r[0]), *map(float, r[1:])] for r in cols]
+
+    @staticmethod
+    def parse_timeframe(tf: str) -> int:
+        return TF_MS // 1000
+
+    async def load_markets(self, reload: bool = False) -> dict:
+        self._count("load_markets")
+        return self.markets
+
+    async def fetch_time(self) -> int:
+        self._count("fetch_time")
+        return int(time.time() * 1000)
+
+    async def fetch_ohlcv(self, symbol, timeframe="30m", since=None, limit=None, params=None):
+        self._count("fetch_ohlcv")
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if symbol in self.failing:
+                raise ConnectionError(f"simulated failure for {symbol}")
+            rows  = self.candles[symbol]
+            limit = limit or 1000
+            if since is None:
+                rows = rows[-limit:]
+            else:
+                i    = bisect.bisect_left([r[0] for r in rows], since)
+                rows = rows[i:i + limit]
+            return [list(r) for r in rows]
+        finally:
+            self.in_flight -= 1
+
+    async def close(self):
+        self.closed = True
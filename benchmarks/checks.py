@@ -0,0 +1,479 @@
+"""
+Functional checks of the bot's I/O paths against local stand-ins.
+
+    python -m benchmarks.checks                # every check
+    python -m benchmarks.checks scanner        # just the named ones
+
+Each check drives the real module against an in-process fake (no network,
+no credentials) and returns a list of problems. Exit code 1 on any failure.
+"""
+import sys
+import time
+import asyncio
+import logging
+import argparse
+
+import pandas as pd
+
+from benchmarks.synthetic import make_ohlcv
+from benchmarks.async_exchange import AsyncMockExchange
+from benchmarks.telegram_standin import TelegramStandIn
+from benchmarks.ws_standin import BitgetWSStandIn
+
+CHECKS: dict = {}
+
+
+def check(name: str):
+    def register(fn):
+        CHECKS[name] = fn
+        return fn
+    return register
+
+
+class _Outbox:
+    """Notifier stand-in that keeps what it was asked to send."""
+
+    def __init__(self):
+        self.messages: list[str] = []
+
+    def send(self, msg: str):
+        self.messages.append(msg)
+
+
+# ── Scanner ───────────────────────────────────────────────────────────────────
+def _plant_entry(fake: AsyncMockExchange, symbol: str, seed: int):
+    """Cut a synthetic history so its last closed candle is an SFP entry."""
+    import scanner
+    from sfp_signals import compute_signal_frame, compute_signals
+    df = make_ohlcv(6_000, seed=seed)
+    for i in compute_signal_frame(df)["entries"].nonzero()[0]:
+        hist = df.iloc[max(0, i + 2 - scanner.CANDLE_LIMIT): i + 2]
+        if len(hist) == scanner.CANDLE_LIMIT and compute_signals(hist.iloc[:-1])["entry"]:
+            fake.set_candles(symbol, hist)
+            return
+    raise RuntimeError(f"no usable entry in seed {seed}")
+
+
+def _expected_hits(fake: AsyncMockExchange, symbols: list[str]) -> set[str]:
+    """Symbols whose last closed candle is an entry, by calling compute_signals directly."""
+    import scanner
+    from sfp_signals import compute_signals
+    out = set()
+    for s in symbols:
+        if s in fake.failing:
+            continue
+        rows = fake.candles[s][-scanner.CANDLE_LIMIT:]
+        df = pd.DataFrame(rows, columns=["ts", "open", "high", "low", "close", "volume"])
+        if compute_signals(df.iloc[:-1])["entry"]:
+            out.add(s)
+    return out
+
+
+@check("scanner")
+def scanner_check() -> list[str]:
+    import scanner
+    problems = []
+    fake = AsyncMockExchange(n_symbols=40, n_candles=scanner.CANDLE_LIMIT, latency=0.05,
+                             failing={"C003/USDT:USDT"})
+    for k, sym in enumerate(("C001/USDT:USDT", "C007/USDT:USDT", "C020/USDT:USDT")):
+        _plant_entry(fake, sym, seed=1_000 + k)
+
+    symbols = scanner.usdt_swap_symbols(fake.markets)
+    if len(symbols) != 40:
+        problems.append(f"usdt_swap_symbols kept {len(symbols)} markets, expected the 40 linear swaps")
+    want = _expected_hits(fake, symbols)
+
+    started = time.perf_counter()
+    hits = asyncio.run(scanner.scan(fake, symbols, max_concurrency=8))
+    elapsed = time.perf_counter() - started
+    got = {h["symbol"] for h in hits}
+    if got != want:
+        problems.append(f"scan() hits {sorted(got)} != compute_signals hits {sorted(want)}")
+    if len(want) < 3:
+        problems.append(f"only {len(want)} planted entries detected by compute_signals")
+    if [h["rr"] for h in hits] != sorted((h["rr"] for h in hits), reverse=True):
+        problems.append("hits are not ranked by reward/risk")
+    if fake.peak_in_flight > 8:
+        problems.append(f"{fake.peak_in_flight} requests in flight, limit was 8")
+    if fake.peak_in_flight < 2 or elapsed > 40 * fake.latency / 2:
+        problems.append(f"fetches did not overlap (peak {fake.peak_in_flight}, {elapsed:.2f}s)")
+
+    outbox = _Outbox()
+    hits = asyncio.run(scanner.run(fake, once=True, notifier=outbox))
+    if len(outbox.messages) != 1:
+        problems.append(f"run() queued {len(outbox.messages)} alerts, expected 1")
+    elif not all(h["symbol"] in outbox.messages[0] for h in hits):
+        problems.append("alert does not list every hit")
+    return problems
+
+
+# ── Telegram notifier ─────────────────────────────────────────────────────────
+@check("notifier")
+def notifier_check() -> list[str]:
+    from notifier import TelegramNotifier, MAX_MESSAGE_LEN
+    problems = []
+
+    # A burst inside the coalesce window goes out as one message, in order;
+    # send() returns immediately even though the API is slow.
+    with TelegramStandIn(delay=0.3) as tg:
+        n = TelegramNotifier("TOKEN", "42", base_url=tg.base_url, coalesce_window=0.2)
+        started = time.perf_counter()
+        for i in range(5):
+            n.send(f"msg {i}")
+        blocked = time.perf_counter() - started
+        n.flush()
+        n.close()
+        if blocked > 0.05:
+            problems.append(f"send() blocked the caller for {blocked * 1000:.0f} ms")
+        if tg.texts != ["\n\n".join(f"msg {i}" for i in range(5))]:
+            problems.append(f"burst not coalesced into one message: {tg.texts}")
+        elif tg.requests[0][1] != "/botTOKEN/sendMessage" or tg.requests[0][2].get("chat_id") != "42":
+            problems.append(f"unexpected request {tg.requests[0][1]} {tg.requests[0][2]}")
+
+    # A burst longer than one Telegram message is split, nothing lost
+    with TelegramStandIn() as tg:
+        n = TelegramNotifier("TOKEN", "42", base_url=tg.base_url, coalesce_window=0.2)
+        burst = [f"{i:03d} " + "x" * 996 for i in range(10)]
+        for m in burst:
+            n.send(m)
+        n.close()
+        if any(len(t) > MAX_MESSAGE_LEN for t in tg.texts):
+            problems.append("a coalesced message exceeds MAX_MESSAGE_LEN")
+        if "\n\n".join(tg.texts) != "\n\n".join(burst) or len(tg.texts) != 3:
+            problems.append(f"split burst lost or reordered text ({len(tg.texts)} messages)")
+
+    # One message longer than the limit is split too, not cut short
+    with TelegramStandIn() as tg:
+        n = TelegramNotifier("TOKEN", "42", base_url=tg.base_url, coalesce_window=0.0)
+        lines = [f"line {i:04d} " + "y" * 90 for i in range(100)]
+        long  = "🚨 <b>STOP FAILED</b>\n" + "\n".join(lines) + "\n" + "z" * 5_000
+        n.send(long)
+        n.close()
+        if any(len(t) > MAX_MESSAGE_LEN for t in tg.texts):
+            problems.append("an over-long message went out above MAX_MESSAGE_LEN")
+        if "".join(tg.texts).replace("\n", "") != long.replace("\n", ""):
+            problems.append(f"over-long message lost text ({len(tg.texts)} messages)")
+        elif not all(t.startswith(("🚨", "line", "z")) for t in tg.texts):
+            problems.append("over-long message split inside a line when a line break was available")
+
+    # 429: wait retry_after, then deliver exactly once
+    with TelegramStandIn() as tg:
+        tg.reject_next(1, retry_after=1)
+        n = TelegramNotifier("TOKEN", "42", base_url=tg.base_url, coalesce_window=0.0)
+        n.send("rate limited")
+        n.flush()
+        n.close()
+        times = [t for t, _, _ in tg.requests]
+        if tg.texts != ["rate limited", "rate limited"]:
+            problems.append(f"429 not retried once: {tg.texts}")
+        elif times[1] - times[0] < 0.95:
+            problems.append(f"retried {times[1] - times[0]:.2f}s after a 429 with retry_after=1")
+        if n.sent != 1:
+            problems.append(f"sent counter {n.sent} after one delivered message")
+
+    # close() delivers everything still queued, then drops late sends
+    with TelegramStandIn(delay=0.2) as tg:
+        n = TelegramNotifier("TOKEN", "42", base_url=tg.base_url, coalesce_window=0.05)
+        for i in range(3):
+            n.send(f"queued {i}")
+            time.sleep(0.1)                 # separate batches, still in flight at close()
+        n.close()
+        n.send("after close")
+        delivered = "\n\n".join(tg.texts)
+        if any(f"queued {i}" not in delivered for i in range(3)):
+            problems.append(f"close() returned before flushing: {tg.texts}")
+        if n._thread.is_alive():
+            problems.append("sender thread still running after close()")
+        time.sleep(0.1)
+        if "after close" in "\n\n".join(tg.texts):
+            problems.append("message sent after close() was delivered")
+    return problems
+
+
+# ── Private order stream ──────────────────────────────────────────────────────
+def _wait(cond, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def _open_long(bot, sim, df, k: int, qty: float = 0.01):
+    """Market-buy at candle k's open with a TP just under its high, as the bot records it."""
+    sim.create_market_buy_order(bot.SYMBOL, qty)
+    bot.state.entry_price          = float(df["open"].iloc[k])
+    bot.state.invalidation         = bot.state.entry_price * 0.5
+    bot.state.tp                   = float(df["high"].iloc[k]) - 1.0
+    bot.state.entry_candle_ts      = int(df["ts"].iloc[k - 1])
+    bot.state.last_entry_candle_ts = int(df["ts"].iloc[k])
+    bot.state.tp_order_id          = bot.place_tp_limit_order(qty, bot.state.tp)
+    bot.state.save()
+
+
+def _as_bitget(order: dict) -> dict:
+    status = {"open": "live", "closed": "filled"}.get(order["status"], "canceled")
+    return BitgetWSStandIn.order_fill(order["id"], order.get("average") or order["price"],
+                                      order["amount"], order.get("lastTradeTimestamp"), status)
+
+
+def _last_close(bot) -> tuple | None:
+    return bot.journal.conn.execute(
+        "SELECT price, qty, reason FROM events WHERE side = 'LONG_CLOSE' ORDER BY id DESC LIMIT 1"
+    ).fetchone()
+
+
+@check("stream")
+def stream_check() -> list[str]:
+    """
+    sfp_bot with a simulated exchange and a ccxt.pro bitget on the WebSocket
+    stand-in: a TP fill pushed over the stream is journaled as LONG_CLOSE,
+    and with the socket dropped the same fill is found by REST at the close.
+    """
+    import tempfile
+    import replay
+    import sfp_bot as bot
+    from order_stream import OrderStream
+    from sim_exchange import SimClock, SimExchange
+    problems = []
+    tf  = bot.TIMEFRAME_MS
+    df  = make_ohlcv(bot.CANDLE_LIMIT + 200, seed=11, end_ms=1_700_000_000_000 // tf * tf)
+    ts  = df["ts"].to_numpy()
+    wide = [i for i in range(bot.CANDLE_LIMIT + 10, len(df) - 2)
+            if df["high"].iloc[i] - df["open"].iloc[i] > 20]
+    k, j = wide[0], next(i for i in wide if i > wide[0] + 2)
+
+    clock = SimClock(ts[k] / 1000 + bot.CLOSE_GRACE)
+    sim   = SimExchange(df, clock, timeframe_ms=tf)
+    with tempfile.TemporaryDirectory() as tmp, BitgetWSStandIn() as ws:
+        replay.install(clock, sim, tmp)
+        bot.state.load()
+        bot.sync_candles()
+        while not bot.stream_events.empty():
+            bot.stream_events.get_nowait()
+        stream = OrderStream(ws.client(), sim.market(bot.SYMBOL)["symbol"],
+                             on_order=bot._queue_stream_event("order"),
+                             on_position=bot._queue_stream_event("position"))
+        bot.order_stream = stream
+        stream.start()
+        try:
+            # ── Subscribed is not healthy: wait for a first update ───────────
+            _open_long(bot, sim, df, k)
+            tp_id = bot.state.tp_order_id
+            if not _wait(lambda: ws.subscribed("orders") and ws.subscribed("positions")):
+                return problems + ["order stream never subscribed to the stand-in"]
+            time.sleep(0.2)
+            if bot.stream_ok():
+                problems.append("stream healthy before any watch_orders / watch_positions update")
+            ws.push_order(_as_bitget(sim.orders[tp_id]))
+            ws.push_positions([BitgetWSStandIn.position(0.01, bot.state.entry_price)])
+            if not _wait(bot.stream_ok):
+                return problems + ["stream not healthy after order and position updates"]
+            bot.process_stream_events()
+
+            # ── TP fill pushed over the stream ─────────────────────────────────
+            # The simulator matches limits at the close, so settle candle k and
+            # push its fill while the bot's clock is still inside that candle.
+            clock.now = (ts[k] + tf) / 1000 + 1
+            sim.fetch_positions()
+            filled = sim.orders[tp_id]
+            if filled["status"] != "closed":
+                return problems + ["simulated TP did not fill (test data)"]
+            clock.now = (ts[k] + tf) / 1000 - 5
+            rest_before = bot.snapshot.calls.get("fetch_order", 0)
+            ws.push_order(_as_bitget(filled))
+            if not _wait(lambda: not bot.stream_events.empty()):
+                return problems + ["pushed TP fill never reached the bot"]
+            bot.process_stream_events()
+            row = _last_close(bot)
+            if row is None or row[2] != "TP_LIMIT_FILLED" or abs(float(row[0]) - filled["average"]) > 1e-6:
+                problems.append(f"stream TP fill journaled as {row}")
+            if bot.state.entry_price is not None:
+                problems.append("state not cleared after the stream TP fill")
+            if bot.state.last_entry_candle_ts != ts[k] + tf:
+                problems.append(f"stream path blocks re-entry at {bot.state.last_entry_candle_ts}, "
+                                f"expected the close of the TP candle ({ts[k] + tf})")
+            if bot.snapshot.calls.get("fetch_order", 0) != rest_before:
+                problems.append("TP fill was polled over REST while the stream was healthy")
+
+            # ── Socket dropped: REST polling finds the next fill ─────────────
+            clock.now = ts[j] / 1000 + bot.CLOSE_GRACE
+            _open_long(bot, sim, df, j)
+            tp_id = bot.state.tp_order_id
+            ws.drop(refuse=True)
+            if not _wait(lambda: not bot.stream_ok()):
+                return problems + ["stream still healthy after the socket was dropped"]
+            clock.now = (ts[j] + tf) / 1000 + bot.CLOSE_GRACE
+            rest_before = bot.snapshot.calls.get("fetch_order", 0)
+            outcome = bot.tick(int(ts[j] + tf))
+            row = _last_close(bot)
+            filled = sim.orders[tp_id]
+            if row is None or row[2] != "TP_LIMIT_FILLED" or abs(float(row[0]) - filled["average"]) > 1e-6:
+                problems.append(f"REST fallback journaled {row} (tick -> {outcome})")
+            if bot.snapshot.calls.get("fetch_order", 0) == rest_before:
+                problems.append("REST fallback did not query the TP order")
+            if bot.state.last_entry_candle_ts != ts[j] + tf:
+                problems.append(f"REST path blocks re-entry at {bot.state.last_entry_candle_ts}, "
+                                f"expected the close of the TP candle ({ts[j] + tf})")
+
+            # ── Reconnect: healthy again only after a fresh update ───────────
+            ws.accept()
+            if not _wait(lambda: ws.subscribed("orders") and ws.subscribed("positions"), 20):
+                problems.append("order stream did not resubscribe after the stand-in came back")
+            else:
+                ws.push_order(_as_bitget(filled))
+                ws.push_positions([BitgetWSStandIn.position(0.01, 30_000.0)])
+                if not _wait(bot.stream_ok):
+                    problems.append("stream not healthy again after reconnecting")
+        finally:
+            stream.stop()
+            bot.order_stream = None
+            bot.journal.close()
+    return problems
+
+
+@check("close_stop")
+def close_stop_check() -> list[str]:
+    """
+    sfp_bot with a simulated exchange and a long whose candle closes below
+    the invalidation: the loop wakes STOP_GRACE after the close, the market
+    exit goes out before the TP is cancelled, and the stop is journaled.
+    Every fetch_ohlcv, the startup backfill pages included, is counted.
+    """
+    import tempfile
+    import replay
+    import sfp_bot as bot
+    from sim_exchange import SimClock, SimExchange
+    problems = []
+    tf = bot.TIMEFRAME_MS
+    df = make_ohlcv(bot.CANDLE_LIMIT + 50, seed=12, end_ms=1_700_000_000_000 // tf * tf)
+    ts = df["ts"].to_numpy()
+    k  = bot.CANDLE_LIMIT + 10
+
+    clock = SimClock(ts[k] / 1000 + bot.CLOSE_GRACE)
+    sim   = SimExchange(df, clock, timeframe_ms=tf)
+    order: list[str] = []
+    for name in ("create_market_sell_order", "cancel_order"):
+        def record(*args, _name=name, _fn=getattr(sim, name), **kwargs):
+            order.append(_name)
+            return _fn(*args, **kwargs)
+        setattr(sim, name, record)
+    with tempfile.TemporaryDirectory() as tmp:
+        replay.install(clock, sim, tmp)
+        try:
+            bot.state.load()
+            bot.sync_candles()
+            _open_long(bot, sim, df, k)
+            bot.state.invalidation = float(df["close"].iloc[k]) + 1.0
+            bot.state.tp           = float(df["high"].iloc[k]) + 1_000.0
+            bot.cancel_tp_order(bot.state.tp_order_id)
+            bot.state.tp_order_id  = bot.place_tp_limit_order(0.01, bot.state.tp)
+            bot.state.save()
+            tp_id = bot.state.tp_order_id
+            order.clear()
+
+            expected = bot.sleep_until_next_candle()
+            late = clock.now - (ts[k] + tf) / 1000
+            if abs(late - bot.STOP_GRACE) > 1e-6:
+                problems.append(f"woke {late:.2f} s after the close, expected STOP_GRACE "
+                                f"({bot.STOP_GRACE} s) with a position open")
+            outcome = bot.tick(expected)
+            row = _last_close(bot)
+            if row is None or row[2] != "STOP_INVALIDATION":
+                problems.append(f"close below the invalidation journaled {row} (tick -> {outcome})")
+            if order != ["create_market_sell_order", "cancel_order"]:
+                problems.append(f"exit calls went out as {order}, expected the market sell first")
+            if sim.position is not None:
+                problems.append("position still open after the stop")
+            if sim.orders[tp_id]["status"] != "canceled":
+                problems.append(f"TP order left {sim.orders[tp_id]['status']} after the stop")
+            if bot.state.entry_price is not None:
+                problems.append("state not cleared after the stop")
+            counted = bot.snapshot.call_counts().get("fetch_ohlcv", 0)
+            if counted != sim.calls.get("fetch_ohlcv", 0):
+                problems.append(f"{counted} fetch_ohlcv calls counted, the exchange saw "
+                                f"{sim.calls.get('fetch_ohlcv', 0)} (backfill included)")
+        finally:
+            bot.journal.close()
+    return problems
+
+
+@check("late_candle")
+def late_candle_check() -> list[str]:
+    """
+    sfp_bot with a simulated exchange that never publishes the candle after
+    k: once POLL_INTERVAL has passed the tick evaluates anyway, and a long
+    whose candle k closes below the invalidation is stopped on candle k.
+    """
+    import tempfile
+    import replay
+    import sfp_bot as bot
+    from sim_exchange import SimClock, SimExchange
+    problems = []
+    tf = bot.TIMEFRAME_MS
+    df = make_ohlcv(bot.CANDLE_LIMIT + 50, seed=13, end_ms=1_700_000_000_000 // tf * tf)
+    ts, close = df["ts"].to_numpy(), df["close"].to_numpy()
+    k  = next(i for i in range(bot.CANDLE_LIMIT + 10, len(df) - 2) if close[i] < close[i - 1] - 2)
+    expected = int(ts[k] + tf)
+
+    clock = SimClock(ts[k] / 1000 + bot.CLOSE_GRACE)
+    sim   = SimExchange(df, clock, timeframe_ms=tf)
+    fetch = sim.fetch_ohlcv
+    sim.fetch_ohlcv = lambda *a, **kw: [r for r in fetch(*a, **kw) if r[0] < expected]
+    with tempfile.TemporaryDirectory() as tmp:
+        replay.install(clock, sim, tmp)
+        try:
+            bot.state.load()
+            bot.sync_candles()
+            _open_long(bot, sim, df, k)
+            bot.state.invalidation = float(close[k]) + 1.0      # candle k-1 closed above it
+            bot.state.tp           = float(df["high"].iloc[k]) + 1_000.0
+            bot.cancel_tp_order(bot.state.tp_order_id)
+            bot.state.tp_order_id  = bot.place_tp_limit_order(0.01, bot.state.tp)
+            bot.state.save()
+            bot.refresh_candles()
+
+            clock.now = expected / 1000 + bot.CLOSE_GRACE
+            if bot.tick(expected) != bot.RETRY_SOON:
+                problems.append("missing candle was not polled for again")
+            clock.now = expected / 1000 + bot.POLL_INTERVAL + 1
+            outcome = bot.tick(expected)
+            row = _last_close(bot)
+            if row is None or row[2] != "STOP_INVALIDATION":
+                problems.append(f"late candle k closing below the invalidation journaled {row} "
+                                f"(tick -> {outcome})")
+            if sim.position is not None:
+                problems.append("position still open after the late-candle stop")
+            if bot.state.last_entry_candle_ts != expected:
+                problems.append(f"re-entry blocked at {bot.state.last_entry_candle_ts}, "
+                                f"expected the close of candle k ({expected})")
+        finally:
+            bot.journal.close()
+    return problems
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="functional checks against local stand-ins")
+    ap.add_argument("names", nargs="*", help=f"checks to run (default: all of {', '.join(CHECKS)})")
+    args = ap.parse_args(argv)
+    unknown = set(args.names) - set(CHECKS)
+    if unknown:
+        ap.error(f"unknown checks: {', '.join(sorted(unknown))}")
+    logging.basicConfig(level=logging.ERROR, format="%(levelname)s %(name)s: %(message)s")
+    failures = []
+    for name in args.names or list(CHECKS):
+        problems = CHECKS[name]()
+        print(f"{name:<28} {'OK' if not problems else 'FAILED'}")
+        for p in problems:
+            print(f"    {p}")
+        if problems:
+            failures.append(name)
+    if failures:
+        print("\nCHECK FAILURE: " + ", ".join(failures), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
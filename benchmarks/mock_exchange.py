@@ -0,0 +1,137 @@
+import time
+import bisect
+
+from benchmarks.synthetic import make_ohlcv, TF_MS
+
+
+class MockExchange:
+    """
+    In-memory stand-in for the ccxt bitget methods the bot calls.
+    Candles come from make_ohlcv and end at the current 30m boundary; the
+    account starts flat with a fixed balance. Market orders fill at the last
+    close, a BUY may carry an attached stop (params["stopLoss"]) that lives
+    with the position, and trade(low, high) moves the market through stops
+    and resting limit sells. Every method call is counted.
+    """
+
+    precisionMode = 4
+
+    def __init__(self, n_candles: int = 2_000, balance: float = 1_000.0, seed: int = 0):
+        df = make_ohlcv(n_candles, seed=seed)
+        self.candles  = [[int(r[0]), *r[1:]] for r in
+                         df[["ts", "open", "high", "low", "close", "volume"]].values.tolist()]
+        self._ts      = [r[0] for r in self.candles]
+        self.balance  = balance
+        self.position = None
+        self.stop_price: float | None = None     # stop attached to the position
+        self.orders: dict = {}
+        self._next_id = 1
+        self.calls: dict = {}
+        self.markets  = {"BTCUSDT": {
+            "id": "BTCUSDT", "symbol": "BTC/USDT:USDT", "contractSize": 1,
+            "precision": {"price": 0.1, "amount": 0.0001},
+            "limits": {"amount": {"min": 0.0001}},
+        }}
+
+    def _count(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    @staticmethod
+    def parse_timeframe(tf: str) -> int:
+        return TF_MS // 1000
+
+    def market(self, symbol: str) -> dict:
+        return self.markets["BTCUSDT"]
+
+    def fetch_time(self) -> int:
+        self._count("fetch_time")
+        return int(time.time() * 1000)
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None, params=None):
+        self._count("fetch_ohlcv")
+        limit = limit or 1000
+        if since is None:
+            rows = self.candles[-limit:]
+        else:
+            i    = bisect.bisect_left(self._ts, since)
+            rows = self.candles[i:i + limit]
+        return [list(r) for r in rows]
+
+    def fetch_positions(self, symbols=None, params=None):
+        self._count("fetch_positions")
+        return [self.position] if self.position else []
+
+    def fetch_balance(self, params=None):
+        self._count("fetch_balance")
+        return {"USDT": {"free": self.balance, "total": self.balance},
+                "total": {"USDT": self.balance}, "free": {"USDT": self.balance}}
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        self._count("fetch_open_orders")
+        return [o for o in self.orders.values() if o["status"] == "open"]
+
+    # ── Orders ────────────────────────────────────────────────────────────────
+    def _order(self, side, type_, amount, price, status, reduce_only=False) -> dict:
+        oid = str(self._next_id)
+        self._next_id += 1
+        o = {"id": oid, "symbol": "BTC/USDT:USDT", "side": side, "type": type_,
+             "amount": amount, "price": price, "status": status,
+             "filled": amount if status == "closed" else 0.0,
+             "remaining": 0.0 if status == "closed" else amount,
+             "average": price if status == "closed" else None,
+             "reduceOnly": reduce_only, "info": {"orderId": oid}}
+        self.orders[oid] = o
+        return o
+
+    def _close_position(self, price: float):
+        pos = self.position
+        self.balance += (price - pos["entryPrice"]) * pos["contracts"]
+        self.position   = None
+        self.stop_price = None
+
+    def create_market_buy_order(self, symbol, amount, params=None):
+        self._count("create_market_buy_order")
+        price = self.candles[-1][4]
+        stop  = ((params or {}).get("stopLoss") or {}).get("triggerPrice")
+        self.position   = {"symbol": "BTC/USDT:USDT", "contracts": amount, "side": "long",
+                           "entryPrice": price, "info": {}}
+        self.stop_price = float(stop) if stop is not None else None
+        return self._order("buy", "market", amount, price, "closed")
+
+    def create_market_sell_order(self, symbol, amount, params=None):
+        self._count("create_market_sell_order")
+        price = self.candles[-1][4]
+        if self.position:
+            self._close_position(price)
+        return self._order("sell", "market", amount, price, "closed", reduce_only=True)
+
+    def create_limit_sell_order(self, symbol, amount, price, params=None):
+        self._count("create_limit_sell_order")
+        return self._order("sell", "limit", amount, price, "open",
+                           reduce_only=bool((params or {}).get("reduceOnly")))
+
+    def cancel_order(self, id, symbol=None, params=None):
+        self._count("cancel_order")
+        o = self.orders.get(str(id))
+        if o is None or o["status"] != "open":
+            raise KeyError(f"order {id} not open")
+        o["status"] = "canceled"
+        return o
+
+    def fetch_order(self, id, symbol=None, params=None):
+        self._count("fetch_order")
+        return self.orders[str(id)]
+
+    def trade(self, low: float, high: float):
+        """Move the market through [low, high]: the stop first, then limit sells."""
+        if self.position and self.stop_price is not None and low <= self.stop_price:
+            self._order("sell", "market", self.position["contracts"], self.stop_price,
+                        "closed", reduce_only=True)
+            self._close_position(self.stop_price)
+        for o in self.orders.values():
+            if o["status"] == "open" and o["side"] == "sell" and high >= o["price"]:
+                if o["reduceOnly"] and not self.position:
+                    continue
+                o.update(status="closed", filled=o["amount"], remaining=0.0, average=o["price"])
+                if self.position:
+                    self._close_position(o["price"])
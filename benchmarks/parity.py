@@ -0,0 +1,210 @@
+"""
+Bit-for-bit parity of the kernel signal path against the original pandas one.
+
+    python -m benchmarks.parity [--sizes 1000 20000 200000] [--engine-sizes 50000]
+
+reference_signals() is the pandas pipeline compute_signals used before the
+kernels module; it is kept here only as the oracle. Every size is checked on
+both kernel backends (numba when installed, and the NumPy fallback), on raw
+random-walk prices and on prices / volumes rounded to a coarse grid so that
+ties in the MA / volume comparisons actually occur. The streaming
+SignalEngine is checked against the same oracle bar by bar: update() on each
+closed candle, and prearm().check() on the candle before it is fed in. The
+HTF trend filter is also checked for the same history read from a CSV export
+and from a dataset directory. Exit code 1 on any mismatch.
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import kernels
+import dataset
+from sweep import load_csv
+from sfp_signals import (
+    compute_signal_frame, htf_trend, SignalEngine, SWING_N, PIVOT_WINDOW, MA_PERIOD, MIN_DISTANCE,
+    VOLUME_LOOKBACK, ATR_PERIOD, ATR_MULTIPLIER,
+)
+from benchmarks.synthetic import make_ohlcv
+
+
+def _atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int) -> pd.Series:
+    prev_close = close.shift(1)
+    tr = pd.concat([
+        high - low,
+        (high - prev_close).abs(),
+        (low  - prev_close).abs(),
+    ], axis=1).max(axis=1)
+    return tr.rolling(period, min_periods=1).mean()
+
+
+def reference_signals(df: pd.DataFrame, htf: str | None = None, htf_ma_period: int = 50) -> dict:
+    """
+    Full-series entry / pivot_low / tp, computed exactly as before the kernels
+    (with compute_signals' length guard applied bar by bar).
+    """
+    open_, high, low, close, volume = (df[c] for c in ("open", "high", "low", "close", "volume"))
+
+    swing_low_mask = low == low.rolling(window=2 * SWING_N + 1, center=True).min()
+    confirmed_swing_lows = low.where(swing_low_mask).shift(SWING_N)
+    pivot_low = confirmed_swing_lows.rolling(window=PIVOT_WINDOW, min_periods=1).min().shift(1)
+
+    idx = np.arange(len(low))
+    pivot_pos      = np.where(~confirmed_swing_lows.isna(), idx, -1)
+    last_pivot_pos = np.maximum.accumulate(pivot_pos)
+    distance_from_low = pd.Series(
+        np.where(last_pivot_pos >= 0, idx - last_pivot_pos, np.nan), index=low.index)
+
+    atr          = _atr(high, low, close, ATR_PERIOD)
+    candle_range = high - low
+    ma           = close.rolling(MA_PERIOD, min_periods=1).mean()
+    vol_avg      = volume.rolling(VOLUME_LOOKBACK).mean().shift(1)
+
+    sfp_raw = (low < pivot_low) & (close > pivot_low) & (close > open_)
+    entry = (
+        sfp_raw &
+        (ma > ma.shift(1)).fillna(False) &
+        (distance_from_low >= MIN_DISTANCE).fillna(False) &
+        (volume > vol_avg.fillna(np.inf)) &
+        (candle_range < ATR_MULTIPLIER * atr)
+    )
+    if htf:
+        entry &= htf_trend(df, htf, htf_ma_period)
+    entry.iloc[: MA_PERIOD + SWING_N + 9] = False
+    return {
+        "entry":     entry.to_numpy(),
+        "pivot_low": pivot_low.to_numpy(),
+        "tp":        high.rolling(PIVOT_WINDOW).max().shift(1).to_numpy(),
+    }
+
+
+def _gridded(df: pd.DataFrame, step: float = 50.0) -> pd.DataFrame:
+    out = df.copy()
+    for c in ("open", "high", "low", "close"):
+        out[c] = (out[c] / step).round() * step
+    out["high"]   = out[["open", "high", "close"]].max(axis=1)
+    out["low"]    = out[["open", "low", "close"]].min(axis=1)
+    out["volume"] = out["volume"].round()
+    return out
+
+
+def mismatches(df: pd.DataFrame, htf: str | None = None) -> dict:
+    """{column: differing bar count} between the kernel path and the reference."""
+    ref = reference_signals(df, htf)
+    sig = compute_signal_frame(df, {"htf": htf})
+    out = {}
+    for k, a in ref.items():
+        b = sig["entries" if k == "entry" else k]
+        same = (a == b) | (np.isnan(a) & np.isnan(b)) if a.dtype.kind == "f" else a == b
+        out[k] = int(np.count_nonzero(~same))
+    return out
+
+
+def engine_mismatches(df: pd.DataFrame, htf: str | None = None) -> dict:
+    """
+    {column: differing bar count} between SignalEngine and the reference, for
+    update() and for the armed check of the same bar made one bar earlier.
+    """
+    ref  = reference_signals(df, htf)
+    low  = df["low"].to_numpy(dtype=float)
+    rows = df[["ts", "open", "high", "low", "close", "volume"]].itertuples(index=False)
+    eng  = SignalEngine(htf=htf)
+    ready = MA_PERIOD + SWING_N + 9          # compute_signals' length guard
+    out = {f"{src}/{k}": 0 for src in ("update", "armed")
+           for k in ("entry", "pivot_low", "tp", "invalidation")}
+    for i, r in enumerate(rows):
+        bar = (r.open, r.high, r.low, r.close, r.volume)
+        armed = eng.prearm().check(*bar)
+        live  = eng.update(int(r.ts), *bar)
+        for src, sig in (("update", live), ("armed", armed)):
+            if sig["entry"] != ref["entry"][i]:
+                out[f"{src}/entry"] += 1
+            if i < ready:
+                continue
+            for k, want in (("pivot_low", ref["pivot_low"][i]), ("tp", ref["tp"][i]),
+                            ("invalidation", low[i])):
+                got = np.nan if sig[k] is None else sig[k]
+                if not (got == want or (np.isnan(got) and np.isnan(want))):
+                    out[f"{src}/{k}"] += 1
+    return out
+
+
+def check_engine(sizes) -> list[str]:
+    failures = []
+    for n in sizes:
+        raw = make_ohlcv(n, seed=n)
+        for label, df, htf in (("raw", raw, None), ("grid", _gridded(raw), None),
+                               ("htf", raw, "4h")):
+            bad = {k: v for k, v in engine_mismatches(df, htf).items() if v}
+            name = f"engine/{label}[{n}]"
+            print(f"{name:<28} {'OK' if not bad else bad}")
+            if bad:
+                failures.append(name)
+    return failures
+
+
+def check_inputs(n: int = 5_000, htf: str = "4h") -> list[str]:
+    """
+    htf_trend on the frame, on its CSV export read with load_csv (timestamp
+    index, no ts column; pandas 3 parses it as datetime64[us]) and on the
+    ingested dataset must agree, and must not be all False.
+    """
+    df  = make_ohlcv(n, seed=n)
+    out = pd.DataFrame({"timestamp": pd.to_datetime(df["ts"], unit="ms"), "Open": df["open"],
+                        "High": df["high"], "Low": df["low"], "Close": df["close"],
+                        "Volume": df["volume"]})
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = os.path.join(tmp, "ohlcv.csv")
+        out.to_csv(csv, index=False)
+        dataset.ingest(csv, os.path.join(tmp, "ohlcv"))
+        want = htf_trend(df, htf, 50)
+        for label, path in (("csv", csv), ("dataset", os.path.join(tmp, "ohlcv"))):
+            got  = compute_signal_frame(load_csv(path), {"htf": htf})["htf_ok"]
+            bad  = int((got != want).sum())
+            name = f"inputs/{label}[{n}]"
+            print(f"{name:<28} {'OK' if not bad and want.any() else f'htf_ok: {bad} mismatches'}")
+            if bad or not want.any():
+                failures.append(name)
+    return failures
+
+
+def check(sizes) -> list[str]:
+    failures = []
+    backends = [True, False] if kernels.numba is not None else [False]
+    saved = kernels.USE_NUMBA
+    try:
+        for use_numba in backends:
+            kernels.USE_NUMBA = use_numba
+            for n in sizes:
+                raw = make_ohlcv(n, seed=n)
+                for label, df, htf in (("raw", raw, None), ("grid", _gridded(raw), None),
+                                       ("htf", raw, "4h")):
+                    bad = {k: v for k, v in mismatches(df, htf).items() if v}
+                    name = f"{kernels.backend()}/{label}[{n}]"
+                    print(f"{name:<28} {'OK' if not bad else bad}")
+                    if bad:
+                        failures.append(name)
+    finally:
+        kernels.USE_NUMBA = saved
+    return failures
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="kernel vs pandas signal parity")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 20_000, 200_000])
+    ap.add_argument("--engine-sizes", type=int, nargs="+", default=[50_000],
+                    help="history lengths for the bar-by-bar SignalEngine check")
+    args = ap.parse_args(argv)
+    failures = check(args.sizes) + check_engine(args.engine_sizes) + check_inputs()
+    if failures:
+        print("\nPARITY FAILURE: " + ", ".join(failures), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
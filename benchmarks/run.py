@@ -0,0 +1,295 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks.run [--quick] [--save benchmarks/results.json]
+                             [--baseline benchmarks/baseline.json]
+                             [--update-baseline] [--no-compare] [--tolerance 0.25]
+
+Each benchmark reports p50 / p99 latency (ms) and throughput (ops/s) and is
+compared with the committed baseline for the same mode (full or --quick):
+any benchmark whose p50 is more than `tolerance` slower is reported as a
+regression and the exit code is 1. A missing baseline, or one that shares no
+benchmark with the run, is also an error; --no-compare only prints. The
+baseline records the machine it was measured on. Timings from other hardware
+are not comparable, so re-record with --update-baseline there first.
+"""
+import os
+import csv
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+
+import numpy as np
+
+import sfp_bot
+import kernels
+from sfp_signals import compute_signals, compute_signal_frame, SignalEngine
+from journal import Journal, LOG_COLS
+from candle_store import CandleStore
+from exchange_cache import ExchangeSnapshot
+from instrument import BTCUSDT
+from benchmarks.synthetic import make_ohlcv
+from benchmarks.mock_exchange import MockExchange
+from benchmarks.parity import reference_signals
+
+BASELINE  = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TOLERANCE = 0.25    # allowed p50 slowdown vs baseline before failing
+MIN_DELTA = 0.05    # ms; slowdowns smaller than this are timer noise, never regressions
+
+
+def _measure(fn, repeat: int, setup=None, ops: int = 1) -> dict:
+    """Time `fn(setup())` `repeat` times; `ops` is the work per call for throughput."""
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0  = time.perf_counter()
+        fn(arg) if setup else fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    s = np.asarray(samples)
+    p50 = float(np.percentile(s, 50))
+    return {
+        "repeat":     repeat,
+        "p50_ms":     round(p50, 4),
+        "p99_ms":     round(float(np.percentile(s, 99)), 4),
+        "throughput": round(ops / (p50 / 1000), 1) if p50 > 0 else None,
+    }
+
+
+# ── Benchmarks ────────────────────────────────────────────────────────────────
+def bench_compute_signals(sizes, repeat) -> dict:
+    out = {}
+    for n in sizes:
+        df = make_ohlcv(n, seed=n)
+        out[f"compute_signals[{n}]"] = _measure(lambda: compute_signals(df), repeat, ops=1)
+    return out
+
+
+def bench_kernels(n, repeat) -> dict:
+    """Full-history signals: original pandas pipeline vs the kernels (numba if installed)."""
+    df  = make_ohlcv(n, seed=n)
+    ref = _measure(lambda: reference_signals(df), repeat)
+
+    def frame():
+        sig = compute_signal_frame(df)
+        return sig["entries"], sig["pivot_low"], sig["tp"]
+
+    new = _measure(frame, repeat)
+    new["speedup"] = round(ref["p50_ms"] / new["p50_ms"], 1) if new["p50_ms"] else None
+    return {f"signals_pandas[{n}]": ref, f"signals_{kernels.backend()}[{n}]": new}
+
+
+def bench_signal_engine(n, repeat) -> dict:
+    """Per-candle cost of SignalEngine.update after warm-up (ops = candles)."""
+    df   = make_ohlcv(n, seed=1)
+    warm = len(df) // 2
+    rows = df.iloc[warm:][["ts", "open", "high", "low", "close", "volume"]].values.tolist()
+
+    def setup():
+        return SignalEngine.from_df(df.iloc[:warm])
+
+    def feed(eng):
+        for ts, o, h, l, c, v in rows:
+            eng.update(int(ts), o, h, l, c, v)
+
+    return {f"signal_engine_update[{len(rows)}]": _measure(feed, repeat, setup, ops=len(rows))}
+
+
+def bench_armed_check(repeat) -> dict:
+    """Close-time signal cost once the bar is pre-armed (vs compute_signals[...])."""
+    df    = make_ohlcv(sfp_bot.CANDLE_LIMIT, seed=2)
+    armed = SignalEngine.from_df(df.iloc[:-1]).prearm()
+    last  = df.iloc[-1]
+    bar   = (last["open"], last["high"], last["low"], last["close"], last["volume"])
+    return {"armed_check": _measure(lambda: armed.check(*bar), repeat * 50)}
+
+
+def _trade_rows(n: int) -> list[list]:
+    rows = []
+    for i in range(n):
+        side = ("LONG_OPEN", "TP_ORDER", "BOT_STATE", "LONG_CLOSE")[i % 4]
+        rows.append(["2024-01-01 00:00:00", sfp_bot.SYMBOL, side, "30000.0", "0.01", "300.0",
+                     "1000.0", "0.0", "", "30000.0", str(1_700_000_000_000 + i), "29500.0",
+                     "31000.0", str(1_700_000_000_000 + i), "2024-01-01", str(i)])
+    return rows
+
+
+def bench_state_load(sizes, repeat, tmp) -> dict:
+    """
+    State.load against a journal with `n` events (steady state: one snapshot
+    lookup) and against a legacy trade_log.csv of `n` rows (first start:
+    CSV migration + lookup).
+    """
+    out = {}
+    sfp_bot.LOG_FILE = os.path.join(tmp, "missing.csv")
+    for n in sizes:
+        rows = _trade_rows(n)
+        path = os.path.join(tmp, f"journal_{n}.db")
+        j = Journal(path)
+        with j.conn:
+            j.conn.execute("BEGIN IMMEDIATE")
+            j.conn.executemany(f"INSERT INTO events ({', '.join(LOG_COLS)}) "
+                               f"VALUES ({', '.join('?' * len(LOG_COLS))})", rows)
+        j.record(rows[-1], {"last_daily_date": "2024-01-01"})
+        sfp_bot.journal = j
+        out[f"state_load_journal[{n}]"] = _measure(lambda: sfp_bot.State().load(), repeat)
+        j.close()
+
+        csv_path = os.path.join(tmp, f"trade_log_{n}.csv")
+        with open(csv_path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(LOG_COLS)
+            w.writerows(rows)
+        counter = iter(range(repeat))
+
+        def fresh_journal():
+            k = next(counter)
+            sfp_bot.journal = Journal(os.path.join(tmp, f"migrate_{n}_{k}.db"))
+            return sfp_bot.journal
+
+        def load_from_csv(j):
+            sfp_bot.State().load()
+            j.close()
+
+        sfp_bot.LOG_FILE = csv_path
+        out[f"state_load_csv[{n}]"] = _measure(load_from_csv, repeat, fresh_journal)
+        sfp_bot.LOG_FILE = os.path.join(tmp, "missing.csv")
+    return out
+
+
+def bench_tick(repeat, tmp) -> dict:
+    """One steady-state main-loop iteration (flat account, no signal) on MockExchange."""
+    mock = MockExchange(n_candles=sfp_bot.CANDLE_LIMIT + 200)
+    sfp_bot.exchange = mock
+    sfp_bot.snapshot = ExchangeSnapshot(mock, sfp_bot.SYMBOL)
+    sfp_bot.journal  = Journal(os.path.join(tmp, "tick.db"))
+    sfp_bot.store    = CandleStore(os.path.join(tmp, "tick_candles.bin"))
+    sfp_bot.spec     = BTCUSDT
+    sfp_bot.notifier = None
+    sfp_bot.state    = sfp_bot.State()
+    sfp_bot.candles  = None
+    sfp_bot.sync_candles()
+    sfp_bot.tick()                                  # warm the forming candle / clock
+
+    mock.calls.clear()
+    result = _measure(lambda: sfp_bot.tick(), repeat)
+    result["exchange_calls_per_tick"] = {k: v / repeat for k, v in mock.calls.items()}
+    sfp_bot.journal.close()
+    return {"tick": result}
+
+
+def run_all(quick: bool = False) -> dict:
+    logging.getLogger("sfp_bot").setLevel(logging.WARNING)
+    kernels.warmup()
+    sizes_sig   = [1_000, 5_000] if quick else [1_000, 5_000, 20_000, 100_000]
+    sizes_state = [1_000, 10_000] if quick else [1_000, 10_000, 100_000]
+    repeat      = 5 if quick else 20
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        results.update(bench_compute_signals(sizes_sig, repeat))
+        results.update(bench_kernels(100_000 if quick else 1_000_000, max(3, repeat // 4)))
+        results.update(bench_signal_engine(5_000 if quick else 20_000, max(3, repeat // 4)))
+        results.update(bench_armed_check(repeat))
+        results.update(bench_state_load(sizes_state, repeat, tmp))
+        results.update(bench_tick(repeat * 2, tmp))
+    return results
+
+
+# ── Baseline comparison ───────────────────────────────────────────────────────
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE) -> list[str]:
+    """Names of benchmarks whose p50 regressed by more than `tolerance`."""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("p50_ms"):
+            continue
+        ratio = r["p50_ms"] / base["p50_ms"]
+        r["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + tolerance and r["p50_ms"] - base["p50_ms"] > MIN_DELTA:
+            regressions.append(name)
+    return regressions
+
+
+def load_baseline(path: str, mode: str) -> dict | None:
+    """The baseline document for mode ("full" / "quick"), or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f).get(mode)
+
+
+def _print(results: dict):
+    print(f"{'benchmark':<32} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>12} {'vs base':>8}")
+    for name, r in results.items():
+        vs = f"{r['vs_baseline']:.2f}x" if "vs_baseline" in r else ""
+        tp = f"{r['throughput']:,.0f}" if r.get("throughput") else ""
+        sp = f"  ({r['speedup']}x vs pandas)" if r.get("speedup") else ""
+        print(f"{name:<32} {r['p50_ms']:>10.3f} {r['p99_ms']:>10.3f} {tp:>12} {vs:>8}{sp}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="SFP bot benchmarks")
+    ap.add_argument("--quick", action="store_true", help="smaller sizes / fewer repeats")
+    ap.add_argument("--save", help="write results JSON to this path")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--update-baseline", action="store_true",
+                    help="store this run as the baseline for its mode")
+    ap.add_argument("--no-compare", action="store_true",
+                    help="print results without checking them against the baseline")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE,
+                    help="allowed p50 slowdown fraction (default %(default)s)")
+    args = ap.parse_args(argv)
+
+    mode    = "quick" if args.quick else "full"
+    results = run_all(args.quick)
+    doc = {
+        "created":  time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python":   platform.python_version(),
+        "machine":  platform.machine(),
+        "quick":    args.quick,
+        "results":  results,
+    }
+
+    regressions, problem = [], None
+    if not (args.update_baseline or args.no_compare):
+        base = load_baseline(args.baseline, mode)
+        if base is None:
+            problem = f"no {mode} baseline in {args.baseline} (run with --update-baseline)"
+        else:
+            regressions = compare(results, base.get("results", {}), args.tolerance)
+            if not any("vs_baseline" in r for r in results.values()):
+                problem = f"the {mode} baseline in {args.baseline} shares no benchmark with this run"
+            elif (base.get("machine"), base.get("python")) != (doc["machine"], doc["python"]):
+                print(f"note: baseline measured on {base.get('machine')} / Python "
+                      f"{base.get('python')}, this run on {doc['machine']} / Python {doc['python']}")
+    _print(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(doc, f, indent=2)
+    if args.update_baseline:
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                stored = json.load(f)
+        stored[mode] = doc
+        with open(args.baseline, "w") as f:
+            json.dump(stored, f, indent=2)
+        print(f"{mode.capitalize()} baseline written to {args.baseline}")
+
+    if problem:
+        print(f"\nNO BASELINE: {problem}", file=sys.stderr)
+        return 1
+    if regressions:
+        print(f"\nREGRESSION (> {args.tolerance:.0%} slower than baseline): "
+              + ", ".join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
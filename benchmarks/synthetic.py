@@ -0,0 +1,29 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+TF_MS = 30 * 60 * 1000
+
+
+def make_ohlcv(n: int, seed: int = 0, end_ms: int | None = None,
+               tf_ms: int = TF_MS, start_price: float = 30_000.0) -> pd.DataFrame:
+    """
+    Random-walk OHLCV in the fetch_df layout (ts column, UTC DatetimeIndex).
+    The last candle opens at the current timeframe boundary unless end_ms is given.
+    """
+    rng   = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = np.r_[start_price, close[:-1]]
+    span  = np.abs(rng.normal(0, 0.003, n)) * close
+    high  = np.maximum(open_, close) + span * rng.random(n)
+    low   = np.minimum(open_, close) - span * rng.random(n)
+    vol   = rng.lognormal(3, 0.6, n)
+
+    if end_ms is None:
+        end_ms = int(time.time() * 1000) // tf_ms * tf_ms
+    ts = end_ms - tf_ms * np.arange(n - 1, -1, -1, dtype=np.int64)
+    df = pd.DataFrame({"ts": ts, "open": open_, "high": high, "low": low,
+                       "close": close, "volume": vol})
+    df["time"] = pd.to_datetime(df["ts"], unit="ms", utc=True)
+    return df.set_index("time")
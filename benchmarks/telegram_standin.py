@@ -0,0 +1,90 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class TelegramStandIn:
+    """
+    Local HTTP server answering the Bot API sendMessage call, for
+    TelegramNotifier(base_url=stand_in.base_url).
+
+    Every request is kept in .requests as (monotonic time, path, JSON body).
+    reject_next(n, retry_after) answers the next n requests with a 429 and
+    Telegram's retry_after; `delay` holds each response to model a slow API.
+
+        with TelegramStandIn() as tg:
+            n = TelegramNotifier("token", "chat", base_url=tg.base_url)
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay    = delay
+        self.requests: list[tuple[float, str, dict]] = []
+        self._reject  = 0
+        self._retry_after = 1
+        self._lock    = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                with stand_in._lock:
+                    stand_in.requests.append((time.monotonic(), self.path, body))
+                    rejected = stand_in._reject > 0
+                    if rejected:
+                        stand_in._reject -= 1
+                if stand_in.delay:
+                    time.sleep(stand_in.delay)
+                if not self.path.endswith("/sendMessage"):
+                    self._reply(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+                elif rejected:
+                    self._reply(429, {"ok": False, "error_code": 429,
+                                      "description": "Too Many Requests",
+                                      "parameters": {"retry_after": stand_in._retry_after}})
+                else:
+                    self._reply(200, {"ok": True, "result": {"message_id": len(stand_in.requests),
+                                                             "text": body.get("text")}})
+
+            def _reply(self, status: int, payload: dict):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="telegram-standin", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def texts(self) -> list[str]:
+        """Text of every sendMessage received, including rejected ones."""
+        with self._lock:
+            return [body.get("text", "") for _, _, body in self.requests]
+
+    def reject_next(self, n: int, retry_after: int = 1):
+        with self._lock:
+            self._reject, self._retry_after = n, retry_after
+
+    def start(self) -> "TelegramStandIn":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "TelegramStandIn":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,198 @@
+import json
+import time
+import asyncio
+import threading
+
+from aiohttp import web, WSMsgType
+
+PRIVATE_PATH = "/v2/ws/private"
+
+# Unified BTC/USDT:USDT swap market for a ccxt.pro bitget pointed at the stand-in
+# (set_markets), so no REST load_markets call is made.
+MARKET = {
+    "id": "BTCUSDT", "symbol": "BTC/USDT:USDT", "base": "BTC", "quote": "USDT", "settle": "USDT",
+    "baseId": "BTC", "quoteId": "USDT", "settleId": "USDT", "type": "swap", "spot": False,
+    "margin": False, "swap": True, "future": False, "option": False, "contract": True,
+    "linear": True, "inverse": False, "contractSize": 1.0, "active": True,
+    "precision": {"amount": 0.0001, "price": 0.1},
+    "limits": {"amount": {"min": 0.0001, "max": None}, "price": {"min": None, "max": None},
+               "cost": {"min": 5.0, "max": None}, "leverage": {"min": 1, "max": 125}},
+    "info": {"symbol": "BTCUSDT", "productType": "USDT-FUTURES"},
+}
+
+
+class BitgetWSStandIn:
+    """
+    Local stand-in for Bitget's v2 private WebSocket (orders and positions
+    channels) for OrderStream tests against a real ccxt.pro bitget:
+
+        with BitgetWSStandIn() as ws:
+            source = ws.client()          # ccxt.pro bitget aimed at ws.url
+            ...
+            ws.push_order(BitgetWSStandIn.order_fill("7", 65_000.0, 0.01))
+
+    It answers "ping", accepts any login and confirms subscriptions. On
+    subscribe it pushes the positions / open orders it was given (possibly
+    none) as a snapshot. push_order() / push_positions() send to every
+    subscribed connection. drop() closes all live sockets; with
+    refuse=True new connections are rejected until accept() is called,
+    which is how a lost private stream looks to the bot.
+    """
+
+    def __init__(self):
+        self.positions: list[dict] = []
+        self.open_orders: list[dict] = []
+        self.connections = 0                  # successful WebSocket handshakes
+        self.messages: list = []              # client -> server, parsed
+        self._subs: dict = {}                 # ws -> set of channels
+        self._refuse = False
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="ws-standin", daemon=True)
+        self._runner: web.AppRunner | None = None
+        self.port: int | None = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}{PRIVATE_PATH}"
+
+    def client(self, **config):
+        """A ccxt.pro bitget whose private stream is this stand-in."""
+        import ccxt.pro as ccxtpro
+        ex = ccxtpro.bitget({"apiKey": "key", "secret": "secret", "password": "pass",
+                             "options": {"defaultType": "swap"}, **config})
+        ex.urls["api"]["ws"]["private"] = self.url
+        ex.set_markets([dict(MARKET)])
+        return ex
+
+    # ── Bitget payloads ───────────────────────────────────────────────────────
+    @staticmethod
+    def order_fill(order_id: str, price: float, qty: float, ts_ms: int | None = None,
+                   status: str = "filled", side: str = "sell") -> dict:
+        """Orders-channel entry for a (fully) filled, live or cancelled limit order."""
+        ts_ms = int(time.time() * 1000) if ts_ms is None else int(ts_ms)
+        filled = qty if status == "filled" else 0.0
+        return {
+            "instId": "BTCUSDT", "orderId": str(order_id), "clientOid": f"c{order_id}",
+            "price": str(price), "size": str(qty), "orderType": "limit", "force": "gtc",
+            "side": side, "posSide": "net", "tradeSide": "close", "reduceOnly": "yes",
+            "marginMode": "crossed", "marginCoin": "USDT", "status": status,
+            "accBaseVolume": str(filled), "baseVolume": str(filled),
+            "priceAvg": str(price if filled else 0), "fillPrice": str(price if filled else 0),
+            "leverage": "10", "feeDetail": [{"feeCoin": "USDT", "fee": str(-filled * price * 0.0002)}],
+            "cTime": str(ts_ms - 60_000), "uTime": str(ts_ms),
+        }
+
+    @staticmethod
+    def position(qty: float, entry: float) -> dict:
+        """Positions-channel entry for a one-way long."""
+        now = str(int(time.time() * 1000))
+        return {
+            "posId": "1", "instId": "BTCUSDT", "marginCoin": "USDT", "marginMode": "crossed",
+            "holdSide": "long", "posMode": "one_way_mode", "total": str(qty), "available": str(qty),
+            "frozen": "0", "openPriceAvg": str(entry), "leverage": 10, "achievedProfits": "0",
+            "unrealizedPL": "0", "liquidationPrice": "0", "cTime": now, "uTime": now,
+        }
+
+    # ── Control (any thread) ──────────────────────────────────────────────────
+    def push_order(self, *orders: dict):
+        self._call(self._broadcast("orders", list(orders)))
+
+    def push_positions(self, positions: list[dict]):
+        self.positions = list(positions)
+        self._call(self._broadcast("positions", self.positions))
+
+    def drop(self, refuse: bool = False):
+        """Close every live socket; refuse=True also rejects reconnects."""
+        self._refuse = refuse
+        self._call(self._close_all())
+
+    def accept(self):
+        self._refuse = False
+
+    def subscribed(self, channel: str) -> int:
+        """Connections currently subscribed to channel."""
+        return sum(channel in chans for chans in list(self._subs.values()))
+
+    def start(self) -> "BitgetWSStandIn":
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def stop(self):
+        self._call(self._shutdown())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+    def __enter__(self) -> "BitgetWSStandIn":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ── Server (stand-in thread) ──────────────────────────────────────────────
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(5)
+
+    def _serve(self):
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        app.router.add_get(PRIVATE_PATH, self._handle)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _handle(self, request):
+        if self._refuse:
+            return web.Response(status=503, text="stand-in refusing connections")
+        ws = web.WebSocketResponse(autoping=True)
+        await ws.prepare(request)
+        self.connections += 1
+        self._subs[ws] = set()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                if msg.data == "ping":
+                    await ws.send_str("pong")
+                    continue
+                req = json.loads(msg.data)
+                self.messages.append(req)
+                if req.get("op") == "login":
+                    await ws.send_json({"event": "login", "code": 0})
+                elif req.get("op") == "subscribe":
+                    for arg in req.get("args", []):
+                        await ws.send_json({"event": "subscribe", "arg": arg})
+                        channel = arg.get("channel")
+                        self._subs[ws].add(channel)
+                        data = {"orders": self.open_orders, "positions": self.positions}.get(channel)
+                        if data:
+                            await ws.send_json(self._payload(channel, data))
+        finally:
+            self._subs.pop(ws, None)
+        return ws
+
+    @staticmethod
+    def _payload(channel: str, data: list) -> dict:
+        return {"action": "snapshot",
+                "arg": {"instType": "USDT-FUTURES", "channel": channel, "instId": "default"},
+                "data": data, "ts": int(time.time() * 1000)}
+
+    async def _broadcast(self, channel: str, data: list):
+        for ws, chans in list(self._subs.items()):
+            if channel in chans and not ws.closed:
+                await ws.send_json(self._payload(channel, data))
+
+    async def _close_all(self):
+        for ws in list(self._subs):
+            await ws.close()
+
+    async def _shutdown(self):
+        await self._close_all()
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -0,0 +1,119 @@
+import os
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("sfp_bot.candle_store")
+
+# ── Record layout: one fixed-width 48-byte record per closed candle ──────────
+CANDLE_DTYPE = np.dtype([
+    ("ts",     "<i8"),
+    ("open",   "<f8"),
+    ("high",   "<f8"),
+    ("low",    "<f8"),
+    ("close",  "<f8"),
+    ("volume", "<f8"),
+])
+BACKFILL_PAGE = 200      # candles per fetch_ohlcv page during backfill
+
+
+class CandleStore:
+    """
+    Append-only on-disk store of closed OHLCV candles for one symbol/timeframe.
+
+    Records are sorted by ts and never rewritten; appends with a ts at or
+    below the last stored one are dropped, so the file stays deduplicated.
+    Reads are np.memmap views over the file — no parsing, no copy.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not os.path.exists(path):
+            open(path, "wb").close()
+        # A crash mid-append can leave a partial record — drop it
+        size = os.path.getsize(path)
+        extra = size % CANDLE_DTYPE.itemsize
+        if extra:
+            logger.warning("Truncating %d trailing bytes in %s", extra, path)
+            with open(path, "r+b") as f:
+                f.truncate(size - extra)
+        self._mm: np.memmap | None = None
+        self._mm_len = -1
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.path) // CANDLE_DTYPE.itemsize
+
+    def records(self) -> np.ndarray:
+        """All stored candles as a read-only memmap (structured CANDLE_DTYPE)."""
+        n = len(self)
+        if n == 0:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        if self._mm is None or self._mm_len != n:
+            self._mm     = np.memmap(self.path, dtype=CANDLE_DTYPE, mode="r", shape=(n,))
+            self._mm_len = n
+        return self._mm
+
+    def window(self, n: int) -> np.ndarray:
+        """The most recent n candles (view, no copy)."""
+        return self.records()[-n:]
+
+    @property
+    def last_ts(self) -> int | None:
+        recs = self.records()
+        return int(recs["ts"][-1]) if len(recs) else None
+
+    def index_of(self, ts: int) -> int | None:
+        """Position of the candle opening at ts, or None if not stored."""
+        tss = self.records()["ts"]
+        i   = int(np.searchsorted(tss, ts))
+        return i if i < len(tss) and int(tss[i]) == ts else None
+
+    def append(self, rows) -> int:
+        """
+        Append closed candles ([ts, o, h, l, c, v] rows, ascending ts).
+        Rows not newer than the last stored ts are skipped. Returns rows written.
+        """
+        last = self.last_ts
+        keep = []
+        for r in rows:
+            ts = int(r[0])
+            if last is not None and ts <= last:
+                continue
+            keep.append((ts, *(float(x or 0) for x in r[1:6])))
+            last = ts
+        if not keep:
+            return 0
+        with open(self.path, "ab") as f:
+            f.write(np.array(keep, dtype=CANDLE_DTYPE).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        return len(keep)
+
+    def backfill(self, exchange, symbol: str, timeframe: str,
+                 since: int, until: int, count=None) -> int:
+        """
+        Page through fetch_ohlcv from max(since, last_ts + 1) and store every
+        candle that closed at or before `until` (ms). Returns rows written.
+        `count` (e.g. ExchangeSnapshot.count) is called with "fetch_ohlcv"
+        before every page request.
+        """
+        tf_ms  = exchange.parse_timeframe(timeframe) * 1000
+        cursor = since if self.last_ts is None else max(since, self.last_ts + tf_ms)
+        total  = 0
+        while cursor + tf_ms <= until:
+            if count is not None:
+                count("fetch_ohlcv")
+            page = exchange.fetch_ohlcv(symbol, timeframe, since=cursor, limit=BACKFILL_PAGE)
+            closed = [r for r in page if int(r[0]) + tf_ms <= until]
+            if not closed:
+                break
+            total += self.append(closed)
+            nxt = int(closed[-1][0]) + tf_ms
+            if nxt <= cursor:
+                break
+            cursor = nxt
+        if total:
+            logger.info("Backfilled %d %s %s candles into %s",
+                        total, symbol, timeframe, os.path.basename(self.path))
+        return total
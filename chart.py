@@ -0,0 +1,285 @@
+"""
+Level-of-detail charts for long backtest histories.
+
+A plotly figure holding every 30m candle of several years is tens of MB of
+HTML and stalls the browser. Here only the requested time range is rendered,
+at no more than `max_bars` points: candles are merged per bucket into one
+OHLC bar (first open, highest high, lowest low, last close) and line series
+keep each bucket's min and max, so wicks, sweeps and drawdowns stay visible
+at any zoom level.
+
+* figure()            — one static figure for a time range
+* widget()            — notebook FigureWidget that re-renders on zoom / pan
+* write_trade_pages() — index.html (downsampled overview + trade table) and
+                        one full-detail page per trade, sharing one plotly.js
+"""
+import os
+import html
+import math
+
+import numpy as np
+import pandas as pd
+
+from backtest import normalize_trades
+
+try:
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from plotly.offline import get_plotlyjs
+except ImportError:          # optional dependency: bucketing works without it
+    go = None
+
+MAX_BARS      = 2_000        # points per rendered range, about one per pixel column
+TRADE_CONTEXT = 300          # bars shown before the entry / after the exit on trade pages
+UP, DOWN      = "#26a69a", "#ef5350"
+
+
+# ── Bucketing ─────────────────────────────────────────────────────────────────
+def _times(index) -> np.ndarray:
+    """DatetimeIndex → int64 ns, comparable with _bound()."""
+    return pd.DatetimeIndex(index).as_unit("ns").asi8
+
+
+def _bound(t, tz) -> int:
+    t = pd.Timestamp(t)
+    if tz is not None and t.tzinfo is None:
+        t = t.tz_localize(tz)
+    elif tz is None and t.tzinfo is not None:
+        t = t.tz_convert(None)
+    return t.as_unit("ns").value
+
+
+def visible(index, start=None, end=None) -> tuple[int, int]:
+    """Positions [lo, hi) of the index entries with start <= t <= end."""
+    tz = pd.DatetimeIndex(index).tz
+    t  = _times(index)
+    lo = 0 if start is None else int(np.searchsorted(t, _bound(start, tz), side="left"))
+    hi = len(t) if end is None else int(np.searchsorted(t, _bound(end, tz), side="right"))
+    return lo, max(lo, hi)
+
+
+def _buckets(lo: int, hi: int, max_points: int) -> tuple[np.ndarray, int]:
+    """
+    Start positions of the buckets covering [lo, hi), and the bucket size.
+    Buckets are aligned to multiples of the size, so panning at a fixed zoom
+    keeps every bucket's contents stable.
+    """
+    # One bucket of headroom for the partial first bucket
+    k = max(1, math.ceil((hi - lo) / max(1, max_points - 1))) if hi - lo > max_points else 1
+    starts = np.arange(lo - lo % k, hi, k)
+    starts[0] = lo
+    return starts, k
+
+
+def bucket_ohlc(index, open_, high, low, close, lo: int = 0, hi: int | None = None,
+                max_bars: int = MAX_BARS) -> dict:
+    """
+    Bars lo..hi merged into at most max_bars OHLC bars: {x, open, high, low,
+    close}. x is the first merged bar's time; high / low are the bucket's
+    extremes, so no wick is lost.
+    """
+    hi = len(close) if hi is None else hi
+    if hi <= lo:
+        return {"x": index[:0], "open": [], "high": [], "low": [], "close": []}
+    starts, _ = _buckets(lo, hi, max_bars)
+    ends = np.r_[starts[1:], hi] - 1
+    rel  = starts - lo
+    high, low = np.asarray(high, dtype=float)[lo:hi], np.asarray(low, dtype=float)[lo:hi]
+    return {
+        "x":     index[starts],
+        "open":  np.asarray(open_, dtype=float)[starts],
+        "high":  np.fmax.reduceat(high, rel),
+        "low":   np.fmin.reduceat(low, rel),
+        "close": np.asarray(close, dtype=float)[ends],
+    }
+
+
+def bucket_line(series: pd.Series, start=None, end=None,
+                max_points: int = MAX_BARS) -> tuple[pd.Index, np.ndarray]:
+    """
+    (x, y) of `series` within [start, end], keeping each bucket's min and max
+    at their own timestamps (two points per bucket, in time order). Buckets
+    with no value become NaN gaps. The points just outside the range are
+    included, so sparse series (per-trade equity) still reach the edges.
+    """
+    lo, hi = visible(series.index, start, end)
+    lo, hi = max(0, lo - 1), min(len(series), hi + 1)
+    v = series.to_numpy(dtype=float)
+    if hi - lo <= max_points:
+        return series.index[lo:hi], v[lo:hi]
+    starts, _ = _buckets(lo, hi, max_points // 2)
+    rel   = starts - lo
+    seg   = v[lo:hi]
+    sizes = np.diff(np.r_[rel, hi - lo])
+    bmin  = np.fmin.reduceat(seg, rel)
+    bmax  = np.fmax.reduceat(seg, rel)
+    pos   = np.arange(lo, hi)
+    last  = np.iinfo(np.int64).max
+    # First position in each bucket holding its min / max (all-NaN bucket → its start)
+    at_min = np.minimum.reduceat(np.where(seg == np.repeat(bmin, sizes), pos, last), rel)
+    at_max = np.minimum.reduceat(np.where(seg == np.repeat(bmax, sizes), pos, last), rel)
+    at_min = np.where(at_min == last, starts, at_min)
+    at_max = np.where(at_max == last, starts, at_max)
+    first  = at_min <= at_max
+    p = np.column_stack([np.where(first, at_min, at_max), np.where(first, at_max, at_min)])
+    y = np.column_stack([np.where(first, bmin, bmax), np.where(first, bmax, bmin)])
+    return series.index[p.ravel()], y.ravel()
+
+
+# ── Figures ───────────────────────────────────────────────────────────────────
+def _require_plotly():
+    if go is None:
+        raise ImportError("chart rendering needs plotly: pip install plotly")
+
+
+def _traces(df: pd.DataFrame, trades: pd.DataFrame | None, lines: dict | None,
+            equity: pd.Series | None, start, end, max_bars: int) -> list[tuple]:
+    """(trace, secondary_y) pairs for the visible range."""
+    lo, hi = visible(df.index, start, end)
+    bars = bucket_ohlc(df.index, df["open"], df["high"], df["low"], df["close"],
+                       lo, hi, max_bars)
+    out = [(go.Candlestick(
+        x=bars["x"], open=bars["open"], high=bars["high"], low=bars["low"], close=bars["close"],
+        name="Price",
+        increasing_line_color=UP, decreasing_line_color=DOWN,
+        increasing_fillcolor=UP, decreasing_fillcolor=DOWN,
+    ), False)]
+
+    t0, t1 = (df.index[lo], df.index[hi - 1]) if hi > lo else (start, end)
+    for name, s in (lines or {}).items():
+        x, y = bucket_line(s, t0, t1, max_bars)
+        out.append((go.Scatter(x=x, y=y, name=name, mode="lines",
+                               line=dict(color="orange", width=1, dash="dash")), False))
+
+    if trades is not None:
+        t = trades
+        if hi > lo:
+            t = t[(t["exit_time"] >= t0) & (t["entry_time"] <= t1)]
+        colors = ["lime" if p >= 0 else "salmon" for p in t["pnl"]]
+        text   = [f"#{i}  pnl {p:+.2f}" for i, p in zip(t.index, t["pnl"])]
+        out.append((go.Scatter(x=t["entry_time"], y=t["entry_price"], mode="markers",
+                               name="Entry", text=text,
+                               marker=dict(symbol="triangle-up", size=13, color=colors)), False))
+        out.append((go.Scatter(x=t["exit_time"], y=t["exit_price"], mode="markers",
+                               name="Exit", text=text,
+                               marker=dict(symbol="triangle-down", size=13, color=colors)), False))
+
+    if equity is not None:
+        x, y = bucket_line(equity, t0, t1, max_bars)
+        out.append((go.Scatter(x=x, y=y, name="Equity",
+                               line=dict(color="gold", width=2)), True))
+    return out
+
+
+def figure(df: pd.DataFrame, trades: pd.DataFrame | None = None,
+           lines: dict | None = None, equity: pd.Series | None = None,
+           start=None, end=None, max_bars: int = MAX_BARS,
+           title: str = "Bullish SFP") -> "go.Figure":
+    """
+    Candles, overlay lines (e.g. {"Pivot Low": frame["pivot_low"]}), trade
+    markers and equity for [start, end], at most max_bars points per series.
+    trades may be simulate() output or vectorbt records_readable.
+    """
+    _require_plotly()
+    trades = normalize_trades(trades) if trades is not None else None
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    for trace, secondary in _traces(df, trades, lines, equity, start, end, max_bars):
+        fig.add_trace(trace, secondary_y=secondary)
+    fig.update_layout(
+        template="plotly_dark", height=700, title=title,
+        xaxis_rangeslider_visible=False, hovermode="x unified",
+    )
+    fig.update_yaxes(title_text="Price (USDT)", secondary_y=False)
+    fig.update_yaxes(title_text="Equity ($)",   secondary_y=True)
+    return fig
+
+
+def widget(df: pd.DataFrame, trades: pd.DataFrame | None = None,
+           lines: dict | None = None, equity: pd.Series | None = None,
+           max_bars: int = MAX_BARS, title: str = "Bullish SFP") -> "go.FigureWidget":
+    """
+    Notebook figure that re-buckets on every zoom / pan: the visible range
+    plus half a screen either side is re-rendered at full detail once it
+    holds fewer than max_bars candles.
+    """
+    _require_plotly()
+    trades = normalize_trades(trades) if trades is not None else None
+    fw = go.FigureWidget(figure(df, trades, lines, equity, max_bars=max_bars, title=title))
+
+    def on_zoom(layout, xrange):
+        if xrange is None:
+            start = end = None
+        else:
+            a, b  = pd.Timestamp(xrange[0]), pd.Timestamp(xrange[1])
+            start, end = a - (b - a) / 2, b + (b - a) / 2
+        new = [t for t, _ in _traces(df, trades, lines, equity, start, end, 2 * max_bars)]
+        with fw.batch_update():
+            for old, t in zip(fw.data, new):
+                old.update({k: v for k, v in t.to_plotly_json().items()
+                            if k in ("x", "y", "open", "high", "low", "close", "text")})
+
+    fw.layout.on_change(on_zoom, "xaxis.range")
+    return fw
+
+
+# ── Paged HTML ────────────────────────────────────────────────────────────────
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>body{{background:#111;color:#ddd;font-family:sans-serif;margin:1em}}
+a{{color:#8cf}} td,th{{padding:2px 10px;text-align:right}}</style></head>
+<body><p>{nav}</p>{body}</body></html>
+"""
+
+
+def _write(path: str, title: str, nav: str, body: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(_PAGE.format(title=html.escape(title), nav=nav, body=body))
+
+
+def write_trade_pages(df: pd.DataFrame, trades: pd.DataFrame, out_dir: str,
+                      lines: dict | None = None, equity: pd.Series | None = None,
+                      context: int = TRADE_CONTEXT, max_bars: int = MAX_BARS,
+                      title: str = "Bullish SFP") -> str:
+    """
+    Write out_dir/index.html (downsampled full-history chart and a table of
+    trades) and out_dir/trade_NNNN.html per trade: `context` bars either side
+    of the trade, at full detail unless that span exceeds max_bars. All pages
+    load one plotly.min.js from out_dir. Returns the index path.
+    """
+    _require_plotly()
+    trades = normalize_trades(trades).reset_index(drop=True)
+    os.makedirs(out_dir, exist_ok=True)
+    js = os.path.join(out_dir, "plotly.min.js")
+    if not os.path.exists(js):
+        with open(js, "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+
+    def embed(fig) -> str:
+        return fig.to_html(full_html=False, include_plotlyjs="directory")
+
+    pages, n = [], len(df)
+    for i, t in trades.iterrows():
+        lo, _ = visible(df.index, t["entry_time"], None)
+        _, hi = visible(df.index, None, t["exit_time"])
+        start = df.index[max(0, lo - context)]
+        end   = df.index[min(n, hi + context) - 1]
+        fig = figure(df, trades, lines, equity, start, end, max_bars,
+                     title=f"{title} — trade {i}: {t['entry_time']} → {t['exit_time']}, "
+                           f"pnl {t['pnl']:+.2f}")
+        name = f"trade_{i:04d}.html"
+        prev = f'<a href="trade_{i - 1:04d}.html">← prev</a>' if i > 0 else "← prev"
+        nxt  = f'<a href="trade_{i + 1:04d}.html">next →</a>' if i + 1 < len(trades) else "next →"
+        _write(os.path.join(out_dir, name), f"trade {i}",
+               f'{prev} | <a href="index.html">index</a> | {nxt}', embed(fig))
+        pages.append(name)
+
+    rows = "".join(
+        f'<tr><td><a href="{p}">{i}</a></td><td>{t["entry_time"]}</td><td>{t["exit_time"]}</td>'
+        f'<td>{t["entry_price"]:.2f}</td><td>{t["exit_price"]:.2f}</td><td>{t["pnl"]:+.2f}</td></tr>'
+        for (i, t), p in zip(trades.iterrows(), pages))
+    table = ("<table><tr><th>#</th><th>entry</th><th>exit</th><th>entry px</th>"
+             f"<th>exit px</th><th>pnl</th></tr>{rows}</table>")
+    index = os.path.join(out_dir, "index.html")
+    _write(index, title, f"{len(trades)} trades, {n:,} candles",
+           embed(figure(df, trades, lines, equity, max_bars=max_bars, title=title)) + table)
+    return index
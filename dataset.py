@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import shutil
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("sfp_bot.dataset")
+
+# ── Layout: <dir>/meta.json + one .npy per column ────────────────────────────
+FORMAT  = "sfp-ohlcv"
+VERSION = 1
+COLUMNS = {
+    "ts":     np.dtype("<i8"),       # candle open time, ms since epoch (UTC)
+    "open":   np.dtype("<f8"),
+    "high":   np.dtype("<f8"),
+    "low":    np.dtype("<f8"),
+    "close":  np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+META_FILE = "meta.json"
+
+
+def is_dataset(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+def _to_ms(values) -> np.ndarray:
+    """Timestamps (ISO strings, datetimes, epoch s or ms) → int64 ms, UTC."""
+    s = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(s):
+        ms = s.to_numpy(dtype=np.float64)
+        if np.isnan(ms).any():
+            raise ValueError("missing timestamps")
+        if np.abs(ms).max(initial=0) < 1e11:                    # epoch seconds
+            ms = ms * 1000
+        return ms.astype(np.int64)
+    t = pd.to_datetime(s, utc=True)
+    if t.isna().any():
+        raise ValueError("missing timestamps")
+    return t.dt.tz_localize(None).to_numpy().astype("datetime64[ms]").astype(np.int64)
+
+
+# ── Ingest ────────────────────────────────────────────────────────────────────
+def ingest(csv_path: str, out_dir: str, time_col: str = "timestamp") -> dict:
+    """
+    Convert an OHLCV CSV export into a dataset directory and return its metadata.
+
+    Rows are cleaned the way the research scripts always did (sorted by
+    time, first of each duplicate timestamp kept, rows missing a price
+    dropped); what was removed is recorded in the metadata. The directory is
+    written next to out_dir and renamed into place, so readers never see a
+    half-written dataset.
+    """
+    raw = pd.read_csv(csv_path)
+    raw.columns = [str(c).strip().lower() for c in raw.columns]
+    time_col = time_col.lower()
+    missing = [c for c in [time_col, *list(COLUMNS)[1:]] if c not in raw.columns]
+    if missing:
+        raise ValueError(f"{csv_path}: missing columns {missing}")
+    if raw.empty:
+        raise ValueError(f"{csv_path}: no rows")
+
+    try:
+        ts = _to_ms(raw[time_col])
+    except ValueError as e:
+        raise ValueError(f"{csv_path}: bad {time_col!r} column: {e}") from e
+    unsorted = int(np.count_nonzero(np.diff(ts) < 0))           # rows older than the one before
+    order    = np.argsort(ts, kind="stable")
+    ts       = ts[order]
+    cols     = {c: raw[c].to_numpy(dtype=np.float64)[order] for c in list(COLUMNS)[1:]}
+    keep     = np.r_[True, ts[1:] != ts[:-1]]                   # first of each duplicate
+    dups     = int(len(ts) - np.count_nonzero(keep))
+    prices   = np.column_stack([cols[c] for c in ("open", "high", "low", "close")])
+    complete = ~np.isnan(prices).any(axis=1)
+    nan_rows = int(np.count_nonzero(keep & ~complete))
+    keep    &= complete
+
+    ts   = ts[keep]
+    cols = {c: v[keep] for c, v in cols.items()}
+    if not len(ts):
+        raise ValueError(f"{csv_path}: no complete rows")
+
+    # Bars whose high / low do not bracket open and close are kept (the
+    # exchange printed them) but counted, so a bad export is visible
+    bad = int(np.count_nonzero(
+        (cols["high"] < np.maximum(cols["open"], cols["close"])) |
+        (cols["low"]  > np.minimum(cols["open"], cols["close"])) |
+        (cols["low"] <= 0)))
+    if bad:
+        logger.warning("%s: %d bars with inconsistent OHLC", csv_path, bad)
+
+    steps = np.diff(ts)
+    tf_ms = int(np.median(steps)) if len(steps) else 0
+    meta = {
+        "format":       FORMAT,
+        "version":      VERSION,
+        "rows":         int(len(ts)),
+        "start_ts":     int(ts[0]),
+        "end_ts":       int(ts[-1]),
+        "timeframe_ms": tf_ms,
+        "gaps":         int(np.count_nonzero(steps > tf_ms)) if tf_ms else 0,
+        "columns":      {c: d.str for c, d in COLUMNS.items()},
+        "source":       os.path.basename(csv_path),
+        "ingested":     time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "cleaning":     {"unsorted": unsorted, "duplicates": dups,
+                         "missing_price": nan_rows, "inconsistent_ohlc": bad},
+    }
+
+    out_dir = os.path.normpath(out_dir)
+    tmp_dir = f"{out_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        for c, dtype in COLUMNS.items():
+            np.save(os.path.join(tmp_dir, f"{c}.npy"),
+                    np.ascontiguousarray(ts if c == "ts" else cols[c], dtype=dtype))
+        with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+        if os.path.isdir(out_dir):
+            if not is_dataset(out_dir):
+                raise FileExistsError(f"{out_dir} exists and is not a dataset")
+            shutil.rmtree(out_dir)
+        os.replace(tmp_dir, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    logger.info("Ingested %d rows from %s into %s", meta["rows"], csv_path, out_dir)
+    return meta
+
+
+# ── Loader ────────────────────────────────────────────────────────────────────
+class Dataset:
+    """
+    Read-only view of an ingested dataset.
+
+    Columns are np.load(mmap_mode="r") memmaps: opening costs a few file
+    reads regardless of size, nothing is parsed or copied, and every process
+    opening the same dataset shares one copy of its pages in the OS cache.
+    between() narrows the view by time without copying.
+    """
+
+    def __init__(self, path: str, _columns: dict | None = None, _meta: dict | None = None):
+        self.path = path
+        if _columns is not None:
+            self.meta, self._cols = _meta, _columns
+            return
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT or self.meta.get("version") != VERSION:
+            raise ValueError(f"{path}: unsupported dataset format "
+                             f"{self.meta.get('format')} v{self.meta.get('version')}")
+        self._cols = {c: np.load(os.path.join(path, f"{c}.npy"), mmap_mode="r")
+                      for c in COLUMNS}
+        bad = {c: len(v) for c, v in self._cols.items() if len(v) != self.meta["rows"]}
+        if bad:
+            raise ValueError(f"{path}: column lengths {bad} != rows {self.meta['rows']}")
+
+    def __len__(self) -> int:
+        return len(self._cols["ts"])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self._cols[column]
+
+    def columns(self) -> dict:
+        return dict(self._cols)
+
+    def between(self, start=None, end=None) -> "Dataset":
+        """
+        Rows with start <= ts < end. Bounds are epoch ms, datetimes or date
+        strings (UTC); None leaves that side open.
+        """
+        ts = self._cols["ts"]
+        lo = 0 if start is None else int(np.searchsorted(ts, _bound_ms(start), side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, _bound_ms(end), side="left"))
+        hi = max(lo, hi)
+        return Dataset(self.path, {c: v[lo:hi] for c, v in self._cols.items()}, self.meta)
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame in the fetch_df layout (ts column + UTC DatetimeIndex) over the memmaps."""
+        # One Series per column keeps pandas from consolidating (= copying) them
+        df = pd.DataFrame({c: pd.Series(v, copy=False) for c, v in self._cols.items()},
+                          copy=False)
+        df.index = pd.DatetimeIndex(self._cols["ts"].astype("datetime64[ms]"),
+                                    name="time").tz_localize("UTC")
+        return df
+
+
+def _bound_ms(t) -> int:
+    if isinstance(t, (int, np.integer)):
+        return int(t)
+    t = pd.Timestamp(t)
+    t = t.tz_localize("UTC") if t.tzinfo is None else t.tz_convert("UTC")
+    return int(t.value // 1_000_000)
+
+
+def open_dataset(path: str) -> Dataset:
+    return Dataset(path)
+
+
+def load(path: str, start=None, end=None) -> pd.DataFrame:
+    """OHLCV frame from a dataset directory, optionally limited to [start, end)."""
+    return open_dataset(path).between(start, end).to_frame()
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    ap  = argparse.ArgumentParser(description="Columnar OHLCV datasets for backtests")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p   = sub.add_parser("ingest", help="convert a CSV export into a dataset directory")
+    p.add_argument("csv")
+    p.add_argument("out", help="dataset directory to create (replaced if it exists)")
+    p.add_argument("--time-col", default="timestamp")
+    p   = sub.add_parser("info", help="print a dataset's metadata")
+    p.add_argument("path")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if args.cmd == "ingest":
+        meta = ingest(args.csv, args.out, args.time_col)
+    else:
+        meta = open_dataset(args.path).meta
+    print(json.dumps(meta, indent=2))
@@ -0,0 +1,60 @@
+import threading
+from collections import Counter
+
+
+class ExchangeSnapshot:
+    """
+    Per-tick cache of account state for one symbol.
+
+    Positions, balance and open orders are fetched at most once between
+    new_tick() calls and served to every helper from memory. Anything that
+    changes account state (orders, cancels) must call invalidate(). Every
+    REST call made through the snapshot is counted in `calls`. Other threads
+    (metrics export) read the counts through call_counts(), a copy taken
+    under the same lock as the increments.
+    """
+
+    def __init__(self, exchange, symbol: str):
+        self.exchange = exchange
+        self.symbol   = symbol
+        self.calls: Counter = Counter()
+        self._calls_lock = threading.Lock()
+        self._cache: dict = {}
+
+    def new_tick(self):
+        self._cache.clear()
+
+    def invalidate(self, *keys: str):
+        """Drop cached entries (all of them if no keys are given)."""
+        if not keys:
+            self._cache.clear()
+        for k in keys:
+            self._cache.pop(k, None)
+
+    def _get(self, key: str, method: str, *args, **kwargs):
+        if key not in self._cache:
+            self.count(method)
+            self._cache[key] = getattr(self.exchange, method)(*args, **kwargs)
+        return self._cache[key]
+
+    def positions(self) -> list:
+        return self._get("positions", "fetch_positions")
+
+    def balance(self) -> dict:
+        return self._get("balance", "fetch_balance")
+
+    def open_orders(self) -> list:
+        return self._get("open_orders", "fetch_open_orders", self.symbol)
+
+    def open_order_ids(self) -> set[str]:
+        return {str(o.get("id") or o.get("info", {}).get("orderId", "")) for o in self.open_orders()}
+
+    def count(self, method: str):
+        """Record a REST call made directly on the exchange (orders, cancels)."""
+        with self._calls_lock:
+            self.calls[method] += 1
+
+    def call_counts(self) -> dict:
+        """Copy of `calls`, safe to take from any thread."""
+        with self._calls_lock:
+            return dict(self.calls)
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_FLOOR, ROUND_CEILING, ROUND_HALF_EVEN
+
+import numpy as np
+
+TICK_SIZE_MODE = 4      # ccxt.TICK_SIZE: precision values are step sizes, not decimals
+_EPS      = Decimal("1e-9")   # in units of one step
+_ROUNDING = {"down": ROUND_FLOOR, "up": ROUND_CEILING, "nearest": ROUND_HALF_EVEN}
+
+
+@dataclass(frozen=True)
+class InstrumentSpec:
+    """
+    Immutable sizing / price grid for one symbol.
+
+    Steps are Decimals, so scalar rounding is exact in decimal terms (no
+    10 ** -prec float ticks); array inputs are snapped on a scaled-integer
+    grid. Quantities are in ccxt amount units (contracts).
+    """
+    symbol:        str
+    tick_size:     Decimal
+    amount_step:   Decimal
+    min_amount:    Decimal
+    contract_size: Decimal = Decimal(1)
+
+    @classmethod
+    def from_market(cls, market: dict, precision_mode: int = TICK_SIZE_MODE) -> "InstrumentSpec":
+        """Build from a ccxt market dict (handles tick-size and decimal-places precision)."""
+        prec = market.get("precision") or {}
+
+        def step(v) -> Decimal:
+            if v is None:
+                return Decimal(1)
+            if precision_mode == TICK_SIZE_MODE:
+                return Decimal(str(v))
+            return Decimal(1).scaleb(-int(v))
+
+        amount_step = step(prec.get("amount"))
+        min_amount  = ((market.get("limits") or {}).get("amount") or {}).get("min")
+        return cls(
+            symbol=market.get("id") or market.get("symbol"),
+            tick_size=step(prec.get("price")),
+            amount_step=amount_step,
+            min_amount=Decimal(str(min_amount)) if min_amount else amount_step,
+            contract_size=Decimal(str(market.get("contractSize") or 1)),
+        )
+
+    # ── Rounding ──────────────────────────────────────────────────────────────
+    @staticmethod
+    def _snap(x, step: Decimal, mode: str):
+        if np.ndim(x) == 0:
+            units   = Decimal(repr(float(x))) / step
+            nearest = units.to_integral_value(ROUND_HALF_EVEN)
+            if abs(units - nearest) < _EPS:            # float noise, e.g. 2.9999999999
+                units = nearest
+            return float(units.to_integral_value(_ROUNDING[mode]) * step)
+        s     = float(step)
+        units = np.asarray(x, dtype=float) / s
+        if mode == "down":
+            n = np.floor(units + float(_EPS))
+        elif mode == "up":
+            n = np.ceil(units - float(_EPS))
+        else:
+            n = np.rint(units)
+        return np.round(n.astype(np.int64) * s, max(0, -step.as_tuple().exponent))
+
+    def round_price(self, price, mode: str = "down"):
+        """Snap price(s) to the tick grid; "down" (default), "up" or "nearest"."""
+        return self._snap(price, self.tick_size, mode)
+
+    def round_qty(self, qty, mode: str = "down"):
+        """Snap amount(s) to the lot step (floored by default)."""
+        return self._snap(qty, self.amount_step, mode)
+
+    def qty_for_notional(self, usdt, price):
+        """
+        Largest lot-aligned amount whose notional fits in `usdt`; 0 where it
+        falls below the minimum order size. Scalar or array inputs.
+        """
+        raw = np.asarray(usdt, dtype=float) / (np.asarray(price, dtype=float) * float(self.contract_size))
+        if raw.ndim == 0:
+            qty = self.round_qty(float(raw))
+            return qty if qty >= float(self.min_amount) else 0.0
+        qty = self.round_qty(raw)
+        return np.where(qty < float(self.min_amount), 0.0, qty)
+
+    def notional(self, qty, price):
+        return np.asarray(qty, dtype=float) * float(self.contract_size) * price
+
+
+# BTCUSDT perpetual on Bitget (used by research code when no market dict is at hand)
+BTCUSDT = InstrumentSpec("BTCUSDT", Decimal("0.1"), Decimal("0.0001"), Decimal("0.0001"))
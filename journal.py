@@ -0,0 +1,179 @@
+import os
+import csv
+import sqlite3
+import logging
+import argparse
+
+logger = logging.getLogger("sfp_bot.journal")
+
+LOG_COLS = [
+    "timestamp", "symbol", "side",
+    "price", "qty", "usdt_value", "account_balance", "pnl_usdt", "reason",
+    "entry_price", "entry_candle_ts", "invalidation", "tp",
+    "last_entry_candle_ts", "last_daily_date", "tp_order_id",
+]
+STATE_FIELDS = [
+    "entry_price", "invalidation", "tp", "entry_candle_ts",
+    "last_entry_candle_ts", "last_daily_date", "tp_order_id",
+]
+POSITION_FIELDS = ["entry_price", "invalidation", "tp", "entry_candle_ts", "tp_order_id"]
+COMPACT_EVERY   = 500      # writes between compactions
+KEEP_STATE_ROWS = 100      # BOT_STATE history rows kept per symbol on compaction
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    {", ".join(f'"{c}" TEXT' for c in LOG_COLS)}
+);
+CREATE INDEX IF NOT EXISTS events_symbol_side ON events(symbol, side);
+CREATE TABLE IF NOT EXISTS snapshot (
+    symbol TEXT PRIMARY KEY,
+    {", ".join(f'"{c}" TEXT' for c in STATE_FIELDS)}
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+_EVENT_COLS      = ", ".join(f'"{c}"' for c in LOG_COLS)
+_INSERT_EVENT    = f"INSERT INTO events ({_EVENT_COLS}) VALUES ({', '.join('?' * len(LOG_COLS))})"
+_UPSERT_SNAPSHOT = (f"INSERT OR REPLACE INTO snapshot (symbol, {', '.join(STATE_FIELDS)}) "
+                    f"VALUES (?, {', '.join('?' * len(STATE_FIELDS))})")
+
+
+class Journal:
+    """
+    SQLite (WAL) trade journal with a one-row-per-symbol state snapshot.
+
+    Every event row and the snapshot it implies are written in a single
+    fsync'd transaction, so restore is one primary-key lookup regardless of
+    how long the history is. BOT_STATE history is compacted periodically;
+    trade rows are never deleted.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.executescript(_SCHEMA)
+        self._writes = 0
+
+    def close(self):
+        self.conn.close()
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+    def record(self, row: list, snapshot: dict):
+        """Append one LOG_COLS row and replace its symbol's snapshot atomically."""
+        symbol, side = row[1], row[2]
+        snap = dict(snapshot)
+        if side == "LONG_CLOSE":
+            snap.update({k: None for k in POSITION_FIELDS})
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute(_INSERT_EVENT, [None if v == "" else str(v) for v in row])
+            self.conn.execute(_UPSERT_SNAPSHOT, [
+                symbol, *[None if snap.get(k) in (None, "") else str(snap[k]) for k in STATE_FIELDS]
+            ])
+        self._writes += 1
+        if self._writes % COMPACT_EVERY == 0:
+            self.compact()
+
+    def compact(self):
+        """Drop old BOT_STATE history and checkpoint the WAL."""
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            cur = self.conn.execute("""
+                DELETE FROM events WHERE side = 'BOT_STATE' AND id NOT IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY id DESC) AS rn
+                        FROM events WHERE side = 'BOT_STATE'
+                    ) WHERE rn <= ?
+                )""", (KEEP_STATE_ROWS,))
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if cur.rowcount:
+            logger.info("Journal compacted — %d BOT_STATE rows removed", cur.rowcount)
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+    def snapshot(self, symbol: str) -> dict | None:
+        cur = self.conn.execute(
+            f"SELECT {', '.join(STATE_FIELDS)} FROM snapshot WHERE symbol = ?", (symbol,))
+        r = cur.fetchone()
+        return dict(zip(STATE_FIELDS, r)) if r else None
+
+    def export_csv(self, path: str, symbol: str | None = None):
+        """Write the event history in the LOG_COLS trade_log.csv layout."""
+        q = f"SELECT {_EVENT_COLS} FROM events"
+        args = ()
+        if symbol:
+            q, args = q + " WHERE symbol = ?", (symbol,)
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(LOG_COLS)
+            for r in self.conn.execute(q + " ORDER BY id", args):
+                w.writerow(["" if v is None else v for v in r])
+
+    # ── Migration from trade_log.csv ──────────────────────────────────────────
+    def migrate_csv(self, csv_path: str) -> bool:
+        """
+        One-time import of a legacy trade_log.csv: copy every row and rebuild
+        each symbol's snapshot with the old State.load rules.
+        """
+        if not os.path.exists(csv_path):
+            return False
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_csv'").fetchone():
+            return False
+        with open(csv_path, newline="") as f:
+            rows = [r for r in csv.DictReader(f)]
+
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                _INSERT_EVENT, [[(r.get(c) or None) for c in LOG_COLS] for r in rows])
+            for symbol in {r.get("symbol") for r in rows if r.get("symbol")}:
+                snap = _legacy_snapshot([r for r in rows if r.get("symbol") == symbol])
+                self.conn.execute(_UPSERT_SNAPSHOT, [symbol, *[snap.get(k) for k in STATE_FIELDS]])
+            self.conn.execute("INSERT INTO meta VALUES ('migrated_csv', ?)", (csv_path,))
+        logger.info("Migrated %d rows from %s into journal", len(rows), csv_path)
+        return True
+
+
+def _legacy_snapshot(rows: list[dict]) -> dict:
+    """The state the old CSV-scanning State.load would have restored."""
+    snap: dict = {}
+    state_rows = [r for r in rows if r["side"] == "BOT_STATE"]
+    trade_rows = [r for r in rows if r["side"] in ("LONG_OPEN", "LONG_CLOSE", "TP_ORDER")]
+    source = state_rows[-1] if state_rows else trade_rows[-1] if trade_rows else None
+    if source:
+        snap["last_entry_candle_ts"] = source.get("last_entry_candle_ts") or None
+        snap["last_daily_date"]      = source.get("last_daily_date") or None
+
+    opens  = [r for r in rows if r["side"] == "LONG_OPEN"]
+    closes = [r for r in rows if r["side"] == "LONG_CLOSE"]
+    if opens and opens[-1]["timestamp"] > (closes[-1]["timestamp"] if closes else ""):
+        last = opens[-1]
+        for k in ("entry_price", "invalidation", "tp", "entry_candle_ts"):
+            snap[k] = last.get(k) or None
+        tps = [r for r in rows if r["side"] == "TP_ORDER" and r["timestamp"] > last["timestamp"]]
+        if tps:
+            snap["tp_order_id"] = (tps[-1].get("tp_order_id") or "").strip() or None
+    return snap
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Trade journal maintenance")
+    ap.add_argument("db")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="export events as trade_log.csv layout")
+    ex.add_argument("csv")
+    ex.add_argument("--symbol")
+    mg = sub.add_parser("migrate", help="import a legacy trade_log.csv")
+    mg.add_argument("csv")
+    sub.add_parser("compact", help="drop old BOT_STATE rows and checkpoint")
+    args = ap.parse_args()
+
+    j = Journal(args.db)
+    if args.cmd == "export":
+        j.export_csv(args.csv, args.symbol)
+    elif args.cmd == "migrate":
+        print("migrated" if j.migrate_csv(args.csv) else "nothing to migrate")
+    else:
+        j.compact()
+    j.close()
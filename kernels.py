@@ -0,0 +1,510 @@
+"""
+Array kernels behind compute_signals and the sweep primitives.
+
+Every kernel takes plain NumPy arrays and reproduces the pandas expression it
+replaces bit for bit (NaN handling and min_periods included); that is
+checked against the original pandas pipeline by benchmarks/parity.py. Two
+backends:
+
+* numba (if importable): single loops over preallocated outputs — van Herk /
+  Gil-Werman block scans for rolling min / max, an early-exit scan for swing
+  lows, a monotonic deque for the sparse pivot lows and a port of pandas'
+  compensated rolling sum for every mean, with sfp_entries() running the
+  ATR / MA / volume filters and the final AND in one pass;
+* NumPy fallback: the same block scans as a few vectorised passes (O(n) for
+  any window) and pandas' own Cython rolling mean.
+
+Set SFP_NUMBA=0 (or kernels.USE_NUMBA = False) to force the NumPy path.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:          # optional dependency
+    numba = None
+
+USE_NUMBA = numba is not None and os.getenv("SFP_NUMBA", "1") != "0"
+
+_jit = numba.njit(cache=True, nogil=True) if numba is not None else (lambda fn: fn)
+
+
+def backend() -> str:
+    return "numba" if USE_NUMBA else "numpy"
+
+
+# ── numba loops ───────────────────────────────────────────────────────────────
+def _make_extreme_loop(is_max: bool):
+    # van Herk / Gil-Werman: with blocks of `window` bars, every window is one
+    # block suffix plus the next block's prefix. A backward pass stores the
+    # suffixes, a forward pass combines them with the running prefix. NaNs
+    # fall out of the comparisons (NaN > acc is False), so both passes are
+    # branch-free whatever the window size; min_periods is applied after,
+    # with a non-NaN count only if x has NaNs. One loop per direction.
+    fill = -np.inf if is_max else np.inf
+
+    @_jit
+    def loop(x, window, min_periods, lag):
+        m      = len(x)
+        out    = np.full(m, np.nan)
+        suffix = np.empty(m)
+        for lo in range(0, m, window):
+            acc = fill
+            for j in range(min(lo + window, m) - 1, lo - 1, -1):
+                v = x[j]
+                acc = (v if v > acc else acc) if is_max else (v if v < acc else acc)
+                suffix[j] = acc
+        for lo in range(0, m, window):
+            acc = fill
+            for j in range(lo, min(lo + window, m)):
+                v = x[j]
+                acc = (v if v > acc else acc) if is_max else (v if v < acc else acc)
+                r = acc
+                if j >= window:
+                    b = suffix[j - window + 1]
+                    r = (b if b > r else r) if is_max else (b if b < r else r)
+                if j + lag < m:
+                    out[j + lag] = r
+        # min_periods: without NaNs only the first min_periods - 1 bars fall short
+        has_nan = False
+        for j in range(m):
+            if x[j] != x[j]:
+                has_nan = True
+                break
+        if not has_nan:
+            for j in range(min(min_periods - 1, m - lag)):
+                out[j + lag] = np.nan
+            return out
+        nobs = 0
+        for j in range(m):
+            nobs += x[j] == x[j]
+            if j >= window:
+                nobs -= x[j - window] == x[j - window]
+            if (nobs < min_periods or nobs == 0) and j + lag < m:
+                out[j + lag] = np.nan
+        return out
+    return loop
+
+
+_rolling_min_loop = _make_extreme_loop(False)
+_rolling_max_loop = _make_extreme_loop(True)
+
+
+@_jit
+def _swing_lows_loop(low, swing_n):
+    # low[i-N] is a swing low iff no bar in low[i-2N .. i] is below it (or NaN);
+    # nearest neighbours first, so most bars are rejected after one comparison
+    m    = len(low)
+    span = 2 * swing_n + 1
+    out  = np.full(m, np.nan)
+    for i in range(span - 1, m):
+        p  = i - swing_n
+        c  = low[p]
+        ok = c == c
+        d  = 1
+        while ok and d <= swing_n:
+            ok = low[p - d] >= c and low[p + d] >= c
+            d += 1
+        if ok:
+            out[i] = c
+    return out
+
+
+@_jit
+def _bars_since_loop(x):
+    m    = len(x)
+    out  = np.empty(m, np.int64)
+    last = -1
+    for i in range(m):
+        if x[i] == x[i]:
+            last = i
+        out[i] = i - last if last >= 0 else -1
+    return out
+
+
+@_jit
+def _mean_add(v, sum_x, comp, nobs, neg_ct, same, prev):
+    y = v - comp
+    t = sum_x + y
+    comp = t - sum_x - y
+    if np.signbit(v):
+        neg_ct += 1
+    same = same + 1 if v == prev else 1
+    return t, comp, nobs + 1, neg_ct, same, v
+
+
+@_jit
+def _mean_remove(v, sum_x, comp, nobs, neg_ct):
+    y = -v - comp
+    t = sum_x + y
+    comp = t - sum_x - y
+    if np.signbit(v):
+        neg_ct -= 1
+    return t, comp, nobs - 1, neg_ct
+
+
+@_jit
+def _mean_value(sum_x, nobs, neg_ct, same, prev, min_periods):
+    if nobs < min_periods or nobs == 0:
+        return np.nan
+    if same >= nobs:
+        return prev
+    r = sum_x / nobs
+    if neg_ct == 0 and r < 0:
+        return 0.0
+    if neg_ct == nobs and r > 0:
+        return 0.0
+    return r
+
+
+@_jit
+def _rolling_mean_loop(x, window, min_periods):
+    # Same arithmetic as pandas' roll_mean: Kahan-compensated add / remove
+    # with separate compensation terms and the same-value / sign fix-ups.
+    m   = len(x)
+    out = np.empty(m)
+    sum_x = comp_add = comp_rem = 0.0
+    nobs = neg_ct = same = 0
+    prev = x[0] if m else np.nan
+    for i in range(m):
+        if i >= window:
+            v = x[i - window]
+            if v == v:
+                sum_x, comp_rem, nobs, neg_ct = _mean_remove(v, sum_x, comp_rem, nobs, neg_ct)
+        v = x[i]
+        if v == v:
+            sum_x, comp_add, nobs, neg_ct, same, prev = _mean_add(
+                v, sum_x, comp_add, nobs, neg_ct, same, prev)
+        out[i] = _mean_value(sum_x, nobs, neg_ct, same, prev, min_periods)
+    return out
+
+
+@_jit
+def _above_mean_loop(x, window):
+    # x[i] > mean(x[i-window .. i-1]) with a full window, else False
+    m   = len(x)
+    out = np.zeros(m, np.bool_)
+    sum_x = comp_add = comp_rem = 0.0
+    nobs = neg_ct = same = 0
+    prev = x[0] if m else np.nan
+    for i in range(m):
+        v = x[i]
+        if i:
+            out[i] = v > _mean_value(sum_x, nobs, neg_ct, same, prev, window)
+        if i >= window:
+            r = x[i - window]
+            if r == r:
+                sum_x, comp_rem, nobs, neg_ct = _mean_remove(r, sum_x, comp_rem, nobs, neg_ct)
+        if v == v:
+            sum_x, comp_add, nobs, neg_ct, same, prev = _mean_add(
+                v, sum_x, comp_add, nobs, neg_ct, same, prev)
+    return out
+
+
+@_jit
+def _ma_rising_loop(x, period):
+    # mean(x, period, min_periods=1)[i] > same at i - 1
+    m   = len(x)
+    out = np.zeros(m, np.bool_)
+    sum_x = comp_add = comp_rem = 0.0
+    nobs = neg_ct = same = 0
+    prev = x[0] if m else np.nan
+    last = np.nan
+    for i in range(m):
+        if i >= period:
+            v = x[i - period]
+            if v == v:
+                sum_x, comp_rem, nobs, neg_ct = _mean_remove(v, sum_x, comp_rem, nobs, neg_ct)
+        v = x[i]
+        if v == v:
+            sum_x, comp_add, nobs, neg_ct, same, prev = _mean_add(
+                v, sum_x, comp_add, nobs, neg_ct, same, prev)
+        ma = _mean_value(sum_x, nobs, neg_ct, same, prev, 1)
+        out[i] = ma > last
+        last = ma
+    return out
+
+
+@_jit
+def _pivot_low_loop(confirmed, pivot_window):
+    # min of the non-NaN confirmed[i-w .. i-1]; confirmed lows are sparse, so a
+    # monotonic deque is pushed to only a few times per window
+    m    = len(confirmed)
+    out  = np.full(m, np.nan)
+    mask = 1
+    while mask <= pivot_window:
+        mask <<= 1
+    q    = np.empty(mask, np.int64)
+    mask -= 1
+    head = tail = 0
+    for i in range(m):
+        if tail > head and q[head & mask] < i - pivot_window:
+            head += 1
+        if tail > head:
+            out[i] = confirmed[q[head & mask]]
+        c = confirmed[i]
+        if c == c:
+            while tail > head and confirmed[q[(tail - 1) & mask]] >= c:
+                tail -= 1
+            q[tail & mask] = i
+            tail += 1
+    return out
+
+
+@_jit
+def _true_range_loop(high, low, close):
+    # NaN-skipping max of the three legs, as DataFrame.max(axis=1)
+    m  = len(high)
+    tr = np.empty(m)
+    for i in range(m):
+        r = high[i] - low[i]
+        if i:
+            pc = close[i - 1]
+            a = abs(high[i] - pc)
+            b = abs(low[i] - pc)
+            if a > r or r != r:
+                r = a
+            if b > r or r != r:
+                r = b
+        tr[i] = r
+    return tr
+
+
+@_jit
+def _sfp_filters_loop(open_, high, low, close, volume, tr, plow, since, ma_period,
+                      min_distance, volume_lookback, atr_period, atr_multiplier):
+    # The three means (ATR, MA slope, volume baseline) side by side in one pass,
+    # combined straight into the entry mask with the pivot-low conditions.
+    m     = len(close)
+    entry = np.zeros(m, np.bool_)
+    a_sum = a_ca = a_cr = 0.0
+    a_n = a_neg = a_same = 0
+    a_prev = tr[0] if m else np.nan
+    c_sum = c_ca = c_cr = 0.0
+    c_n = c_neg = c_same = 0
+    c_prev = close[0] if m else np.nan
+    ma_last = np.nan
+    v_sum = v_ca = v_cr = 0.0
+    v_n = v_neg = v_same = 0
+    v_prev = volume[0] if m else np.nan
+    for i in range(m):
+        if i >= atr_period:
+            r = tr[i - atr_period]
+            if r == r:
+                a_sum, a_cr, a_n, a_neg = _mean_remove(r, a_sum, a_cr, a_n, a_neg)
+        r = tr[i]
+        if r == r:
+            a_sum, a_ca, a_n, a_neg, a_same, a_prev = _mean_add(
+                r, a_sum, a_ca, a_n, a_neg, a_same, a_prev)
+        atr = _mean_value(a_sum, a_n, a_neg, a_same, a_prev, 1)
+
+        c = close[i]
+        if i >= ma_period:
+            r = close[i - ma_period]
+            if r == r:
+                c_sum, c_cr, c_n, c_neg = _mean_remove(r, c_sum, c_cr, c_n, c_neg)
+        if c == c:
+            c_sum, c_ca, c_n, c_neg, c_same, c_prev = _mean_add(
+                c, c_sum, c_ca, c_n, c_neg, c_same, c_prev)
+        ma = _mean_value(c_sum, c_n, c_neg, c_same, c_prev, 1)
+        ma_up = ma > ma_last
+        ma_last = ma
+
+        v = volume[i]
+        vol_ok = i > 0 and v > _mean_value(v_sum, v_n, v_neg, v_same, v_prev, volume_lookback)
+        if i >= volume_lookback:
+            r = volume[i - volume_lookback]
+            if r == r:
+                v_sum, v_cr, v_n, v_neg = _mean_remove(r, v_sum, v_cr, v_n, v_neg)
+        if v == v:
+            v_sum, v_ca, v_n, v_neg, v_same, v_prev = _mean_add(
+                v, v_sum, v_ca, v_n, v_neg, v_same, v_prev)
+
+        pl = plow[i]
+        lo = low[i]
+        entry[i] = ((lo < pl) & (c > pl) & (c > open_[i]) & ma_up & (since[i] >= min_distance) &
+                    vol_ok & ((high[i] - lo) < atr_multiplier * atr))
+    return entry
+
+
+# ── NumPy fallbacks ───────────────────────────────────────────────────────────
+def _window_reduce(x: np.ndarray, window: int, ufunc, fill: float) -> np.ndarray:
+    """ufunc-reduce of every trailing window (partial at the start, padded with `fill`)."""
+    m   = len(x)
+    pad = (-(m + window - 1)) % window
+    xp  = np.concatenate([np.full(window - 1, fill), x, np.full(pad, fill)]).reshape(-1, window)
+    prefix = ufunc.accumulate(xp, axis=1).ravel()
+    suffix = ufunc.accumulate(xp[:, ::-1], axis=1)[:, ::-1].ravel()
+    return ufunc(suffix[:m], prefix[window - 1:window - 1 + m])
+
+
+def _rolling_extreme_np(x, window, min_periods, lag, is_max):
+    valid = ~np.isnan(x)
+    ext   = _window_reduce(np.where(valid, x, -np.inf if is_max else np.inf), window,
+                           np.maximum if is_max else np.minimum, -np.inf if is_max else np.inf)
+    cs    = np.cumsum(valid)
+    nobs  = cs - np.r_[np.zeros(window, cs.dtype), cs[:-window]][:len(cs)]
+    ext[(nobs < min_periods) | (nobs == 0)] = np.nan
+    return _lag(ext, lag)
+
+
+def _lag(x: np.ndarray, lag: int) -> np.ndarray:
+    if not lag:
+        return x
+    out = np.full(len(x), np.nan)
+    out[lag:] = x[:-lag]
+    return out
+
+
+def _rolling_mean_np(x, window, min_periods):
+    return pd.Series(x).rolling(window, min_periods=min_periods).mean().to_numpy()
+
+
+def _true_range(high, low, close) -> np.ndarray:
+    pc = np.r_[np.nan, close[:-1]]
+    return np.fmax(np.fmax(high - low, np.abs(high - pc)), np.abs(low - pc))
+
+
+# ── Public kernels ────────────────────────────────────────────────────────────
+def rolling_min(x: np.ndarray, window: int, min_periods: int | None = None,
+                lag: int = 0) -> np.ndarray:
+    """Series(x).rolling(window, min_periods).min().shift(lag)."""
+    x  = np.ascontiguousarray(x, dtype=np.float64)
+    mp = window if min_periods is None else min_periods
+    if USE_NUMBA:
+        return _rolling_min_loop(x, window, mp, lag)
+    return _rolling_extreme_np(x, window, mp, lag, False)
+
+
+def rolling_max(x: np.ndarray, window: int, min_periods: int | None = None,
+                lag: int = 0) -> np.ndarray:
+    """Series(x).rolling(window, min_periods).max().shift(lag)."""
+    x  = np.ascontiguousarray(x, dtype=np.float64)
+    mp = window if min_periods is None else min_periods
+    if USE_NUMBA:
+        return _rolling_max_loop(x, window, mp, lag)
+    return _rolling_extreme_np(x, window, mp, lag, True)
+
+
+def rolling_mean(x: np.ndarray, window: int, min_periods: int | None = None) -> np.ndarray:
+    """Series(x).rolling(window, min_periods).mean()."""
+    x  = np.ascontiguousarray(x, dtype=np.float64)
+    mp = window if min_periods is None else min_periods
+    if USE_NUMBA:
+        return _rolling_mean_loop(x, window, mp)
+    return _rolling_mean_np(x, window, mp)
+
+
+def swing_lows(low: np.ndarray, swing_n: int) -> np.ndarray:
+    """
+    Confirmed swing lows: low[i - swing_n] at bar i if it is the minimum of
+    low[i - 2N .. i], else NaN. Equals
+    low.where(low == low.rolling(2N + 1, center=True).min()).shift(N).
+    """
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    if USE_NUMBA:
+        return _swing_lows_loop(low, swing_n)
+    span = 2 * swing_n + 1
+    out  = np.full(len(low), np.nan)
+    if len(low) < span:
+        return out
+    c  = low[swing_n:len(low) - swing_n]
+    ok = c == c
+    for k in range(span):                       # short window: one pass per offset
+        ok &= low[k:len(low) - span + 1 + k] >= c
+    out[span - 1:] = np.where(ok, c, np.nan)
+    return out
+
+
+def pivot_low(confirmed: np.ndarray, pivot_window: int) -> np.ndarray:
+    """Lowest confirmed swing low over the previous pivot_window bars (NaN if none)."""
+    if USE_NUMBA:
+        return _pivot_low_loop(np.ascontiguousarray(confirmed, dtype=np.float64), pivot_window)
+    return rolling_min(confirmed, pivot_window, min_periods=1, lag=1)
+
+
+def pivot_high(high: np.ndarray, pivot_window: int) -> np.ndarray:
+    """Highest high over the previous pivot_window bars (NaN until the window is full)."""
+    return rolling_max(high, pivot_window, lag=1)
+
+
+def bars_since(confirmed: np.ndarray) -> np.ndarray:
+    """Bars since the last non-NaN value (int64, -1 before the first one)."""
+    if USE_NUMBA:
+        return _bars_since_loop(np.ascontiguousarray(confirmed, dtype=np.float64))
+    idx  = np.arange(len(confirmed))
+    last = np.maximum.accumulate(np.where(np.isnan(confirmed), -1, idx))
+    return np.where(last >= 0, idx - last, -1)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """Simple-mean ATR, min_periods=1 (same as sfp_signals' original _atr)."""
+    high, low, close = (np.ascontiguousarray(a, dtype=np.float64) for a in (high, low, close))
+    if USE_NUMBA:
+        return _rolling_mean_loop(_true_range_loop(high, low, close), period, 1)
+    return _rolling_mean_np(_true_range(high, low, close), period, 1)
+
+
+def ma_rising(close: np.ndarray, period: int) -> np.ndarray:
+    """ma > ma.shift(1) for ma = close.rolling(period, min_periods=1).mean()."""
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    if USE_NUMBA:
+        return _ma_rising_loop(close, period)
+    ma = _rolling_mean_np(close, period, 1)
+    with np.errstate(invalid="ignore"):
+        return np.r_[False, ma[1:] > ma[:-1]]
+
+
+def above_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """x > x.rolling(window).mean().shift(1).fillna(inf)."""
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    if USE_NUMBA:
+        return _above_mean_loop(x, window)
+    avg = _lag(_rolling_mean_np(x, window, window), 1)
+    with np.errstate(invalid="ignore"):
+        return x > np.nan_to_num(avg, nan=np.inf)
+
+
+def sfp_entries(open_, high, low, close, volume, swing_n: int, pivot_window: int,
+                ma_period: int, min_distance: int, volume_lookback: int,
+                atr_period: int, atr_multiplier: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (entry mask, pivot low) for the bullish SFP, HTF filter excluded. On the
+    numba backend the ATR / MA / volume filters and the final AND run as one
+    pass; on NumPy the kernels above are combined with array ops.
+    """
+    open_, high, low, close, volume = (np.ascontiguousarray(a, dtype=np.float64)
+                                       for a in (open_, high, low, close, volume))
+    confirmed = swing_lows(low, swing_n)
+    plow      = pivot_low(confirmed, pivot_window)
+    since     = bars_since(confirmed)
+    if USE_NUMBA:
+        tr = _true_range_loop(high, low, close)
+        return _sfp_filters_loop(open_, high, low, close, volume, tr, plow, since, ma_period,
+                                 min_distance, volume_lookback, atr_period,
+                                 float(atr_multiplier)), plow
+    with np.errstate(invalid="ignore"):
+        entry = (low < plow) & (close > plow) & (close > open_)
+        entry &= ma_rising(close, ma_period)
+        entry &= since >= min_distance
+        entry &= above_mean(volume, volume_lookback)
+        entry &= (high - low) < atr_multiplier * atr(high, low, close, atr_period)
+    return entry, plow
+
+
+def warmup():
+    """Compile (or load cached) numba kernels so the first live call is not slow."""
+    if not USE_NUMBA:
+        return
+    x = np.linspace(1.0, 2.0, 16)
+    swing_lows(x, 2)
+    bars_since(x)
+    rolling_min(x, 3, 1, 1)
+    rolling_max(x, 3)
+    rolling_mean(x, 3, 1)
+    above_mean(x, 3)
+    ma_rising(x, 3)
+    atr(x + 1, x - 1, x, 3)
+    sfp_entries(x, x + 1, x - 1, x, x, 2, 3, 3, 1, 3, 3, 2.0)
@@ -0,0 +1,91 @@
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger("sfp_bot.market_cache")
+
+MARKETS_TTL = 24 * 3600     # seconds before cached market metadata is refreshed
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp, path)
+
+
+def _refresh(exchange, path: str, fresh_exchange):
+    try:
+        src = fresh_exchange() if fresh_exchange else exchange
+        src.load_markets(reload=True)
+        _write_json(path, {"saved_at": time.time(),
+                           "markets": src.markets, "currencies": src.currencies})
+        if src is not exchange:
+            exchange.set_markets(src.markets, src.currencies)
+        logger.info("Market metadata refreshed (%d markets)", len(src.markets))
+    except Exception:
+        logger.exception("Market metadata refresh failed")
+
+
+def load_markets_cached(exchange, path: str, ttl: float = MARKETS_TTL,
+                        fresh_exchange=None) -> str:
+    """
+    Populate exchange.markets from the on-disk cache when one exists.
+
+    A stale cache is still used immediately and refreshed on a background
+    thread (through `fresh_exchange()`, a separate instance, if given); with
+    no cache the markets are downloaded and saved synchronously.
+    Returns "cache", "stale" or "network".
+    """
+    cached = _read_json(path)
+    if cached and cached.get("markets"):
+        exchange.set_markets(cached["markets"], cached.get("currencies"))
+        if time.time() - cached.get("saved_at", 0) < ttl:
+            return "cache"
+        threading.Thread(target=_refresh, args=(exchange, path, fresh_exchange),
+                         name="markets-refresh", daemon=True).start()
+        return "stale"
+    _refresh(exchange, path, None)
+    return "network"
+
+
+def ensure_account_config(exchange, path: str, symbol: str,
+                          leverage: int, margin_mode: str) -> bool:
+    """
+    Set leverage and margin mode unless the cached account config already
+    matches. Returns True if exchange calls were made.
+    """
+    wanted = {"leverage": leverage, "margin_mode": margin_mode}
+    cache  = _read_json(path) or {}
+    if cache.get(symbol) == wanted:
+        logger.info("Account config for %s unchanged (%sx %s) — skipping", symbol,
+                    leverage, margin_mode)
+        return False
+
+    ok = True
+    try:
+        exchange.set_leverage(leverage, symbol, params={"marginCoin": "USDT"})
+        logger.info("Leverage set to %sx for %s", leverage, symbol)
+    except Exception as e:
+        ok = False
+        logger.warning("Could not set leverage: %s", e)
+    try:
+        exchange.set_margin_mode(margin_mode, symbol, params={"marginCoin": "USDT"})
+        logger.info("Margin mode set to %s for %s", margin_mode, symbol)
+    except Exception as e:
+        ok = False
+        logger.warning("Could not set margin mode: %s", e)
+    if ok:
+        cache[symbol] = wanted
+        _write_json(path, cache)
+    return True
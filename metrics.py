@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from collections import deque
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("sfp_bot.metrics")
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT  = 1024      # samples kept per histogram for p50 / p99 in the JSON snapshot
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (seconds) plus a window of recent samples."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts  = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self.sum     = 0.0
+        self.count   = 0
+        self.recent: deque = deque(maxlen=RECENT)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum   += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantile(self, q: float) -> float | None:
+        if not self.recent:
+            return None
+        s = sorted(self.recent)
+        return s[min(len(s) - 1, int(q * len(s)))]
+
+
+class Metrics:
+    """
+    In-process counters and phase histograms for the bot's hot path.
+
+    Phases are timed with the timed(phase) decorator or timer(phase) context
+    manager; counters are bumped with inc(name, **labels). Counters kept
+    elsewhere are exposed through add_collector(); its fn runs on the export
+    threads, so it should return a copy made safely (e.g.
+    ExchangeSnapshot.call_counts()). Everything renders as Prometheus text
+    (serve()) or a JSON dict (snapshot() / start_json_writer()).
+    """
+
+    def __init__(self, prefix: str = "sfp_bot"):
+        self.prefix   = prefix
+        self.started  = time.time()
+        self.counters: dict = {}          # (name, labels) -> value
+        self.histos:   dict = {}          # phase -> Histogram
+        self._collectors: list = []       # (name, label, help, fn -> {label_value: n})
+        self._lock    = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._writer_stop = threading.Event()
+
+    # ── Recording ─────────────────────────────────────────────────────────────
+    def inc(self, name: str, n: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, phase: str, seconds: float):
+        with self._lock:
+            h = self.histos.get(phase)
+            if h is None:
+                h = self.histos[phase] = Histogram()
+            h.observe(seconds)
+
+    def timer(self, phase: str):
+        return _Timer(self, phase)
+
+    def timed(self, phase: str):
+        """Decorator: record the wall time of every call under `phase`."""
+        def deco(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(phase, time.perf_counter() - t0)
+            return wrapper
+        return deco
+
+    def add_collector(self, name: str, label: str, fn, help: str = ""):
+        """Expose an external {label_value: count} mapping as a counter family."""
+        self._collectors.append((name, label, help, fn))
+
+    def _collected(self) -> dict:
+        out = {}
+        for name, label, _, fn in self._collectors:
+            try:
+                for value, n in dict(fn()).items():
+                    out[(name, ((label, str(value)),))] = n
+            except Exception:
+                logger.exception("Metrics collector %s failed", name)
+        return out
+
+    # ── Export ────────────────────────────────────────────────────────────────
+    def render_prometheus(self) -> str:
+        p = self.prefix
+        lines = [f"# TYPE {p}_uptime_seconds gauge",
+                 f"{p}_uptime_seconds {time.time() - self.started:.3f}"]
+        with self._lock:
+            counters = {**self.counters, **self._collected()}
+            histos   = {k: (h.buckets, list(h.counts), h.sum, h.count) for k, h in self.histos.items()}
+
+        helps = {name: h for name, _, h, _ in self._collectors if h}
+        seen  = set()
+        for (name, labels), v in sorted(counters.items()):
+            if name not in seen:
+                if name in helps:
+                    lines.append(f"# HELP {p}_{name} {helps[name]}")
+                lines.append(f"# TYPE {p}_{name} counter")
+                seen.add(name)
+            lines.append(f"{p}_{name}{_labels(labels)} {v:g}")
+
+        if histos:
+            lines.append(f"# TYPE {p}_phase_seconds histogram")
+        for phase, (buckets, counts, total, n) in sorted(histos.items()):
+            cum = 0
+            for le, c in zip((*buckets, "+Inf"), counts):
+                cum += c
+                lines.append(f'{p}_phase_seconds_bucket{{phase="{phase}",le="{le}"}} {cum}')
+            lines.append(f'{p}_phase_seconds_sum{{phase="{phase}"}} {total:.6f}')
+            lines.append(f'{p}_phase_seconds_count{{phase="{phase}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = {**self.counters, **self._collected()}
+            phases = {
+                phase: {
+                    "count":   h.count,
+                    "sum_s":   round(h.sum, 6),
+                    "mean_ms": round(h.sum / h.count * 1000, 3) if h.count else None,
+                    "p50_ms":  _ms(h.quantile(0.50)),
+                    "p99_ms":  _ms(h.quantile(0.99)),
+                    "max_ms":  _ms(max(h.recent) if h.recent else None),
+                }
+                for phase, h in self.histos.items()
+            }
+        return {
+            "time":     time.time(),
+            "uptime_s": round(time.time() - self.started, 3),
+            "counters": {name + _labels(labels): v for (name, labels), v in sorted(counters.items())},
+            "phases":   phases,
+        }
+
+    def write_json(self, path: str, previous: dict | None = None) -> dict:
+        """
+        Write snapshot() atomically. With the previous snapshot given, per-second
+        counter rates since then are included (REST call rate vs rate limits).
+        """
+        snap = self.snapshot()
+        if previous:
+            dt = snap["time"] - previous["time"]
+            if dt > 0:
+                snap["rates_per_s"] = {
+                    k: round((v - previous["counters"].get(k, 0)) / dt, 4)
+                    for k, v in snap["counters"].items()
+                }
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(snap, f, indent=2)
+        os.replace(tmp, path)
+        return snap
+
+    def start_json_writer(self, path: str, interval: float = 60.0):
+        def loop():
+            prev = None
+            while not self._writer_stop.wait(interval):
+                try:
+                    prev = self.write_json(path, prev)
+                except Exception:
+                    logger.exception("Metrics snapshot write failed")
+        threading.Thread(target=loop, name="metrics-json", daemon=True).start()
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> int:
+        """Serve /metrics (Prometheus text) and /metrics.json on a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, ctype = json.dumps(registry.snapshot()).encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, ctype = registry.render_prometheus().encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info("Metrics on http://%s:%d/metrics", host, self._server.server_port)
+        return self._server.server_port
+
+    def stop(self):
+        self._writer_stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class _Timer:
+    def __init__(self, registry: Metrics, phase: str):
+        self.registry, self.phase = registry, phase
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.phase, time.perf_counter() - self.t0)
+        return False
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 3)
@@ -0,0 +1,153 @@
+import time
+import queue
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("sfp_bot.notifier")
+
+TELEGRAM_API    = "https://api.telegram.org"
+MAX_QUEUE       = 200       # pending messages before new ones are dropped
+COALESCE_WINDOW = 0.3       # seconds to wait for a burst to finish
+MAX_MESSAGE_LEN = 4096      # Telegram sendMessage limit
+RETRIES         = 4
+TIMEOUT         = 10
+
+
+class TelegramNotifier:
+    """
+    Fire-and-forget Telegram sender.
+
+    send() only enqueues; a daemon thread drains the queue over one pooled
+    keep-alive session, merges messages that arrive within COALESCE_WINDOW
+    into a single sendMessage, and retries with exponential backoff (honouring
+    Telegram's retry_after on 429). `base_url` can point at a local HTTP
+    stand-in (benchmarks.telegram_standin, exercised by benchmarks.checks).
+    """
+
+    def __init__(self, token: str, chat_id: str, base_url: str = TELEGRAM_API,
+                 max_queue: int = MAX_QUEUE, coalesce_window: float = COALESCE_WINDOW):
+        self.url             = f"{base_url.rstrip('/')}/bot{token}/sendMessage"
+        self.chat_id         = chat_id
+        self.coalesce_window = coalesce_window
+        self.sent            = 0
+        self.dropped         = 0
+        self._q: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._session        = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._session.mount("http://",  HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._closed  = False
+        self._thread  = threading.Thread(target=self._run, name="telegram-sender", daemon=True)
+        self._thread.start()
+
+    def send(self, msg: str):
+        """Queue a message; never blocks the caller."""
+        if self._closed:
+            return
+        try:
+            self._q.put_nowait(msg)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Telegram queue full — message dropped")
+
+    def flush(self, timeout: float = 15.0) -> bool:
+        """Wait until everything queued so far has been sent (or given up on)."""
+        deadline = time.monotonic() + timeout
+        while self._q.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self, timeout: float = 15.0):
+        """Flush pending messages and stop the sender thread."""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._q.put(None)
+        self._thread.join(timeout)
+        self._session.close()
+
+    # ── Sender thread ─────────────────────────────────────────────────────────
+    def _run(self):
+        while True:
+            first = self._q.get()
+            if first is None:
+                self._q.task_done()
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.coalesce_window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._q.put(None)               # re-queue the stop marker after this batch
+                    self._q.task_done()
+                    break
+                batch.append(nxt)
+            try:
+                for text in _merge(batch):
+                    self._post(text)
+            finally:
+                for _ in batch:
+                    self._q.task_done()
+
+    def _post(self, text: str):
+        for attempt in range(RETRIES):
+            try:
+                r = self._session.post(self.url, json={
+                    "chat_id": self.chat_id, "text": text, "parse_mode": "HTML"
+                }, timeout=TIMEOUT)
+                if r.status_code == 429:
+                    try:
+                        wait = float(r.json().get("parameters", {}).get("retry_after", 1))
+                    except ValueError:
+                        wait = 1.0
+                    time.sleep(wait)
+                    continue
+                if r.status_code < 500:
+                    if r.status_code >= 400:
+                        logger.error("Telegram rejected message (%s): %s", r.status_code, r.text[:200])
+                    else:
+                        self.sent += 1
+                    return
+            except requests.RequestException as e:
+                logger.warning("Telegram send attempt %d failed: %s", attempt + 1, e)
+            time.sleep(2 ** attempt)
+        logger.error("Telegram send failed after %d attempts", RETRIES)
+
+
+def _split(msg: str) -> list[str]:
+    """Cut one over-long message into pieces under MAX_MESSAGE_LEN, at line breaks where possible."""
+    parts = []
+    while len(msg) > MAX_MESSAGE_LEN:
+        cut = msg.rfind("\n", 0, MAX_MESSAGE_LEN + 1)
+        if cut <= 0:
+            cut = MAX_MESSAGE_LEN
+        parts.append(msg[:cut])
+        msg = msg[cut:].lstrip("\n")
+    if msg:
+        parts.append(msg)
+    return parts
+
+
+def _merge(batch: list[str]) -> list[str]:
+    """Join a burst into as few messages as fit under MAX_MESSAGE_LEN."""
+    out, cur = [], ""
+    for msg in (part for m in batch for part in _split(m)):
+        if cur and len(cur) + 2 + len(msg) > MAX_MESSAGE_LEN:
+            out.append(cur)
+            cur = msg
+        else:
+            cur = f"{cur}\n\n{msg}" if cur else msg
+    if cur:
+        out.append(cur)
+    return out
@@ -0,0 +1,96 @@
+import numpy as np
+
+FIELDS = ("ts", "open", "high", "low", "close", "volume")
+
+
+class OHLCVBuffer:
+    """
+    Fixed-capacity OHLCV ring buffer for one symbol.
+
+    Storage is a single structured NumPy allocation holding one 2 * capacity
+    column per field (ts int64, prices / volume in `price_dtype`). Every row
+    is written twice, at i and i + capacity, so the last `len` rows of any
+    column are always one contiguous slice: view() and columns() return
+    views, never copies, and appending is O(1) with no reallocation.
+    """
+
+    def __init__(self, capacity: int, price_dtype=np.float64):
+        self.capacity    = capacity
+        self.price_dtype = np.dtype(price_dtype)
+        self._data = np.zeros((), dtype=np.dtype(
+            [("ts", np.int64, (2 * capacity,))] +
+            [(f, self.price_dtype, (2 * capacity,)) for f in FIELDS[1:]]
+        ))
+        self._cols = [self._data[f] for f in FIELDS]
+        self._head = 0          # slot of the next write
+        self._len  = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    @property
+    def last_ts(self) -> int | None:
+        return int(self._cols[0][self._head - 1 + self.capacity]) if self._len else None
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+    def append(self, ts: int, open_: float, high: float, low: float,
+               close: float, volume: float) -> bool:
+        """
+        Add one candle. A candle with the last ts replaces it (the forming
+        candle being updated); older ones are ignored. Returns True if stored.
+        """
+        last = self.last_ts
+        if last is not None and ts < last:
+            return False
+        if last is not None and ts == last:
+            i = (self._head - 1) % self.capacity
+        else:
+            i = self._head
+            self._head = (self._head + 1) % self.capacity
+            self._len  = min(self._len + 1, self.capacity)
+        for col, v in zip(self._cols, (ts, open_, high, low, close, volume)):
+            col[i] = v
+            col[i + self.capacity] = v
+        return True
+
+    def extend(self, rows) -> int:
+        """Append [ts, o, h, l, c, v] rows or CANDLE_DTYPE records; returns the count stored."""
+        if isinstance(rows, np.ndarray) and rows.dtype.names:
+            rows = zip(*(rows[f] for f in FIELDS))
+        return sum(self.append(int(r[0]), *r[1:6]) for r in rows)
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+    def _slice(self, n: int | None, end: int = 0) -> slice:
+        """Contiguous slots holding the last n rows, excluding the final `end` rows."""
+        avail = self._len - end
+        n     = avail if n is None else max(0, min(n, avail))
+        stop  = self._head + self.capacity - end
+        return slice(stop - n, stop)
+
+    def view(self, field: str, n: int | None = None, end: int = 0) -> np.ndarray:
+        """Contiguous read-only view of the last n values of `field` (all if n is None)."""
+        v = self._data[field][self._slice(n, end)]
+        v.flags.writeable = False
+        return v
+
+    def columns(self, n: int | None = None, end: int = 0) -> dict:
+        return {f: self.view(f, n, end) for f in FIELDS}
+
+    def row(self, i: int = -1) -> tuple:
+        """One candle as (ts, open, high, low, close, volume); i counts from the end if < 0."""
+        if not -self._len <= i < self._len:
+            raise IndexError(i)
+        slot = (self._head + i if i < 0 else self._head - self._len + i) + self.capacity
+        return (int(self._cols[0][slot]), *(float(c[slot]) for c in self._cols[1:]))
+
+    def to_frame(self, n: int | None = None, end: int = 0) -> "pd.DataFrame":
+        """Copy into the fetch_df layout (ts column + UTC DatetimeIndex) for tooling."""
+        import pandas as pd
+        df = pd.DataFrame({f: np.array(v, dtype=np.int64 if f == "ts" else np.float64)
+                           for f, v in self.columns(n, end).items()})
+        df["time"] = pd.to_datetime(df["ts"], unit="ms", utc=True)
+        return df.set_index("time")
@@ -0,0 +1,106 @@
+import time
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger("sfp_bot.order_stream")
+
+MAX_BACKOFF = 60      # seconds between reconnect attempts
+
+
+class OrderStream:
+    """
+    Private order / position stream running on its own thread.
+
+    `source` is any object exposing ccxt.pro-style coroutines
+    watch_orders(symbol) and watch_positions([symbol]) (plus an optional
+    close()) — a ccxt.pro exchange in production, or one pointed at a local
+    WebSocket stand-in via its `urls` (benchmarks.ws_standin). Every update is passed to
+    on_order(order) / on_position(position) on the stream thread; callers
+    hand them to their own thread. healthy() is False until every watcher
+    has received its first update and while any of them is reconnecting,
+    which is the signal to fall back to REST polling.
+    """
+
+    def __init__(self, source, symbol: str, on_order=None, on_position=None):
+        self.source       = source
+        self.symbol       = symbol
+        self.on_order     = on_order
+        self.on_position  = on_position
+        self.last_message = 0.0
+        self._up: dict    = {"orders": False, "positions": False}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="order-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping = True
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(lambda: [t.cancel() for t in asyncio.all_tasks()])
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def healthy(self) -> bool:
+        return (self._thread is not None and self._thread.is_alive()
+                and not self._stopping and all(self._up.values()))
+
+    # ── Stream thread ─────────────────────────────────────────────────────────
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._main())
+        except Exception:
+            logger.exception("Order stream stopped")
+        finally:
+            self._up = {k: False for k in self._up}
+            self._loop.close()
+
+    async def _main(self):
+        watchers = []
+        if self.on_order is not None:
+            watchers.append(self._watch("orders", lambda: self.source.watch_orders(self.symbol),
+                                        self.on_order))
+        else:
+            self._up.pop("orders")
+        if self.on_position is not None:
+            watchers.append(self._watch("positions",
+                                        lambda: self.source.watch_positions([self.symbol]),
+                                        self.on_position))
+        else:
+            self._up.pop("positions")
+        try:
+            await asyncio.gather(*watchers)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            close = getattr(self.source, "close", None)
+            if close is not None:
+                try:
+                    await close()
+                except Exception:
+                    pass
+
+    async def _watch(self, name: str, subscribe, callback):
+        backoff = 1
+        while not self._stopping:
+            try:
+                updates = await subscribe()
+                self._up[name] = True           # only once a watch_* call has succeeded
+                self.last_message = time.time()
+                backoff = 1
+                for u in updates or []:
+                    try:
+                        callback(u)
+                    except Exception:
+                        logger.exception("%s callback failed", name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._up[name] = False
+                logger.warning("%s stream error: %s — reconnecting in %ss", name, e, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
@@ -0,0 +1,127 @@
+import os
+import time
+import argparse
+import tempfile
+
+import pandas as pd
+
+import sfp_bot
+from sweep import load_csv
+from journal import Journal
+from candle_store import CandleStore
+from exchange_cache import ExchangeSnapshot
+from instrument import InstrumentSpec
+from sim_exchange import SimClock, SimExchange, ReplayFinished, MARKET
+
+
+def install(clock: SimClock, sim: SimExchange, workdir: str, exchange_stop: bool = False):
+    """
+    Point sfp_bot's runtime objects at the simulation: virtual time, date and
+    stream wake-up, the simulated exchange, and a fresh journal / candle store
+    in workdir. The bot's own code is not modified.
+    """
+    bot = sfp_bot
+    bot.time          = clock
+    bot.datetime      = clock.datetime_cls()
+    bot.date          = clock.date_cls()
+    bot.stream_wake   = clock.event()
+    bot.exchange      = sim
+    bot.snapshot      = ExchangeSnapshot(sim, bot.SYMBOL)
+    bot.spec          = InstrumentSpec.from_market(MARKET, sim.precisionMode)
+    bot.journal       = Journal(os.path.join(workdir, "replay.db"))
+    bot.store         = CandleStore(os.path.join(workdir, f"{bot.SYMBOL}_{bot.TIMEFRAME}.bin"))
+    bot.notifier      = None
+    bot.order_stream  = None
+    bot.state         = bot.State()
+    bot.candles       = None
+    bot.engine        = None
+    bot.armed         = None
+    bot.LOG_FILE      = os.path.join(workdir, "no_legacy_trade_log.csv")
+    bot.EXCHANGE_STOP = exchange_stop
+    bot._clock.update(offset_ms=0, synced_at=0.0)
+
+
+def replay(df: pd.DataFrame, days: float | None = None, balance: float = 1_000.0,
+           exchange_stop: bool = False, fault_rate: float = 0.0, seed: int = 0,
+           slippage: float = 0.0, workdir: str | None = None) -> dict:
+    """
+    Run the unchanged sfp_bot loop (state load, candle sync, startup checks,
+    run()) over df on a virtual clock. Returns the journal's trades, the
+    simulator's fills and call counts, and the achieved speed-up.
+    """
+    if "ts" not in df:
+        df = df.assign(ts=pd.DatetimeIndex(df.index).as_unit("ms").asi8)
+    tf_ms  = sfp_bot.TIMEFRAME_MS
+    warm   = sfp_bot.CANDLE_LIMIT
+    if len(df) <= warm:
+        raise ValueError(f"need more than {warm} candles, got {len(df)}")
+    start_ms = int(df["ts"].iloc[warm])
+    end_ms   = int(df["ts"].iloc[-1]) + tf_ms
+    if days is not None:
+        end_ms = min(end_ms, start_ms + int(days * 86_400_000))
+
+    clock = SimClock(start_ms / 1000 + sfp_bot.CLOSE_GRACE, end_ms / 1000 + sfp_bot.CLOSE_GRACE)
+    sim   = SimExchange(df, clock, balance=balance, slippage=slippage,
+                        fault_rate=fault_rate, seed=seed, timeframe_ms=tf_ms)
+
+    own_dir = workdir is None
+    tmp     = tempfile.TemporaryDirectory() if own_dir else None
+    workdir = tmp.name if own_dir else workdir
+    try:
+        install(clock, sim, workdir, exchange_stop)
+        t0 = time.perf_counter()
+        sfp_bot.state.load()
+        sfp_bot.sync_candles()
+        sfp_bot.validate_startup_state()
+        try:
+            sfp_bot.run()
+        except ReplayFinished:
+            pass
+        wall = time.perf_counter() - t0
+
+        trades = pd.read_sql_query(
+            "SELECT timestamp, side, price, qty, pnl_usdt, reason, account_balance FROM events "
+            "WHERE side IN ('LONG_OPEN', 'LONG_CLOSE') ORDER BY id", sfp_bot.journal.conn)
+        sfp_bot.journal.close()
+        simulated = (clock.now * 1000 - start_ms) / 1000
+        return {
+            "trades":    trades,
+            "fills":     pd.DataFrame(sim.fills, columns=["ts", "side", "price", "qty", "fee", "reason"]),
+            "calls":     dict(sim.calls),
+            "balance":   sim.cash,
+            "wall_s":    wall,
+            "speedup":   simulated / wall if wall > 0 else float("inf"),
+        }
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Replay the live loop against a simulated exchange")
+    ap.add_argument("csv", help="OHLCV CSV (timestamp, Open, High, Low, Close, Volume)")
+    ap.add_argument("--days", type=float, default=None, help="limit the replay to N days")
+    ap.add_argument("--balance", type=float, default=1_000.0)
+    ap.add_argument("--exchange-stop", action="store_true", help="replay with EXCHANGE_STOP=1")
+    ap.add_argument("--fault-rate", type=float, default=0.0,
+                    help="probability of an injected NetworkError per order call")
+    ap.add_argument("--slippage", type=float, default=0.0, help="market order slippage (fraction)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--trades-out", help="write the journal's open/close rows to this CSV")
+    args = ap.parse_args()
+
+    import logging
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+
+    res = replay(load_csv(args.csv), days=args.days, balance=args.balance,
+                 exchange_stop=args.exchange_stop, fault_rate=args.fault_rate,
+                 seed=args.seed, slippage=args.slippage)
+    closes = res["trades"][res["trades"]["side"] == "LONG_CLOSE"]
+    print(f"Replayed in {res['wall_s']:.1f}s ({res['speedup']:,.0f}x real time)")
+    print(f"Trades: {len(closes)}  final balance: {res['balance']:.2f} USDT")
+    print("Exchange calls:", ", ".join(f"{k}={v}" for k, v in sorted(res["calls"].items())))
+    if len(closes):
+        print(closes["reason"].value_counts().to_string())
+    if args.trades_out:
+        res["trades"].to_csv(args.trades_out, index=False)
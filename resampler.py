@@ -0,0 +1,143 @@
+from collections import deque
+
+import numpy as np
+
+_UNITS_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def timeframe_ms(tf: str) -> int:
+    return int(tf[:-1]) * _UNITS_MS[tf[-1]]
+
+
+class Resampler:
+    """
+    Higher-timeframe OHLCV bars built from a base candle stream.
+
+    Each update() folds one closed base candle into the open HTF bar; the
+    bar is emitted (and appended to `bars`) as soon as its last base candle
+    arrives, or when a later bucket starts after a gap. Bars are aligned to
+    UTC multiples of the timeframe, as on the exchange.
+    """
+
+    def __init__(self, timeframe: str, base_timeframe: str = "30m", maxlen: int = 1000):
+        self.timeframe = timeframe
+        self.htf_ms    = timeframe_ms(timeframe)
+        self.base_ms   = timeframe_ms(base_timeframe)
+        if self.htf_ms % self.base_ms:
+            raise ValueError(f"{timeframe} is not a multiple of {base_timeframe}")
+        self.bars: deque = deque(maxlen=maxlen)     # closed [start, o, h, l, c, v]
+        self.current: list | None = None            # open bar, same layout
+
+    def bucket(self, ts: int) -> int:
+        return ts // self.htf_ms * self.htf_ms
+
+    def completes(self, ts: int) -> bool:
+        """True if the base candle opening at ts is the last one of its HTF bar."""
+        return ts + self.base_ms >= self.bucket(ts) + self.htf_ms
+
+    def update(self, ts: int, open_: float, high: float, low: float,
+               close: float, volume: float) -> list[list]:
+        """Consume one closed base candle; return the HTF bars it closed (0, 1 or 2)."""
+        closed = []
+        start  = self.bucket(ts)
+        cur    = self.current
+        if cur is not None and cur[0] != start:         # gap: previous bar ended early
+            closed.append(cur)
+            cur = None
+        if cur is None:
+            cur = [start, open_, high, low, close, volume]
+        else:
+            cur[2] = max(cur[2], high)
+            cur[3] = min(cur[3], low)
+            cur[4] = close
+            cur[5] += volume
+        if self.completes(ts):
+            closed.append(cur)
+            cur = None
+        self.current = cur
+        self.bars.extend(closed)
+        return closed
+
+    def frame(self) -> "pd.DataFrame":
+        """Closed bars as an OHLCV DataFrame (ts column + UTC index)."""
+        import pandas as pd
+        df = pd.DataFrame(list(self.bars), columns=["ts", "open", "high", "low", "close", "volume"])
+        df["time"] = pd.to_datetime(df["ts"], unit="ms", utc=True)
+        return df.set_index("time")
+
+
+class HTFTrend:
+    """
+    Rising-MA trend filter on closed higher-timeframe bars.
+
+    rising is True once the HTF close MA over `ma_period` bars is above its
+    previous value; it only changes when an HTF bar closes, so a base candle
+    never sees an HTF bar that is still open (no lookahead). Matches
+    htf_trend() bar for bar.
+    """
+
+    def __init__(self, timeframe: str, ma_period: int, base_timeframe: str = "30m"):
+        self.ma_period = ma_period
+        self.resampler = Resampler(timeframe, base_timeframe, maxlen=ma_period + 1)
+        self._closes   = deque(maxlen=ma_period + 1)
+        self.rising    = False
+
+    def _push(self, close: float):
+        self._closes.append(close)
+        c = self._closes
+        self.rising = len(c) == c.maxlen and c[-1] > c[0]    # ma[k] > ma[k-1]
+
+    def update(self, ts: int, open_: float, high: float, low: float,
+               close: float, volume: float) -> bool:
+        for bar in self.resampler.update(ts, open_, high, low, close, volume):
+            self._push(bar[4])
+        return self.rising
+
+    def prearm(self, next_ts: int) -> tuple[float | None, bool]:
+        """
+        For the base candle opening at next_ts: (close threshold, None) if its
+        close completes an HTF bar — rising iff close > threshold — otherwise
+        (None, rising) with the state it will see.
+        """
+        r      = self.resampler
+        closes = list(self._closes)
+        rising = self.rising
+        if r.current is not None and r.current[0] != r.bucket(next_ts):
+            closes.append(r.current[4])
+            closes = closes[-(self.ma_period + 1):]
+            rising = len(closes) == self.ma_period + 1 and closes[-1] > closes[0]
+        if r.completes(next_ts):
+            if len(closes) >= self.ma_period:
+                return closes[-self.ma_period], None
+            return float("inf"), None
+        return None, rising
+
+
+def htf_trend(df: "pd.DataFrame", timeframe: str, ma_period: int,
+              base_timeframe: str | None = None) -> np.ndarray:
+    """
+    Vectorised HTFTrend: for every base bar, whether the HTF MA was rising
+    as of that bar's close (using HTF bars closed at or before it).
+    """
+    import pandas as pd
+    ts = (df["ts"].to_numpy(dtype=np.int64) if "ts" in df
+          else pd.DatetimeIndex(df.index).as_unit("ms").asi8)
+    if len(ts) < 2:
+        return np.zeros(len(ts), dtype=bool)
+    base_ms = timeframe_ms(base_timeframe) if base_timeframe else int(np.median(np.diff(ts)))
+    htf_ms  = timeframe_ms(timeframe)
+
+    bucket = ts // htf_ms * htf_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends   = np.r_[starts[1:] - 1, len(ts) - 1]
+    closes = df["close"].to_numpy(dtype=float)[ends]
+    rising = np.zeros(len(closes), dtype=bool)
+    rising[ma_period:] = closes[ma_period:] > closes[:-ma_period]     # ma[k] > ma[k-1]
+
+    k    = np.cumsum(np.r_[True, bucket[1:] != bucket[:-1]]) - 1      # bucket index per bar
+    done = ts + base_ms >= bucket + htf_ms
+    use  = np.where(done, k, k - 1)
+    out  = np.zeros(len(ts), dtype=bool)
+    ok   = use >= 0
+    out[ok] = rising[use[ok]]
+    return out
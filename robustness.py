@@ -0,0 +1,170 @@
+import os
+import math
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from sweep import load_csv
+from backtest import (
+    INITIAL_BALANCE, LEVERAGE, SIZE_FRACTION, normalize_trades, run_backtest,
+)
+
+# ── Defaults ──────────────────────────────────────────────────────────────────
+N_PATHS     = 20_000
+METHOD      = "bootstrap"    # "bootstrap" (resample with replacement) or "shuffle" (reorder)
+BLOCK       = 1              # bootstrap block length in trades (> 1 keeps win / loss streaks)
+RUIN_LEVEL  = 0.5            # a path is ruined once equity falls to this fraction of the start
+CHUNK_BYTES = 64 << 20       # bound on one (paths x trades) float64 block
+QUANTILES   = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+def trade_returns(trades: pd.DataFrame) -> np.ndarray:
+    """
+    Net return of each trade on its notional (fees included), in trade order,
+    from simulate() output or vectorbt's trades.records_readable.
+    """
+    t = normalize_trades(trades).sort_values("entry_time")
+    if {"pnl", "qty", "entry_price"} <= set(t.columns):
+        return (t["pnl"] / (t["qty"] * t["entry_price"])).to_numpy(dtype=float)
+    return t["return_pct"].to_numpy(dtype=float) / 100
+
+
+# ── Path simulation (one chunk = one 2-D block) ───────────────────────────────
+def _sample(rng: np.random.Generator, r: np.ndarray, paths: int, n_trades: int,
+            method: str, block: int) -> np.ndarray:
+    """(paths, n_trades) matrix of trade returns drawn from r."""
+    n = len(r)
+    if method == "shuffle":
+        return rng.permuted(np.broadcast_to(r, (paths, n)), axis=1)[:, :n_trades]
+    if block <= 1:
+        return r[rng.integers(0, n, size=(paths, n_trades))]
+    # Circular block bootstrap: runs of `block` consecutive trades from random starts
+    starts = rng.integers(0, n, size=(paths, math.ceil(n_trades / block), 1))
+    return r[(starts + np.arange(block)).reshape(paths, -1)[:, :n_trades] % n]
+
+
+def _measure(growth: np.ndarray, ruin_level: float) -> dict:
+    """Final return, max drawdown and ruin flag per row of per-trade growth factors."""
+    np.maximum(growth, 0.0, out=growth)                 # a loss cannot exceed the account
+    equity = np.cumprod(growth, axis=1, out=growth)
+    peak   = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, 1.0, out=peak)                     # drawdown from the starting balance too
+    np.divide(equity, peak, out=peak)
+    return {
+        "return_pct":       (equity[:, -1] - 1.0) * 100,
+        "max_drawdown_pct": (1.0 - peak.min(axis=1)) * 100,
+        "ruined":           equity.min(axis=1) <= ruin_level,
+    }
+
+
+def _chunk(r: np.ndarray, paths: int, n_trades: int, method: str, block: int,
+           exposure: float, ruin_level: float, seed: np.random.SeedSequence) -> dict:
+    rng = np.random.default_rng(seed)
+    return _measure(1.0 + exposure * _sample(rng, r, paths, n_trades, method, block),
+                    ruin_level)
+
+
+# ── Driver ────────────────────────────────────────────────────────────────────
+def monte_carlo(trades: pd.DataFrame, n_paths: int = N_PATHS, method: str = METHOD,
+                n_trades: int | None = None, block: int = BLOCK,
+                exposure: float = SIZE_FRACTION, leverage: float = LEVERAGE,
+                ruin_level: float = RUIN_LEVEL, seed: int = 0,
+                workers: int | None = 1, chunk_bytes: int = CHUNK_BYTES) -> dict:
+    """
+    Resampled or reordered trade sequences from one backtest's trade list.
+
+    Each trade compounds the balance by 1 + exposure * (its net return on
+    notional). exposure is notional / balance: the live bot sizes at
+    SIZE_FRACTION of the balance, with LEVERAGE only setting the margin, and
+    anything up to `leverage` can be tried. Paths are simulated as
+    (paths x trades) NumPy blocks of at most chunk_bytes. Every chunk has its
+    own seed from SeedSequence(seed), so results do not depend on `workers`
+    (processes; 1 = in-process, None = one per CPU).
+
+    Returns
+    -------
+    dict with keys:
+        paths   (pd.DataFrame) — per path: return_pct, max_drawdown_pct, ruined
+        summary (pd.DataFrame) — quantiles of return_pct / max_drawdown_pct
+        stats   (dict)         — ruin / loss probabilities, mean / median
+                                 return, and the actual sequence's figures
+    """
+    if method not in ("bootstrap", "shuffle"):
+        raise ValueError(f"Unknown method: {method!r}")
+    if not 0 < exposure <= leverage:
+        raise ValueError(f"exposure {exposure} must be in (0, leverage={leverage}]")
+    r = trade_returns(trades)
+    if not len(r):
+        raise ValueError("No trades to resample")
+    n_trades = len(r) if method == "shuffle" or n_trades is None else n_trades
+
+    per_chunk = max(1, min(n_paths, chunk_bytes // (8 * n_trades)))
+    sizes     = [min(per_chunk, n_paths - s) for s in range(0, n_paths, per_chunk)]
+    seeds     = np.random.SeedSequence(seed).spawn(len(sizes))
+    args      = [(r, k, n_trades, method, block, exposure, ruin_level, ss)
+                 for k, ss in zip(sizes, seeds)]
+    if workers == 1 or len(args) == 1:
+        parts = [_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            parts = list(pool.map(_chunk, *zip(*args)))
+    paths = pd.DataFrame({k: np.concatenate([p[k] for p in parts]) for k in parts[0]})
+
+    actual = {k: v[0] for k, v in _measure(1.0 + exposure * r[None, :], ruin_level).items()}
+    summary = paths[["return_pct", "max_drawdown_pct"]].quantile(list(QUANTILES))
+    summary.index = [f"p{q * 100:g}" for q in QUANTILES]
+    return {
+        "paths":   paths,
+        "summary": summary,
+        "stats": {
+            "paths":                n_paths,
+            "trades_per_path":      n_trades,
+            "method":               method if method == "shuffle" or block <= 1
+                                    else f"{method} (block {block})",
+            "exposure":             exposure,
+            "ruin_level":           ruin_level,
+            "ruin_probability":     float(paths["ruined"].mean()),
+            "loss_probability":     float((paths["return_pct"] < 0).mean()),
+            "mean_return_pct":      float(paths["return_pct"].mean()),
+            "median_return_pct":    float(paths["return_pct"].median()),
+            "actual_return_pct":    float(actual["return_pct"]),
+            "actual_drawdown_pct":  float(actual["max_drawdown_pct"]),
+            "drawdown_percentile":  float((paths["max_drawdown_pct"]
+                                           < actual["max_drawdown_pct"]).mean() * 100),
+        },
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Monte Carlo / bootstrap robustness of SFP trades")
+    ap.add_argument("csv", nargs="?", default="BTC_30m_binance.csv",
+                    help="OHLCV CSV or dataset directory to backtest")
+    ap.add_argument("--trades", help="use this trade CSV (simulate() or vectorbt columns) instead")
+    ap.add_argument("--paths",    type=int, default=N_PATHS)
+    ap.add_argument("--method",   choices=("bootstrap", "shuffle"), default=METHOD)
+    ap.add_argument("--n-trades", type=int, help="trades per bootstrap path (default: as many as traded)")
+    ap.add_argument("--block",    type=int, default=BLOCK)
+    ap.add_argument("--exposure", type=float, default=SIZE_FRACTION,
+                    help="position notional / balance (default: live sizing)")
+    ap.add_argument("--ruin",     type=float, default=RUIN_LEVEL)
+    ap.add_argument("--seed",     type=int, default=0)
+    ap.add_argument("--workers",  type=int, default=1, help="processes (0 = one per CPU)")
+    ap.add_argument("--balance",  type=float, default=INITIAL_BALANCE)
+    ap.add_argument("--out", help="write per-path results to this CSV")
+    args = ap.parse_args()
+
+    if args.trades:
+        trades = pd.read_csv(args.trades)
+    else:
+        trades = run_backtest(load_csv(args.csv), initial_balance=args.balance)["trades"]
+    res = monte_carlo(trades, n_paths=args.paths, method=args.method, n_trades=args.n_trades,
+                      block=args.block, exposure=args.exposure, ruin_level=args.ruin,
+                      seed=args.seed, workers=args.workers or None)
+    for k, v in res["stats"].items():
+        print(f"{k:<20} {v}")
+    print()
+    print(res["summary"].round(2).to_string())
+    if args.out:
+        res["paths"].to_csv(args.out, index=False)
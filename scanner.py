@@ -0,0 +1,146 @@
+import os
+import time
+import asyncio
+import logging
+import argparse
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from sfp_signals import compute_signals
+from notifier import TelegramNotifier
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+TIMEFRAME       = "30m"
+CANDLE_LIMIT    = 900
+MAX_CONCURRENCY = 20       # in-flight fetch_ohlcv requests
+CLOSE_GRACE     = 1.5      # seconds after a candle close before scanning
+MAX_ALERTS      = 20       # symbols listed in one Telegram alert
+
+logger = logging.getLogger("sfp_bot.scanner")
+
+
+def usdt_swap_symbols(markets: dict) -> list[str]:
+    """Active linear USDT-margined perpetual swaps."""
+    return sorted(
+        sym for sym, m in markets.items()
+        if m.get("swap") and m.get("linear") and m.get("quote") == "USDT"
+        and m.get("settle", "USDT") == "USDT" and m.get("active", True) is not False
+    )
+
+
+async def _scan_symbol(exchange, symbol: str, timeframe: str,
+                       sem: asyncio.Semaphore) -> dict | None:
+    async with sem:
+        try:
+            ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, limit=CANDLE_LIMIT)
+        except Exception as e:
+            logger.warning("fetch_ohlcv %s failed: %s", symbol, e)
+            return None
+    if not ohlcv or len(ohlcv) < 2:
+        return None
+    df  = pd.DataFrame(ohlcv, columns=["ts", "open", "high", "low", "close", "volume"])
+    df_closed = df.iloc[:-1]
+    sig = compute_signals(df_closed)
+    if not sig["entry"]:
+        return None
+    price = float(df_closed["close"].iloc[-1])
+    risk  = price - sig["invalidation"]
+    rr    = (sig["tp"] - price) / risk if risk > 0 and sig["tp"] == sig["tp"] else 0.0
+    return {
+        "symbol":       symbol,
+        "candle_ts":    int(df_closed["ts"].iloc[-1]),
+        "price":        price,
+        "invalidation": sig["invalidation"],
+        "tp":           sig["tp"],
+        "pivot_low":    sig["pivot_low"],
+        "rr":           rr,
+    }
+
+
+async def scan(exchange, symbols: list[str] | None = None, timeframe: str = TIMEFRAME,
+               max_concurrency: int = MAX_CONCURRENCY) -> list[dict]:
+    """
+    Run compute_signals on the last closed candle of every symbol concurrently.
+
+    `exchange` is any ccxt.async_support-compatible object (load_markets,
+    fetch_ohlcv as coroutines), so a local fake can stand in for Bitget.
+    Returns entry hits ranked by reward/risk (TP distance over stop distance).
+    """
+    if symbols is None:
+        symbols = usdt_swap_symbols(await exchange.load_markets())
+    sem = asyncio.Semaphore(max_concurrency)
+    results = await asyncio.gather(*(_scan_symbol(exchange, s, timeframe, sem) for s in symbols))
+    hits = [r for r in results if r is not None]
+    return sorted(hits, key=lambda r: r["rr"], reverse=True)
+
+
+def format_alert(hits: list[dict], timeframe: str = TIMEFRAME) -> str:
+    lines = [f"🔎 <b>SFP Scanner</b> — {len(hits)} entr{'y' if len(hits) == 1 else 'ies'} ({timeframe})"]
+    for h in hits[:MAX_ALERTS]:
+        lines.append(
+            f"<b>{h['symbol']}</b>  ${h['price']:,.6g}  "
+            f"stop ${h['invalidation']:,.6g}  tp ${h['tp']:,.6g}  R:R {h['rr']:.2f}"
+        )
+    if len(hits) > MAX_ALERTS:
+        lines.append(f"… and {len(hits) - MAX_ALERTS} more")
+    return "\n".join(lines)
+
+
+async def run(exchange, timeframe: str = TIMEFRAME, once: bool = False,
+              notifier: TelegramNotifier | None = None):
+    """
+    Scan right after every candle close (exchange server time) and alert on
+    hits. Alerts are queued on `notifier` (printed when it is None), so a slow
+    Telegram call never delays the next scan.
+    """
+    tf_ms  = exchange.parse_timeframe(timeframe) * 1000
+    await exchange.load_markets()
+    symbols = usdt_swap_symbols(exchange.markets)
+    logger.info("Scanner watching %d symbols on %s", len(symbols), timeframe)
+    while True:
+        if not once:
+            try:
+                offset = await exchange.fetch_time() - int(time.time() * 1000)
+            except Exception:
+                offset = 0
+            now_ms = int(time.time() * 1000) + offset
+            await asyncio.sleep(((now_ms // tf_ms + 1) * tf_ms - now_ms) / 1000 + CLOSE_GRACE)
+
+        started = time.perf_counter()
+        hits    = await scan(exchange, symbols, timeframe)
+        logger.info("Scanned %d symbols in %.2fs — %d entries",
+                    len(symbols), time.perf_counter() - started, len(hits))
+        if hits:
+            msg = format_alert(hits, timeframe)
+            if notifier is None:
+                print(msg)
+            else:
+                notifier.send(msg)
+        if once:
+            return hits
+
+
+async def _main(once: bool):
+    import ccxt.async_support as ccxt_async
+    token, chat = os.getenv("TELEGRAM_BOT_TOKEN"), os.getenv("TELEGRAM_CHAT_ID")
+    notifier = TelegramNotifier(token, chat) if token and chat else None
+    exchange = ccxt_async.bitget({"enableRateLimit": True, "options": {"defaultType": "swap"}})
+    try:
+        await run(exchange, once=once, notifier=notifier)
+    finally:
+        await exchange.close()
+        if notifier is not None:
+            await asyncio.to_thread(notifier.close)     # flush queued alerts
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    ap = argparse.ArgumentParser(description="Scan all Bitget USDT swaps for bullish SFP entries")
+    ap.add_argument("--once", action="store_true", help="scan immediately once and exit")
+    args = ap.parse_args()
+    try:
+        asyncio.run(_main(args.once))
+    except KeyboardInterrupt:
+        pass
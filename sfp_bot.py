@@ -1,86 +1,114 @@
-import ccxt
-import pandas as pd
+import numpy as np
 import os
-import csv
-import math
 import time
 import logging
 from logging.handlers import RotatingFileHandler
 from datetime import datetime, date
-import requests
-from dotenv import load_dotenv
-
-from sfp_signals import compute_signals, PIVOT_WINDOW
+import atexit
+import queue
+import threading
+
+from sfp_signals import compute_signals, SignalEngine, ArmedSignal, PIVOT_WINDOW
+from resampler import timeframe_ms
+from candle_store import CandleStore
+from ohlcv_buffer import OHLCVBuffer
+from journal import Journal, STATE_FIELDS
+from notifier import TelegramNotifier
+from exchange_cache import ExchangeSnapshot
+from order_stream import OrderStream
+from market_cache import load_markets_cached, ensure_account_config
+from instrument import InstrumentSpec
+from metrics import Metrics
 
 # ── Base directory (ensure files live next to this script) ────────────────────
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# ── Credentials ───────────────────────────────────────────────────────────────
-load_dotenv()
-
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-TELEGRAM_CHAT_ID   = os.getenv("TELEGRAM_CHAT_ID")
-API_KEY            = os.getenv("API_KEY")
-API_SECRET         = os.getenv("API_SECRET")
-API_PASSWORD       = os.getenv("API_PASSWORD")
-
-if not all([TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, API_KEY, API_SECRET, API_PASSWORD]):
-    raise SystemExit("❌ Missing credentials in .env")
-
 # ── Configuration ─────────────────────────────────────────────────────────────
 SYMBOL         = "BTCUSDT"
 TIMEFRAME      = "30m"
 LEVERAGE       = 10
+MARGIN_MODE    = "cross"
 CANDLE_LIMIT   = 900
-POLL_INTERVAL  = 60
+PRICE_DTYPE    = np.float64   # candle buffer price/volume dtype (np.float32 halves memory)
+POLL_INTERVAL  = 60     # retry delay after errors / missing candles
+CLOSE_GRACE    = 1.5    # seconds after a candle close before fetching
+STOP_GRACE     = 0.25   # same, while a position waits on the candle-close stop
+STOP_POLL      = 0.25   # poll interval for a late candle while in a position
+CLOCK_RESYNC   = 3600   # seconds between exchange server-time syncs
+USE_STREAM     = os.getenv("USE_ORDER_STREAM", "1") != "0"   # private WS for TP fills
+EXCHANGE_STOP  = os.getenv("EXCHANGE_STOP", "0") == "1"      # stop-loss attached to the entry order
 APP_LOG        = os.path.join(BASE_DIR, "sfp_bot.log")
+CANDLE_DIR     = os.path.join(BASE_DIR, "candles")
+MARKETS_CACHE  = os.path.join(BASE_DIR, "markets_cache.json")
+ACCOUNT_CACHE  = os.path.join(BASE_DIR, "account_config.json")
 DAILY_HOUR_UTC = 0
 DAILY_MIN_UTC  = 5
+METRICS_PORT     = int(os.getenv("METRICS_PORT", "9108"))   # 0 disables the HTTP endpoint
+METRICS_JSON     = os.path.join(BASE_DIR, "metrics.json")
+METRICS_INTERVAL = 60   # seconds between JSON snapshots
 
-# ── Single persistent file: trade_log.csv ────────────────────────────────────
-LOG_FILE = os.path.join(BASE_DIR, "trade_log.csv")
-LOG_COLS = [
-    "timestamp", "symbol", "side",
-    "price", "qty", "usdt_value", "account_balance", "pnl_usdt", "reason",
-    "entry_price", "entry_candle_ts", "invalidation", "tp",
-    "last_entry_candle_ts", "last_daily_date", "tp_order_id",
-]
-
-if not os.path.exists(LOG_FILE):
-    with open(LOG_FILE, "w", newline="") as f:
-        csv.writer(f).writerow(LOG_COLS)
+# ── Trade journal (SQLite); trade_log.csv is the legacy format / CSV export ──
+JOURNAL_DB = os.path.join(BASE_DIR, "sfp_bot.db")
+LOG_FILE   = os.path.join(BASE_DIR, "trade_log.csv")
 
-# ── Logging ───────────────────────────────────────────────────────────────────
 logger = logging.getLogger("sfp_bot")
-logger.setLevel(logging.INFO)
-fh = RotatingFileHandler(APP_LOG, maxBytes=5_000_000, backupCount=3)
-fh.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
-logger.addHandler(fh)
-ch = logging.StreamHandler()
-ch.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
-logger.addHandler(ch)
-
-# ── Exchange ──────────────────────────────────────────────────────────────────
-exchange = ccxt.bitget({
-    "apiKey":          API_KEY,
-    "secret":          API_SECRET,
-    "password":        API_PASSWORD,
-    "enableRateLimit": True,
-    "options":         {"defaultType": "swap"},
-})
-exchange.load_markets()
-
-try:
-    exchange.set_leverage(LEVERAGE, SYMBOL, params={"marginCoin": "USDT"})
-    logger.info("Leverage set to %sx for %s", LEVERAGE, SYMBOL)
-except Exception as e:
-    logger.warning("Could not set leverage: %s", e)
-
-try:
-    exchange.set_margin_mode("cross", SYMBOL, params={"marginCoin": "USDT"})
-    logger.info("Margin mode set to cross for %s", SYMBOL)
-except Exception as e:
-    logger.warning("Could not set margin mode: %s", e)
+
+# ── Runtime objects (created in main(); importing this module has no side effects)
+TELEGRAM_BOT_TOKEN = TELEGRAM_CHAT_ID = API_KEY = API_SECRET = API_PASSWORD = None
+exchange = None
+snapshot: ExchangeSnapshot | None = None      # per-tick positions / balance / open orders
+journal:  Journal | None = None
+notifier: TelegramNotifier | None = None
+store:    CandleStore | None = None
+spec:     InstrumentSpec | None = None        # tick / lot grid for SYMBOL
+metrics = Metrics()                           # phase timers / counters (exported from main())
+
+
+def setup_logging():
+    logger.setLevel(logging.INFO)
+    if logger.handlers:
+        return
+    fh = RotatingFileHandler(APP_LOG, maxBytes=5_000_000, backupCount=3)
+    fh.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(fh)
+    ch = logging.StreamHandler()
+    ch.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(ch)
+
+
+def load_credentials():
+    global TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, API_KEY, API_SECRET, API_PASSWORD
+    from dotenv import load_dotenv
+    load_dotenv()
+    TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+    TELEGRAM_CHAT_ID   = os.getenv("TELEGRAM_CHAT_ID")
+    API_KEY            = os.getenv("API_KEY")
+    API_SECRET         = os.getenv("API_SECRET")
+    API_PASSWORD       = os.getenv("API_PASSWORD")
+    if not all([TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, API_KEY, API_SECRET, API_PASSWORD]):
+        raise SystemExit("❌ Missing credentials in .env")
+
+
+def _bitget(authenticated: bool = True):
+    import ccxt
+    config = {"enableRateLimit": True, "options": {"defaultType": "swap"}}
+    if authenticated:
+        config.update({"apiKey": API_KEY, "secret": API_SECRET, "password": API_PASSWORD})
+    return ccxt.bitget(config)
+
+
+def init_exchange():
+    """Exchange with cached market metadata; leverage/margin only set when changed."""
+    global exchange, snapshot, spec
+    exchange = _bitget()
+    source = load_markets_cached(exchange, MARKETS_CACHE,
+                                 fresh_exchange=lambda: _bitget(authenticated=False))
+    logger.info("Markets loaded from %s", source)
+    ensure_account_config(exchange, ACCOUNT_CACHE, SYMBOL, LEVERAGE, MARGIN_MODE)
+    snapshot = ExchangeSnapshot(exchange, SYMBOL)
+    spec     = InstrumentSpec.from_market(exchange.market(SYMBOL), exchange.precisionMode)
+    logger.info("Instrument %s — tick=%s step=%s min=%s", spec.symbol,
+                spec.tick_size, spec.amount_step, spec.min_amount)
 
 
 # ── State ─────────────────────────────────────────────────────────────────────
@@ -110,9 +138,11 @@ class State:
             self.tp_order_id or "",
         ]
 
+    def _snapshot(self) -> dict:
+        return {k: getattr(self, k) for k in STATE_FIELDS}
+
     def save(self):
-        with open(LOG_FILE, "a", newline="") as f:
-            csv.writer(f).writerow(self._row("BOT_STATE"))
+        journal.record(self._row("BOT_STATE"), self._snapshot())
         logger.debug("BOT_STATE written")
 
     def write_trade(self, side: str, price: float, qty: float,
@@ -120,47 +150,29 @@ class State:
         row = self._row(side,
                         price=price, qty=qty, usdt_value=price * qty,
                         balance=balance, pnl=pnl, reason=reason)
-        with open(LOG_FILE, "a", newline="") as f:
-            csv.writer(f).writerow(row)
+        journal.record(row, self._snapshot())
         logger.info("Trade: %s @ %.4f qty=%.6f pnl=%.2f [%s]", side, price, qty, pnl, reason)
 
     def load(self):
-        if not os.path.exists(LOG_FILE):
-            return
         try:
-            df = pd.read_csv(LOG_FILE, dtype=str)
-            if df.empty:
-                return
-
-            state_rows = df[df["side"] == "BOT_STATE"]
-            trade_rows = df[df["side"].isin(["LONG_OPEN", "LONG_CLOSE", "TP_ORDER"])]
-            source = (state_rows.iloc[-1] if not state_rows.empty
-                      else trade_rows.iloc[-1] if not trade_rows.empty else None)
-            if source is not None:
-                self.last_entry_candle_ts = _int(source.get("last_entry_candle_ts"))
-                self.last_daily_date      = str(source.get("last_daily_date") or "")
-
-            opens  = df[df["side"] == "LONG_OPEN"]
-            closes = df[df["side"] == "LONG_CLOSE"]
-            if opens.empty:
+            journal.migrate_csv(LOG_FILE)
+            snap = journal.snapshot(SYMBOL)
+            if snap is None:
                 return
-            last_open_ts  = opens["timestamp"].iloc[-1]
-            last_close_ts = closes["timestamp"].iloc[-1] if not closes.empty else ""
-            if last_open_ts > last_close_ts:
-                last = opens.iloc[-1]
-                self.entry_price     = _float(last.get("entry_price"))
-                self.invalidation    = _float(last.get("invalidation"))
-                self.tp              = _float(last.get("tp"))
-                self.entry_candle_ts = _int(last.get("entry_candle_ts"))
-                tp_rows = df[(df["side"] == "TP_ORDER") & (df["timestamp"] > last_open_ts)]
-                if not tp_rows.empty:
-                    self.tp_order_id = str(tp_rows["tp_order_id"].iloc[-1] or "").strip() or None
+            self.last_entry_candle_ts = _int(snap["last_entry_candle_ts"])
+            self.last_daily_date      = str(snap["last_daily_date"] or "")
+            self.entry_price          = _float(snap["entry_price"])
+            if self.entry_price is not None:
+                self.invalidation    = _float(snap["invalidation"])
+                self.tp              = _float(snap["tp"])
+                self.entry_candle_ts = _int(snap["entry_candle_ts"])
+                self.tp_order_id     = snap["tp_order_id"] or None
                 logger.info(
                     "State loaded — entry=%.4f stop=%s tp=%s tp_order_id=%s",
                     self.entry_price or 0, self.invalidation, self.tp, self.tp_order_id
                 )
         except Exception:
-            logger.exception("Failed to load state from CSV — starting fresh")
+            logger.exception("Failed to load state from journal — starting fresh")
 
     def clear_position(self):
         self.entry_price     = None
@@ -196,44 +208,124 @@ def _int(v) -> int | None:
 
 
 state = State()
-state.load()
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
+@metrics.timed("tg_send")
 def tg_send(msg: str):
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    try:
-        requests.post(url, json={
-            "chat_id": TELEGRAM_CHAT_ID, "text": msg, "parse_mode": "HTML"
-        }, timeout=10)
-    except Exception:
-        logger.exception("Telegram send failed")
+    """Queue a Telegram message; delivery happens on the notifier thread."""
+    if notifier is None:
+        logger.info("Telegram (not started): %s", msg)
+        return
+    notifier.send(msg)
+
+
+# ── Candle buffer & scheduler ─────────────────────────────────────────────────
+TIMEFRAME_MS = timeframe_ms(TIMEFRAME)
+
+candles: OHLCVBuffer | None = None   # last CANDLE_LIMIT candles; the forming one is last
+_clock = {"offset_ms": 0, "synced_at": 0.0}
 
 
-def fetch_df() -> pd.DataFrame | None:
+def server_now_ms() -> int:
+    """Exchange server time in ms (local clock + offset, resynced hourly)."""
+    if time.time() - _clock["synced_at"] > CLOCK_RESYNC:
+        try:
+            local_ms = int(time.time() * 1000)
+            snapshot.count("fetch_time")
+            _clock["offset_ms"] = int(exchange.fetch_time()) - local_ms
+            _clock["synced_at"] = time.time()
+        except Exception:
+            logger.warning("fetch_time failed — using local clock offset %d ms",
+                           _clock["offset_ms"])
+    return int(time.time() * 1000) + _clock["offset_ms"]
+
+
+def sleep_until_next_candle() -> int:
+    """
+    Sleep until just after the next TIMEFRAME boundary; return the new candle's
+    open ts. Order-stream events wake the sleep and are handled immediately.
+    With a position open the close is what triggers the stop, so the wake-up
+    comes STOP_GRACE after the boundary instead of CLOSE_GRACE.
+    """
+    now_ms  = server_now_ms()
+    next_ts = (now_ms // TIMEFRAME_MS + 1) * TIMEFRAME_MS
+    grace   = STOP_GRACE if state.entry_price is not None else CLOSE_GRACE
+    wake_at = time.time() + (next_ts - now_ms) / 1000 + grace
+    while True:
+        remaining = wake_at - time.time()
+        if remaining <= 0 or not stream_wake.wait(remaining):
+            return next_ts
+        stream_wake.clear()
+        process_stream_events()
+
+
+def sync_candles() -> int:
+    """Backfill the store up to the last closed candle (paginated, deduplicated)."""
+    now_ms = server_now_ms()
+    since  = (now_ms // TIMEFRAME_MS - CANDLE_LIMIT) * TIMEFRAME_MS
+    return store.backfill(exchange, SYMBOL, TIMEFRAME, since, now_ms, count=snapshot.count)
+
+
+@metrics.timed("fetch_candles")
+def refresh_candles() -> OHLCVBuffer | None:
+    """
+    Bring the candle buffer up to date and return it (None on fetch errors).
+    Only candles from the last stored ts onward are fetched (since=); closed
+    ones go to the store and the buffer, the still-forming one is the last
+    buffer row. No DataFrame is built.
+    """
+    global candles
     try:
-        ohlcv = exchange.fetch_ohlcv(SYMBOL, TIMEFRAME, limit=CANDLE_LIMIT)
-        df = pd.DataFrame(ohlcv, columns=["ts", "open", "high", "low", "close", "volume"])
-        df["time"] = pd.to_datetime(df["ts"], unit="ms", utc=True)
-        return df.set_index("time")
+        last = store.last_ts
+        if last is None:
+            sync_candles()
+            last = store.last_ts
+        if candles is None:
+            candles = OHLCVBuffer(CANDLE_LIMIT, PRICE_DTYPE)
+            candles.extend(store.window(CANDLE_LIMIT - 1))
+        since  = last + TIMEFRAME_MS if last is not None else None
+        snapshot.count("fetch_ohlcv")
+        rows   = exchange.fetch_ohlcv(SYMBOL, TIMEFRAME, since=since, limit=CANDLE_LIMIT)
+        now_ms = server_now_ms()
+        closed = [r for r in rows if int(r[0]) + TIMEFRAME_MS <= now_ms]
+        store.append(closed)
+        candles.extend(closed)
+        open_rows = [r for r in rows if int(r[0]) + TIMEFRAME_MS > now_ms]
+        if open_rows:
+            candles.append(int(open_rows[-1][0]), *map(float, open_rows[-1][1:6]))
+        return candles
     except Exception:
+        metrics.inc("rest_errors_total", fn="refresh_candles")
         logger.exception("fetch_ohlcv failed")
         return None
 
 
+def fetch_df() -> "pd.DataFrame | None":
+    """The last CANDLE_LIMIT candles as a DataFrame (forming one last), for tooling."""
+    buf = refresh_candles()
+    return buf.to_frame() if buf is not None else None
+
+
 def symbols_match(exchange_sym: str, target: str) -> bool:
-    return target.upper() in exchange_sym.upper()
+    """"BTCUSDT" matches exchange ids and unified symbols such as "BTC/USDT:USDT"."""
+    return target.upper() in exchange_sym.upper().replace("/", "")
 
 
-def get_position() -> dict | None:
+@metrics.timed("get_position")
+def get_position(fresh: bool = False) -> dict | None:
+    """Open position for SYMBOL from the tick snapshot (fresh=True refetches)."""
+    if fresh:
+        snapshot.invalidate("positions")
     try:
-        for p in exchange.fetch_positions():
+        for p in snapshot.positions():
             sym  = p.get("symbol") or p.get("info", {}).get("symbol", "")
             size = (p.get("contracts") or p.get("size") or
                     p.get("info", {}).get("size") or p.get("info", {}).get("total") or 0)
             if symbols_match(sym, SYMBOL) and abs(float(size)) > 0:
                 return p
     except Exception:
+        metrics.inc("rest_errors_total", fn="get_position")
         logger.exception("fetch_positions failed")
     return None
 
@@ -268,7 +360,7 @@ def extract_fill_price(res: dict, fallback: float) -> float:
 
 def get_available_usdt() -> float:
     try:
-        b    = exchange.fetch_balance({"type": "future"})
+        b    = snapshot.balance()
         usdt = b.get("USDT", {})
         free = usdt.get("free") if isinstance(usdt, dict) else b.get("free", {}).get("USDT", 0)
         return float(free or 0)
@@ -279,7 +371,7 @@ def get_available_usdt() -> float:
 
 def get_total_balance() -> float:
     try:
-        return float(exchange.fetch_balance()["total"].get("USDT", 0))
+        return float(snapshot.balance()["total"].get("USDT", 0))
     except Exception:
         return 0.0
 
@@ -290,28 +382,36 @@ def safe_qty(usdt_amount: float, price: float) -> float:
     With 10x leverage, margin ≈ 10% of that notional.
     """
     try:
-        m             = exchange.markets.get(SYMBOL) or exchange.load_markets()[SYMBOL]
-        contract_sz   = float(m.get("contractSize") or 1)
-        min_contracts = float(m["limits"]["amount"]["min"] or contract_sz)
-        contracts     = math.floor(usdt_amount / (price * contract_sz))
-        qty           = contracts * contract_sz
-        if qty < min_contracts:
-            logger.warning("Qty %.6f below minimum %.6f", qty, min_contracts)
-            return 0.0
-        return round(qty, 8)
+        qty = spec.qty_for_notional(usdt_amount, price)
+        if qty <= 0:
+            logger.warning("Qty for %.2f USDT below minimum %s", usdt_amount, spec.min_amount)
+        return qty
     except Exception:
         logger.exception("safe_qty failed")
         return 0.0
 
 
-def place_order(side: str, qty: float, retries: int = 3):
-    """Market order with NetworkError duplicate-fill guard."""
+@metrics.timed("place_order")
+def place_order(side: str, qty: float, retries: int = 3, stop_loss: float | None = None):
+    """
+    Market order with NetworkError duplicate-fill guard. A BUY with stop_loss
+    carries a reduce-only trigger stop attached to the position, placed by the
+    exchange in the same request.
+    """
+    import ccxt
     params = {"marginMode": "cross", "marginCoin": "USDT"}
+    if side == "BUY" and stop_loss is not None:
+        params["stopLoss"] = {"triggerPrice": spec.round_price(stop_loss, "down")}
     for attempt in range(retries):
+        snapshot.invalidate()
+        if attempt:
+            metrics.inc("order_retries_total", fn="place_order")
         try:
             if side == "BUY":
+                snapshot.count("create_market_buy_order")
                 res = exchange.create_market_buy_order(SYMBOL, qty, params=params)
             else:
+                snapshot.count("create_market_sell_order")
                 res = exchange.create_market_sell_order(
                     SYMBOL, qty, params={"reduceOnly": True, **params})
             filled    = float(res.get("filled") or 0)
@@ -321,12 +421,12 @@ def place_order(side: str, qty: float, retries: int = 3):
                 tg_send(f"⚠️ <b>Partial fill {side}</b>\nFilled:{filled} Remaining:{remaining}")
             return res
         except ccxt.NetworkError as e:
+            metrics.inc("network_errors_total", fn="place_order")
             logger.warning("NetworkError attempt %d: %s", attempt + 1, e)
             time.sleep(3)
-            pos = get_position()
-            if side == "BUY" and pos:
-                return {"average": None, "filled": qty, "remaining": 0, "_silent_fill": True}
-            if side == "SELL" and not pos:
+            pos = get_position(fresh=True)
+            if (side == "BUY" and pos) or (side == "SELL" and not pos):
+                metrics.inc("silent_fills_total", side=side)
                 return {"average": None, "filled": qty, "remaining": 0, "_silent_fill": True}
             if attempt == retries - 1:
                 raise
@@ -337,17 +437,10 @@ def place_order(side: str, qty: float, retries: int = 3):
             time.sleep(2 ** attempt)
 
 
+@metrics.timed("place_tp_limit_order")
 def place_tp_limit_order(qty: float, tp_price: float, retries: int = 3) -> str | None:
-    """Place reduce-only TP limit order at tp_price."""
-    try:
-        m          = exchange.markets.get(SYMBOL) or exchange.load_markets()[SYMBOL]
-        price_prec = m.get("precision", {}).get("price")
-        if price_prec is not None:
-            tick     = 10 ** -price_prec
-            tp_price = math.floor(tp_price / tick) * tick
-            tp_price = round(tp_price, price_prec)
-    except Exception:
-        logger.warning("Could not determine price precision — using raw tp_price")
+    """Place reduce-only TP limit order at tp_price (floored to the tick grid)."""
+    tp_price = spec.round_price(tp_price)
 
     params = {
         "marginMode": "cross",
@@ -355,7 +448,11 @@ def place_tp_limit_order(qty: float, tp_price: float, retries: int = 3) -> str |
         "reduceOnly": True,
     }
     for attempt in range(retries):
+        if attempt:
+            metrics.inc("order_retries_total", fn="place_tp_limit_order")
         try:
+            snapshot.invalidate()
+            snapshot.count("create_limit_sell_order")
             res = exchange.create_limit_sell_order(SYMBOL, qty, tp_price, params=params)
             order_id = str(res.get("id") or res.get("info", {}).get("orderId", ""))
             logger.info("TP limit order placed: id=%s price=%.4f qty=%.6f",
@@ -367,13 +464,32 @@ def place_tp_limit_order(qty: float, tp_price: float, retries: int = 3) -> str |
                 tg_send(f"🚨 <b>TP limit order FAILED</b>\nPrice: ${tp_price:,.2f}\nError: {e}")
                 return None
             time.sleep(2 ** attempt)
+            placed = _find_open_sell(qty, tp_price)
+            if placed:                  # the failed request was executed after all
+                metrics.inc("silent_fills_total", side="TP")
+                return placed
+
+
+def _find_open_sell(qty: float, price: float) -> str | None:
+    try:
+        snapshot.invalidate("open_orders")
+        for o in snapshot.open_orders():
+            if (str(o.get("side")).lower() == "sell" and abs(float(o.get("price") or 0) - price) < 1e-9
+                    and abs(float(o.get("amount") or 0) - qty) < 1e-12):
+                return str(o.get("id") or o.get("info", {}).get("orderId", ""))
+    except Exception:
+        logger.exception("fetch_open_orders failed while checking for a placed TP")
+    return None
 
 
 def cancel_tp_order(order_id: str | None):
     """Cancel TP limit order if it exists."""
+    import ccxt
     if not order_id:
         return
+    snapshot.invalidate()
     try:
+        snapshot.count("cancel_order")
         exchange.cancel_order(order_id, SYMBOL)
         logger.info("TP limit order cancelled: id=%s", order_id)
     except ccxt.OrderNotFound:
@@ -386,40 +502,181 @@ def cancel_tp_order(order_id: str | None):
 def tp_order_still_open(order_id: str | None) -> bool:
     """
     Return True if TP order is still open/partial.
-    Use CCXT unified statuses; allowlist of open statuses.
+    Served from the tick's open-orders snapshot (one fetch_open_orders per tick).
     """
     if not order_id:
         return False
     try:
-        o = exchange.fetch_order(order_id, SYMBOL)
-        status = str(o.get("status", "")).lower()
-        open_statuses = {"open"}  # CCXT unified
-        if status in open_statuses:
+        return str(order_id) in snapshot.open_order_ids()
+    except Exception:
+        logger.exception("fetch_open_orders failed while checking %s", order_id)
+        return False
+
+
+def tp_order_amount(order_id: str | None) -> float:
+    """Remaining amount of the open TP order (= position size while it is unfilled)."""
+    for o in snapshot.open_orders():
+        if str(o.get("id") or o.get("info", {}).get("orderId", "")) == str(order_id):
+            return float(o.get("remaining") or o.get("amount") or 0)
+    return 0.0
+
+
+def exit_candle_ts(filled_ms: int) -> int:
+    """
+    Open ts of the candle after the one an exit at filled_ms happened in.
+    Stored as last_entry_candle_ts it blocks an entry at the close of the
+    exit candle, as backtest.simulate does, whichever path saw the fill.
+    """
+    return (int(filled_ms) // TIMEFRAME_MS + 1) * TIMEFRAME_MS
+
+
+def close_on_stop_fill(filled_ms: int):
+    """
+    The exchange-resident stop closed the position: cancel the TP leg (OCO)
+    and record the exit at the trigger price.
+    """
+    size = tp_order_amount(state.tp_order_id)
+    cancel_tp_order(state.tp_order_id)
+    exit_price = state.invalidation
+    pnl = (exit_price - state.entry_price) * size
+    state.write_trade("LONG_CLOSE", exit_price, size, pnl,
+                      "STOP_EXCHANGE", get_total_balance())
+    tg_send(
+        f"⛔ <b>STOP HIT</b> (exchange stop) — {SYMBOL}\n"
+        f"Exit: ~${exit_price:,.2f}\nPnL: ~${pnl:,.2f}"
+    )
+    logger.info("Exchange stop filled: exit~%.4f pnl~%.2f", exit_price, pnl)
+    state.last_entry_candle_ts = exit_candle_ts(filled_ms)
+    state.clear_position()
+
+
+def reconcile_exit(seen_ms: int) -> bool:
+    """
+    Position gone while state is set. If the TP order has filled, record the
+    TP; if it is still open and an exchange stop is in play, the stop fired
+    (cancel TP, record it). Returns False when neither explains it.
+    seen_ms is the latest time the exit can have happened; the TP's own fill
+    time is used when the exchange reports it.
+    """
+    if state.entry_price is None or not state.tp_order_id:
+        return False
+    snapshot.invalidate("open_orders")
+    if tp_order_still_open(state.tp_order_id):
+        if EXCHANGE_STOP:
+            close_on_stop_fill(seen_ms)
             return True
-        # Extra safety: check raw Bitget status if present
-        info_status = str(o.get("info", {}).get("status", "")).lower()
-        raw_open = {"init", "new", "partially_filled"}
-        return info_status in raw_open
-    except ccxt.OrderNotFound:
         return False
+    try:
+        snapshot.count("fetch_order")
+        order = exchange.fetch_order(state.tp_order_id, SYMBOL)
     except Exception:
-        logger.exception("fetch_order failed for %s", order_id)
+        logger.exception("fetch_order failed for TP %s", state.tp_order_id)
         return False
+    if str(order.get("status") or "").lower() != "closed":
+        return False
+    close_on_tp_fill(extract_fill_price(order, state.tp), float(order.get("filled") or 0),
+                     order.get("lastTradeTimestamp") or seen_ms)
+    return True
+
+
+def close_on_tp_fill(exit_price: float, size: float, filled_ms: int):
+    pnl = (exit_price - state.entry_price) * size
+    state.write_trade("LONG_CLOSE", exit_price, size, pnl,
+                      "TP_LIMIT_FILLED", get_total_balance())
+    tg_send(
+        f"✅ <b>TAKE PROFIT FILLED</b> — {SYMBOL}\n"
+        f"TP limit order executed\n"
+        f"Exit: ${exit_price:,.2f}\nPnL: ${pnl:,.2f}"
+    )
+    logger.info("TP limit filled: exit=%.4f pnl=%.2f", exit_price, pnl)
+    state.last_entry_candle_ts = exit_candle_ts(filled_ms)
+    state.clear_position()
+
+
+# ── Private order stream (TP fills without polling) ───────────────────────────
+stream_events: queue.Queue = queue.Queue()
+stream_wake = threading.Event()
+order_stream: OrderStream | None = None
+
+
+def _queue_stream_event(kind: str):
+    def cb(update: dict):
+        stream_events.put((kind, update))
+        stream_wake.set()
+    return cb
+
+
+def start_order_stream():
+    global order_stream
+    try:
+        import ccxt.pro as ccxtpro
+        source = ccxtpro.bitget({
+            "apiKey":   API_KEY,
+            "secret":   API_SECRET,
+            "password": API_PASSWORD,
+            "options":  {"defaultType": "swap"},
+        })
+        order_stream = OrderStream(source, exchange.market(SYMBOL)["symbol"],
+                                   on_order=_queue_stream_event("order"),
+                                   on_position=_queue_stream_event("position"))
+        order_stream.start()
+        atexit.register(order_stream.stop)
+        logger.info("Order stream started — REST polling only as fallback")
+    except Exception:
+        logger.exception("Order stream unavailable — using REST polling")
+
+
+def stream_ok() -> bool:
+    return order_stream is not None and order_stream.healthy()
 
 
-def recover_levels_from_entry_candle(df_closed: pd.DataFrame) -> bool:
+def process_stream_events():
+    """Apply queued order/position updates on the main thread."""
+    while True:
+        try:
+            kind, u = stream_events.get_nowait()
+        except queue.Empty:
+            return
+        if kind == "position":
+            snapshot.invalidate("positions")
+            if state.entry_price is not None and get_position() is None:
+                reconcile_exit(server_now_ms())
+            continue
+        oid = str(u.get("id") or u.get("info", {}).get("orderId", ""))
+        if state.entry_price is None or not state.tp_order_id or oid != str(state.tp_order_id):
+            continue
+        snapshot.invalidate()
+        status = str(u.get("status") or "").lower()
+        if status == "closed":
+            size = float(u.get("filled") or u.get("amount") or 0)
+            close_on_tp_fill(extract_fill_price(u, state.tp), size,
+                             u.get("lastTradeTimestamp") or server_now_ms())
+        elif status in ("canceled", "cancelled", "expired", "rejected"):
+            pos = get_position(fresh=True)
+            if pos is None:
+                continue       # position gone too — main loop reconciles at the close
+            size = abs(float(pos.get("contracts") or pos.get("size") or
+                             pos.get("info", {}).get("size") or pos.get("info", {}).get("total") or 0))
+            new_id = place_tp_limit_order(size, state.tp)
+            state.tp_order_id = new_id
+            state.save()
+            tg_send(
+                f"⚠️ <b>TP order was cancelled externally — replaced</b>\n"
+                f"New TP order: {new_id} @ ${state.tp:,.2f}"
+            )
+
+
+def recover_levels_from_entry_candle() -> bool:
     if state.entry_candle_ts is None:
         return False
-    mask = df_closed["ts"] == state.entry_candle_ts
-    if not mask.any():
-        logger.warning("Entry candle ts=%s not in df (rolled off)", state.entry_candle_ts)
+    pos_idx = store.index_of(state.entry_candle_ts)
+    if pos_idx is None:
+        logger.warning("Entry candle ts=%s not in candle store", state.entry_candle_ts)
         return False
-    pos_idx            = df_closed.index.get_loc(df_closed.index[mask][0])
-    state.invalidation = float(df_closed["low"].iloc[pos_idx])
-    df_up              = df_closed.iloc[: pos_idx + 1]
-    state.tp           = float(
-        df_up["high"].rolling(PIVOT_WINDOW, min_periods=1).max().shift(1).iloc[-1]
-    )
+    recs               = store.records()
+    state.invalidation = float(recs["low"][pos_idx])
+    prior_highs        = recs["high"][max(0, pos_idx - PIVOT_WINDOW): pos_idx]
+    state.tp           = float(prior_highs.max()) if len(prior_highs) else float("nan")
     logger.info("Levels from entry candle — stop=%.4f  tp=%.4f", state.invalidation, state.tp)
     return True
 
@@ -452,12 +709,15 @@ def send_daily_report(price: float):
 
 
 # ── Startup validation ────────────────────────────────────────────────────────
-if state.entry_price is not None:
+def validate_startup_state():
+    """Reconcile restored state with the exchange before trading."""
+    if state.entry_price is None:
+        return
     pos_check = get_position()
     if pos_check is None:
-        logger.warning("CSV has open position but exchange shows none — clearing state")
+        logger.warning("Journal has open position but exchange shows none — clearing state")
         cancel_tp_order(state.tp_order_id)
-        tg_send("⚠️ <b>Stale state cleared</b>\nCSV had open position but exchange shows none.")
+        tg_send("⚠️ <b>Stale state cleared</b>\nJournal had open position but exchange shows none.")
         state.clear_position()
     else:
         if state.tp_order_id and not tp_order_still_open(state.tp_order_id):
@@ -482,200 +742,325 @@ if state.entry_price is not None:
             f"Stop:     ${state.invalidation:,.2f}\n"
             f"TP:       ${state.tp:,.2f}\n"
             f"TP order: {state.tp_order_id or '⚠️ not set'}\n"
-            f"<i>Exact levels from trade_log.csv</i>"
+            f"<i>Exact levels from trade journal</i>"
         )
 
-tg_send(
-    f"🚀 <b>SFP Bot Started</b>\n"
-    f"Symbol: {SYMBOL}  |  TF: {TIMEFRAME}  |  {LEVERAGE}x Cross"
-)
-logger.info("Bot started — %s %s %sx cross", SYMBOL, TIMEFRAME, LEVERAGE)
 
-# ── Main loop ─────────────────────────────────────────────────────────────────
-while True:
+# ── Pre-armed signal for the forming candle ──────────────────────────────────
+engine: SignalEngine | None = None      # streaming signals over the closed candles
+armed:  ArmedSignal  | None = None      # thresholds for the candle now forming
+
+
+def arm_next_candle():
+    """
+    Between closes: advance the engine to the last closed candle, pre-arm the
+    forming one and warm the snapshot (position, balance) used at the close,
+    so the close itself only needs the final bar.
+    """
+    global engine, armed
+    armed = None
+    if candles is None or len(candles) < 2:
+        return
     try:
-        df = fetch_df()
-        if df is None or len(df) < 100:
-            time.sleep(POLL_INTERVAL)
-            continue
+        with metrics.timer("prearm"):
+            cols = candles.columns(end=1)               # closed candles only
+            ts   = cols["ts"]
+            new  = np.flatnonzero(ts > engine.last_ts) if engine is not None else None
+            if new is None or (len(new) and ts[new[0]] != engine.last_ts + TIMEFRAME_MS):
+                engine = SignalEngine.from_arrays(*cols.values())
+            else:
+                for i in new:
+                    engine.update(int(ts[i]), float(cols["open"][i]), float(cols["high"][i]),
+                                  float(cols["low"][i]), float(cols["close"][i]),
+                                  float(cols["volume"][i]))
+            armed = engine.prearm()
+        if state.entry_price is None and stream_ok():   # otherwise the close refetches anyway
+            get_position()
+            get_available_usdt()
+    except Exception:
+        logger.exception("Pre-arming failed — the close falls back to compute_signals")
+        armed = None
 
-        current_candle_ts = int(df["ts"].iloc[-1])
-        df_closed         = df.iloc[:-1]
-        price             = float(df_closed["close"].iloc[-1])
-        sig               = compute_signals(df_closed)
-        pos               = get_position()
 
-        # ── Manual close detection: position gone but state still set ─────────
-        if pos is None and state.entry_price is not None:
-            # User closed position manually (or via TP/SL outside bot)
-            exit_price = price
+# ── Main loop ─────────────────────────────────────────────────────────────────
+NEXT_CANDLE = "next_candle"     # tick outcomes: sleep to the next close,
+RETRY_SOON  = "retry_soon"      # candle not published yet — poll again in 1 s (STOP_POLL in a position),
+RETRY_LATER = "retry_later"     # data fetch failed — retry after POLL_INTERVAL
+
+
+@metrics.timed("tick")
+def tick(expected_ts: int = 0) -> str:
+    """One evaluation of the strategy on the latest closed candle."""
+    buf = refresh_candles()
+    if buf is None or len(buf) < 100:
+        return RETRY_LATER
+
+    current_candle_ts = buf.last_ts
+    forming           = 1                           # rows after the last closed candle
+    if current_candle_ts < expected_ts:
+        # Exchange hasn't published the new candle yet — poll again shortly
+        if server_now_ms() - expected_ts < POLL_INTERVAL * 1000:
+            return RETRY_SOON
+        logger.warning("Candle %s still missing after %ss — evaluating anyway",
+                       expected_ts, POLL_INTERVAL)
+        # The last row is the candle that just closed, not a forming one
+        forming           = 0
+        current_candle_ts = expected_ts
+    bar               = buf.row(-1 - forming)       # last closed candle (ts, o, h, l, c, v)
+    price             = bar[4]
+    is_armed          = (armed is not None and len(buf) > 1 + forming
+                         and armed.after_ts == buf.row(-2 - forming)[0])
+    if is_armed:
+        with metrics.timer("signal_check"):
+            sig       = armed.check(*bar[1:])
+    else:
+        with metrics.timer("compute_signals"):
+            sig       = compute_signals(buf.to_frame(end=forming))
+    if is_armed and stream_ok():
+        snapshot.invalidate("open_orders")      # position changes arrive via the stream
+    else:
+        snapshot.new_tick()
+    process_stream_events()
+    pos               = get_position()
+
+    # ── Exchange stop / TP filled while we were away (OCO reconcile) ───────
+    # Noticed at this close, so it filled by the last ms of the closed candle
+    if pos is None and state.entry_price is not None and reconcile_exit(current_candle_ts - 1):
+        return NEXT_CANDLE
+
+    # ── Manual close detection: position gone but state still set ─────────
+    if pos is None and state.entry_price is not None:
+        # User closed position manually (or via TP/SL outside bot)
+        exit_price = price
+        size_guess = 0.0
+        pnl        = 0.0
+        try:
+            # We don't know exact size; we log pnl as approximate using last known risk
             size_guess = 0.0
-            pnl        = 0.0
-            try:
-                # We don't know exact size; we log pnl as approximate using last known risk
-                size_guess = 0.0
-            except Exception:
-                pass
-            state.write_trade("LONG_CLOSE", exit_price, size_guess, pnl,
-                              "MANUAL_CLOSE", get_total_balance())
+        except Exception:
+            pass
+        state.write_trade("LONG_CLOSE", exit_price, size_guess, pnl,
+                          "MANUAL_CLOSE", get_total_balance())
+        tg_send(
+            f"ℹ️ <b>Position closed manually or externally</b>\n"
+            f"Bot state cleared at price: ${exit_price:,.2f}"
+        )
+        state.last_entry_candle_ts = current_candle_ts
+        state.clear_position()
+        return NEXT_CANDLE
+
+    # ── Recovery: position exists but state is empty ──────────────────────
+    if pos and state.entry_price is None:
+        candle_ok = (state.entry_candle_ts is not None and
+                     recover_levels_from_entry_candle())
+        if not candle_ok:
+            state.entry_price  = extract_entry_price(pos, price)
+            state.invalidation = sig["invalidation"]
+            state.tp           = sig["tp"]
             tg_send(
-                f"ℹ️ <b>Position closed manually or externally</b>\n"
-                f"Bot state cleared at price: ${exit_price:,.2f}"
+                f"⚠️ <b>Position found — levels approximated</b>\n"
+                f"Entry: ${state.entry_price:,.2f}\n"
+                f"Stop:  ${state.invalidation:,.2f}\n"
+                f"TP:    ${state.tp:,.2f}\n"
+                f"<b>Verify manually!</b>"
+            )
+        else:
+            state.entry_price = extract_entry_price(pos, price)
+            tg_send(
+                f"♻️ <b>Levels recovered from entry candle</b>\n"
+                f"Entry: ${state.entry_price:,.2f}\n"
+                f"Stop:  ${state.invalidation:,.2f}\n"
+                f"TP:    ${state.tp:,.2f}"
             )
-            state.last_entry_candle_ts = current_candle_ts
-            state.clear_position()
-            time.sleep(POLL_INTERVAL)
-            continue
 
-        # ── Recovery: position exists but state is empty ──────────────────────
-        if pos and state.entry_price is None:
-            candle_ok = (state.entry_candle_ts is not None and
-                         recover_levels_from_entry_candle(df_closed))
-            if not candle_ok:
-                state.entry_price  = extract_entry_price(pos, price)
-                state.invalidation = sig["invalidation"]
-                state.tp           = sig["tp"]
+        if state.tp and not tp_order_still_open(state.tp_order_id):
+            size = abs(float(
+                pos.get("contracts") or pos.get("size") or
+                pos.get("info", {}).get("size") or pos.get("info", {}).get("total") or 0
+            ))
+            new_id = place_tp_limit_order(size, state.tp)
+            state.tp_order_id = new_id
+            tg_send(f"📋 TP limit order placed: {new_id} @ ${state.tp:,.2f}")
+
+        state.save()
+
+    # ── Manage open position — stop only (TP via limit order) ─────────────
+    if pos and state.entry_price:
+        size = abs(float(
+            pos.get("contracts") or pos.get("size") or
+            pos.get("info", {}).get("size") or pos.get("info", {}).get("total") or 0
+        ))
+
+        # Stop: last closed candle close below invalidation. The market exit
+        # goes out first; the reduce-only TP cannot fill once flat, so it is
+        # cancelled afterwards (OCO) instead of costing a round trip up front.
+        if state.invalidation and price <= state.invalidation:
+            pnl = (price - state.entry_price) * size
+            try:
+                place_order("SELL", size)
+                cancel_tp_order(state.tp_order_id)
+                state.write_trade("LONG_CLOSE", price, size, pnl,
+                                  "STOP_INVALIDATION", get_total_balance())
                 tg_send(
-                    f"⚠️ <b>Position found — levels approximated</b>\n"
-                    f"Entry: ${state.entry_price:,.2f}\n"
-                    f"Stop:  ${state.invalidation:,.2f}\n"
-                    f"TP:    ${state.tp:,.2f}\n"
-                    f"<b>Verify manually!</b>"
+                    f"⛔ <b>STOP HIT</b> — {SYMBOL}\n"
+                    f"Exit: ${price:,.2f}\nPnL: ${pnl:,.2f}"
                 )
+                logger.info("Stop hit: exit=%.4f pnl=%.2f", price, pnl)
+            except Exception as e:
+                logger.exception("STOP order failed")
+                tg_send(f"🚨 <b>STOP FAILED</b> — close manually!\n{e}")
+            finally:
+                state.last_entry_candle_ts = current_candle_ts
+                state.clear_position()
+            return NEXT_CANDLE
+
+        # TP filled check (REST fallback while the order stream is down)
+        if (state.tp_order_id and not stream_ok()
+                and not tp_order_still_open(state.tp_order_id)):
+            pos_recheck = get_position(fresh=True)
+            if pos_recheck is None:
+                if not reconcile_exit(server_now_ms()):
+                    close_on_tp_fill(state.tp, size, server_now_ms())
+                return NEXT_CANDLE
             else:
-                state.entry_price = extract_entry_price(pos, price)
+                logger.warning("TP order gone but position still open — replacing TP order")
+                new_id = place_tp_limit_order(size, state.tp)
+                state.tp_order_id = new_id
+                state.save()
                 tg_send(
-                    f"♻️ <b>Levels recovered from entry candle</b>\n"
-                    f"Entry: ${state.entry_price:,.2f}\n"
-                    f"Stop:  ${state.invalidation:,.2f}\n"
-                    f"TP:    ${state.tp:,.2f}"
+                    f"⚠️ <b>TP order was cancelled externally — replaced</b>\n"
+                    f"New TP order: {new_id} @ ${state.tp:,.2f}"
                 )
 
-            if state.tp and not tp_order_still_open(state.tp_order_id):
-                size = abs(float(
-                    pos.get("contracts") or pos.get("size") or
-                    pos.get("info", {}).get("size") or pos.get("info", {}).get("total") or 0
-                ))
-                new_id = place_tp_limit_order(size, state.tp)
-                state.tp_order_id = new_id
-                tg_send(f"📋 TP limit order placed: {new_id} @ ${state.tp:,.2f}")
+    # ── Entry ─────────────────────────────────────────────────────────────
+    if pos is None and sig["entry"] and state.last_entry_candle_ts != current_candle_ts:
+        avail = get_available_usdt()
+        # Use 99% of free USDT as notional; with 10x leverage, margin ≈ 9.9% of free
+        qty   = safe_qty(avail * 0.99, price)
 
-            state.save()
+        if qty > 0:
+            try:
+                metrics.observe("close_to_order", server_now_ms() / 1000 - current_candle_ts / 1000)
+                res = place_order("BUY", qty,
+                                  stop_loss=sig["invalidation"] if EXCHANGE_STOP else None)
+                state.entry_price          = extract_fill_price(res, price)
+                state.invalidation         = sig["invalidation"]
+                state.tp                   = sig["tp"]
+                state.entry_candle_ts      = bar[0]
+                state.last_entry_candle_ts = current_candle_ts
+
+                tp_id = place_tp_limit_order(qty, state.tp)
+                state.tp_order_id = tp_id
+
+                state.write_trade("LONG_OPEN", state.entry_price, qty, 0,
+                                  "SFP_ENTRY", get_total_balance())
+                state.write_trade("TP_ORDER", state.tp, qty, 0,
+                                  f"TP_LIMIT id={tp_id}", get_total_balance())
+                state.save()
 
-        # ── Manage open position — stop only (TP via limit order) ─────────────
-        if pos and state.entry_price:
-            size = abs(float(
-                pos.get("contracts") or pos.get("size") or
-                pos.get("info", {}).get("size") or pos.get("info", {}).get("total") or 0
-            ))
+                tg_send(
+                    f"🟢 <b>LONG OPENED</b> — {SYMBOL}\n"
+                    f"Entry:           ${state.entry_price:,.2f}\n"
+                    f"Qty:             {qty} contracts\n"
+                    f"Stop (inv low):  ${state.invalidation:,.2f}\n"
+                    f"TP (pivot high): ${state.tp:,.2f}\n"
+                    f"TP order ID:     {tp_id or '⚠️ failed'}\n"
+                    f"Pivot Low ref:   ${sig['pivot_low']:,.2f}\n"
+                    f"Risk/contract:   ${state.entry_price - state.invalidation:,.2f}\n"
+                    f"Reward/contract: ${state.tp - state.entry_price:,.2f}"
+                )
+                logger.info(
+                    "Long opened: entry=%.4f stop=%.4f tp=%.4f tp_order=%s",
+                    state.entry_price, state.invalidation, state.tp, tp_id
+                )
+            except Exception as e:
+                logger.exception("Entry failed")
+                tg_send(f"⚠️ Entry failed: {e}")
+        else:
+            tg_send(
+                f"⚠️ SFP signal — order skipped (low funds / min size)\n"
+                f"Stop: ${sig['invalidation']:,.2f}  TP: ${sig['tp']:,.2f}"
+            )
+
+    # ── Daily report ──────────────────────────────────────────────────────
+    now = datetime.utcnow()
+    if now.hour == DAILY_HOUR_UTC and now.minute >= DAILY_MIN_UTC:
+        send_daily_report(price)
+
+    logger.debug("REST calls via snapshot: %s", snapshot.call_counts())
+    return NEXT_CANDLE
 
-            # Stop: last closed candle close below invalidation
-            if state.invalidation and price <= state.invalidation:
-                pnl = (price - state.entry_price) * size
-                try:
-                    cancel_tp_order(state.tp_order_id)
-                    place_order("SELL", size)
-                    state.write_trade("LONG_CLOSE", price, size, pnl,
-                                      "STOP_INVALIDATION", get_total_balance())
-                    tg_send(
-                        f"⛔ <b>STOP HIT</b> — {SYMBOL}\n"
-                        f"Exit: ${price:,.2f}\nPnL: ${pnl:,.2f}"
-                    )
-                    logger.info("Stop hit: exit=%.4f pnl=%.2f", price, pnl)
-                except Exception as e:
-                    logger.exception("STOP order failed")
-                    tg_send(f"🚨 <b>STOP FAILED</b> — close manually!\n{e}")
-                finally:
-                    state.last_entry_candle_ts = current_candle_ts
-                    state.clear_position()
+
+def run():
+    expected_ts = 0     # open ts of the candle that should be forming after the last close
+    while True:
+        try:
+            outcome = tick(expected_ts)
+            if outcome == RETRY_SOON:
+                time.sleep(STOP_POLL if state.entry_price is not None else 1)
+            elif outcome == RETRY_LATER:
                 time.sleep(POLL_INTERVAL)
-                continue
-
-            # TP filled check: TP order gone and position closed
-            if state.tp_order_id and not tp_order_still_open(state.tp_order_id):
-                pos_recheck = get_position()
-                if pos_recheck is None:
-                    pnl = (state.tp - state.entry_price) * size
-                    state.write_trade("LONG_CLOSE", state.tp, size, pnl,
-                                      "TP_LIMIT_FILLED", get_total_balance())
-                    tg_send(
-                        f"✅ <b>TAKE PROFIT FILLED</b> — {SYMBOL}\n"
-                        f"TP limit order executed\n"
-                        f"Exit: ${state.tp:,.2f}\nPnL: ${pnl:,.2f}"
-                    )
-                    logger.info("TP limit filled: exit=%.4f pnl=%.2f", state.tp, pnl)
-                    state.last_entry_candle_ts = current_candle_ts
-                    state.clear_position()
-                    time.sleep(POLL_INTERVAL)
-                    continue
-                else:
-                    logger.warning("TP order gone but position still open — replacing TP order")
-                    new_id = place_tp_limit_order(size, state.tp)
-                    state.tp_order_id = new_id
-                    state.save()
-                    tg_send(
-                        f"⚠️ <b>TP order was cancelled externally — replaced</b>\n"
-                        f"New TP order: {new_id} @ ${state.tp:,.2f}"
-                    )
-
-        # ── Entry ─────────────────────────────────────────────────────────────
-        if pos is None and sig["entry"] and state.last_entry_candle_ts != current_candle_ts:
-            avail = get_available_usdt()
-            # Use 99% of free USDT as notional; with 10x leverage, margin ≈ 9.9% of free
-            qty   = safe_qty(avail * 0.99, price)
-
-            if qty > 0:
-                try:
-                    res = place_order("BUY", qty)
-                    state.entry_price          = extract_fill_price(res, price)
-                    state.invalidation         = sig["invalidation"]
-                    state.tp                   = sig["tp"]
-                    state.entry_candle_ts      = int(df_closed["ts"].iloc[-1])
-                    state.last_entry_candle_ts = current_candle_ts
-
-                    tp_id = place_tp_limit_order(qty, state.tp)
-                    state.tp_order_id = tp_id
-
-                    state.write_trade("LONG_OPEN", state.entry_price, qty, 0,
-                                      "SFP_ENTRY", get_total_balance())
-                    state.write_trade("TP_ORDER", state.tp, qty, 0,
-                                      f"TP_LIMIT id={tp_id}", get_total_balance())
-                    state.save()
-
-                    tg_send(
-                        f"🟢 <b>LONG OPENED</b> — {SYMBOL}\n"
-                        f"Entry:           ${state.entry_price:,.2f}\n"
-                        f"Qty:             {qty} contracts\n"
-                        f"Stop (inv low):  ${state.invalidation:,.2f}\n"
-                        f"TP (pivot high): ${state.tp:,.2f}\n"
-                        f"TP order ID:     {tp_id or '⚠️ failed'}\n"
-                        f"Pivot Low ref:   ${sig['pivot_low']:,.2f}\n"
-                        f"Risk/contract:   ${state.entry_price - state.invalidation:,.2f}\n"
-                        f"Reward/contract: ${state.tp - state.entry_price:,.2f}"
-                    )
-                    logger.info(
-                        "Long opened: entry=%.4f stop=%.4f tp=%.4f tp_order=%s",
-                        state.entry_price, state.invalidation, state.tp, tp_id
-                    )
-                except Exception as e:
-                    logger.exception("Entry failed")
-                    tg_send(f"⚠️ Entry failed: {e}")
             else:
-                tg_send(
-                    f"⚠️ SFP signal — order skipped (low funds / min size)\n"
-                    f"Stop: ${sig['invalidation']:,.2f}  TP: ${sig['tp']:,.2f}"
-                )
+                arm_next_candle()
+                expected_ts = sleep_until_next_candle()
+
+        except KeyboardInterrupt:
+            tg_send("🛑 <b>SFP Bot stopped</b>")
+            if notifier is not None:
+                notifier.close()
+            break
+        except Exception:
+            logger.exception("Unhandled loop error")
+            time.sleep(POLL_INTERVAL)
 
-        # ── Daily report ──────────────────────────────────────────────────────
-        now = datetime.utcnow()
-        if now.hour == DAILY_HOUR_UTC and now.minute >= DAILY_MIN_UTC:
-            send_daily_report(price)
 
-        time.sleep(POLL_INTERVAL)
+def start_metrics():
+    """Expose counters / phase timings over HTTP (localhost) and as a JSON file."""
+    metrics.add_collector("rest_calls_total", "method",
+                          lambda: snapshot.call_counts() if snapshot else {},
+                          "REST calls made to the exchange")
+    metrics.add_collector("telegram_messages_total", "status",
+                          lambda: {"sent": notifier.sent, "dropped": notifier.dropped}
+                          if notifier else {})
+    if METRICS_PORT:
+        try:
+            metrics.serve(METRICS_PORT)
+        except OSError:
+            logger.exception("Metrics endpoint could not bind port %s", METRICS_PORT)
+    metrics.start_json_writer(METRICS_JSON, METRICS_INTERVAL)
+
+
+def main():
+    setup_logging()
+    load_credentials()
+
+    global journal, notifier, store
+    journal  = Journal(JOURNAL_DB)
+    notifier = TelegramNotifier(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
+    atexit.register(notifier.close)
+    store    = CandleStore(os.path.join(CANDLE_DIR, f"{SYMBOL}_{TIMEFRAME}.bin"))
+    init_exchange()
+    start_metrics()
+    import kernels          # pandas / numba load here, not on `import sfp_bot`
+    kernels.warmup()        # numba compile / cache load now, not at the first candle close
+    state.load()
 
-    except KeyboardInterrupt:
-        tg_send("🛑 <b>SFP Bot stopped</b>")
-        break
+    try:
+        sync_candles()
     except Exception:
-        logger.exception("Unhandled loop error")
-        time.sleep(POLL_INTERVAL)
\ No newline at end of file
+        logger.exception("Candle backfill failed — refresh_candles will retry")
+
+    validate_startup_state()
+    if USE_STREAM:
+        start_order_stream()
+
+    tg_send(
+        f"🚀 <b>SFP Bot Started</b>\n"
+        f"Symbol: {SYMBOL}  |  TF: {TIMEFRAME}  |  {LEVERAGE}x Cross"
+    )
+    logger.info("Bot started — %s %s %sx cross", SYMBOL, TIMEFRAME, LEVERAGE)
+    run()
+
+
+if __name__ == "__main__":
+    main()
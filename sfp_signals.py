@@ -1,5 +1,7 @@
-import pandas as pd
 import numpy as np
+from collections import deque
+
+from resampler import HTFTrend, htf_trend, timeframe_ms
 
 # ── Strategy Parameters ───────────────────────────────────────────────────────
 SWING_N         = 6      # bars each side to confirm a swing low
@@ -9,20 +11,171 @@ MIN_DISTANCE    = 4      # min bars since last confirmed swing low
 VOLUME_LOOKBACK = 12     # bars for average volume baseline
 ATR_PERIOD      = 21     # ATR period
 ATR_MULTIPLIER  = 2.2    # max candle range = ATR * this multiplier
+HTF_TIMEFRAME   = None   # e.g. "4h": also require a rising MA on that timeframe
+HTF_MA_PERIOD   = 50     # HTF trend MA period (in HTF bars)
+BASE_TIMEFRAME  = "30m"  # timeframe of the candles fed to SignalEngine
+
+
+SIGNAL_PARAMS = {
+    "swing_n":         SWING_N,
+    "pivot_window":    PIVOT_WINDOW,
+    "ma_period":       MA_PERIOD,
+    "min_distance":    MIN_DISTANCE,
+    "volume_lookback": VOLUME_LOOKBACK,
+    "atr_period":      ATR_PERIOD,
+    "atr_multiplier":  ATR_MULTIPLIER,
+    "htf":             HTF_TIMEFRAME,
+    "htf_ma_period":   HTF_MA_PERIOD,
+}
+
+
+# ── Full-series signals ───────────────────────────────────────────────────────
+class SignalFrame:
+    """
+    Every signal column for one OHLCV history and parameter set.
+
+    Columns are computed on first access and cached, so a caller pays only
+    for what it reads: frame["entries"] runs the fused entry kernel, frame["atr"]
+    only the ATR. entries[i] is what compute_signals() reports for
+    df.iloc[: i + 1]; the filter masks are the terms it ANDs together.
+    """
+
+    COLUMNS = (
+        "entries",          # bool  — long entry on this bar's close
+        "pivot_low",        # float — rolling pivot low (NaN until a swing low is confirmed)
+        "tp",               # float — take-profit level: rolling pivot high
+        "invalidation",     # float — stop level for an entry on this bar (its low)
+        "swing_low",        # float — swing low confirmed on this bar, else NaN
+        "bars_since_low",   # int   — bars since the last confirmed swing low (-1 before it)
+        "atr",              # float — simple-mean ATR
+        "sfp",              # bool  — wick below pivot low, close back above it, green body
+        "ma_rising",        # bool  — trend MA above its previous value
+        "distance_ok",      # bool  — bars_since_low >= min_distance
+        "volume_ok",        # bool  — volume above the previous volume_lookback bars' mean
+        "range_ok",         # bool  — candle range < atr_multiplier * ATR
+        "htf_ok",           # bool  — HTF MA rising (all True when htf is None)
+        "ready",            # bool  — enough history for compute_signals' length guard
+    )
+
+    def __init__(self, df: "pd.DataFrame", params: dict | None = None):
+        unknown = set(params or {}) - set(SIGNAL_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+        self.params = {**SIGNAL_PARAMS, **(params or {})}
+        self.index  = df.index
+        self._df    = df
+        self._cols: dict = {}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._cols:
+            if name in ("open", "high", "low", "close", "volume"):
+                self._cols[name] = self._df[name].to_numpy(dtype=np.float64)
+            elif name in self.COLUMNS:
+                self._cols[name] = getattr(self, "_" + name)()
+            else:
+                raise KeyError(name)
+        return self._cols[name]
+
+    def to_frame(self, columns=None) -> "pd.DataFrame":
+        """Selected columns (all by default) as a DataFrame on the input index."""
+        import pandas as pd
+        return pd.DataFrame({c: self[c] for c in (columns or self.COLUMNS)}, index=self.index)
+
+    def last(self) -> dict:
+        """compute_signals' dict for the last bar."""
+        if not len(self) or not self["ready"][-1]:
+            return {"entry": False, "invalidation": None, "tp": None, "pivot_low": None}
+        pivot_low = self["pivot_low"][-1]
+        return {
+            "entry":        bool(self["entries"][-1]),
+            "invalidation": float(self["invalidation"][-1]),
+            "tp":           float(self["tp"][-1]),
+            "pivot_low":    float(pivot_low) if not np.isnan(pivot_low) else None,
+        }
+
+    # ── Columns ───────────────────────────────────────────────────────────────
+    def _entries(self) -> np.ndarray:
+        import kernels
+        p = self.params
+        # Swing lows → rolling pivot low → SFP wick/close/body, gated by MA rising,
+        # distance from the last swing low, above-average volume and range < ATR
+        entry, pivot_low = kernels.sfp_entries(
+            self["open"], self["high"], self["low"], self["close"], self["volume"],
+            p["swing_n"], p["pivot_window"], p["ma_period"], p["min_distance"],
+            p["volume_lookback"], p["atr_period"], p["atr_multiplier"])
+        self._cols.setdefault("pivot_low", pivot_low)
+        if p["htf"]:
+            entry &= self["htf_ok"]                                 # HTF trend confirmation
+        return entry & self["ready"]
+
+    def _pivot_low(self) -> np.ndarray:
+        import kernels
+        return kernels.pivot_low(self["swing_low"], self.params["pivot_window"])
+
+    def _tp(self) -> np.ndarray:
+        import kernels
+        return kernels.pivot_high(self["high"], self.params["pivot_window"])
 
+    def _invalidation(self) -> np.ndarray:
+        return self["low"]                                          # entry candle low
 
-def _atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int) -> pd.Series:
-    """Simple ATR without external dependencies."""
-    prev_close = close.shift(1)
-    tr = pd.concat([
-        high - low,
-        (high - prev_close).abs(),
-        (low  - prev_close).abs(),
-    ], axis=1).max(axis=1)
-    return tr.rolling(period, min_periods=1).mean()
+    def _swing_low(self) -> np.ndarray:
+        import kernels
+        return kernels.swing_lows(self["low"], self.params["swing_n"])
 
+    def _bars_since_low(self) -> np.ndarray:
+        import kernels
+        return kernels.bars_since(self["swing_low"])
 
-def compute_signals(df: pd.DataFrame) -> dict:
+    def _atr(self) -> np.ndarray:
+        import kernels
+        return kernels.atr(self["high"], self["low"], self["close"], self.params["atr_period"])
+
+    def _sfp(self) -> np.ndarray:
+        plow, close = self["pivot_low"], self["close"]
+        with np.errstate(invalid="ignore"):
+            return (self["low"] < plow) & (close > plow) & (close > self["open"])
+
+    def _ma_rising(self) -> np.ndarray:
+        import kernels
+        return kernels.ma_rising(self["close"], self.params["ma_period"])
+
+    def _distance_ok(self) -> np.ndarray:
+        return self["bars_since_low"] >= self.params["min_distance"]
+
+    def _volume_ok(self) -> np.ndarray:
+        import kernels
+        return kernels.above_mean(self["volume"], self.params["volume_lookback"])
+
+    def _range_ok(self) -> np.ndarray:
+        return self["high"] - self["low"] < self.params["atr_multiplier"] * self["atr"]
+
+    def _htf_ok(self) -> np.ndarray:
+        p = self.params
+        if not p["htf"]:
+            return np.ones(len(self), dtype=bool)
+        return htf_trend(self._df, p["htf"], p["htf_ma_period"])
+
+    def _ready(self) -> np.ndarray:
+        p = self.params
+        return np.arange(len(self)) >= p["ma_period"] + p["swing_n"] + 9
+
+
+def compute_signal_frame(df: "pd.DataFrame", params: dict | None = None) -> SignalFrame:
+    """
+    Full-series signals on a DataFrame of OHLCV data (see SignalFrame).
+
+    params overrides any of SIGNAL_PARAMS; the rest follow the live settings.
+    Columns are computed lazily: frame["entries"], frame.to_frame(["entries", "tp"]).
+    """
+    return SignalFrame(df, params)
+
+
+def compute_signals(df: "pd.DataFrame", htf: str | None = HTF_TIMEFRAME,
+                    htf_ma_period: int = HTF_MA_PERIOD) -> dict:
     """
     Compute bullish SFP signals on a DataFrame of OHLCV data.
 
@@ -32,6 +185,9 @@ def compute_signals(df: pd.DataFrame) -> dict:
         Must have columns: open, high, low, close, volume
         Index should be a DatetimeIndex (UTC).
         Needs at least PIVOT_WINDOW + MA_PERIOD bars (~900 bars minimum).
+    htf : str | None
+        Higher timeframe (e.g. "4h") whose close MA must be rising, judged on
+        HTF bars resampled from df that had closed by each bar's close.
 
     Returns
     -------
@@ -43,61 +199,278 @@ def compute_signals(df: pd.DataFrame) -> dict:
     """
     if df is None or len(df) < MA_PERIOD + SWING_N + 10:
         return {"entry": False, "invalidation": None, "tp": None, "pivot_low": None}
+    return compute_signal_frame(df, {"htf": htf, "htf_ma_period": htf_ma_period}).last()
 
-    open_  = df["open"]
-    high   = df["high"]
-    low    = df["low"]
-    close  = df["close"]
-    volume = df["volume"]
-
-    # ── Swing lows (centered rolling min, then shift to avoid lookahead) ──────
-    swing_low_mask = low == low.rolling(window=2 * SWING_N + 1, center=True).min()
-    confirmed_swing_lows = low.where(swing_low_mask).shift(SWING_N)
-
-    # ── Rolling pivot low (the key SFP reference level) ──────────────────────
-    pivot_low = confirmed_swing_lows.rolling(window=PIVOT_WINDOW, min_periods=1).min().shift(1)
-
-    # ── Distance from last confirmed swing low ────────────────────────────────
-    idx = np.arange(len(low))
-    pivot_pos      = np.where(~confirmed_swing_lows.isna(), idx, -1)
-    last_pivot_pos = np.maximum.accumulate(pivot_pos)
-    distance_from_low = pd.Series(
-        np.where(last_pivot_pos >= 0, idx - last_pivot_pos, np.nan),
-        index=low.index
-    )
 
-    # ── Indicators ────────────────────────────────────────────────────────────
-    atr          = _atr(high, low, close, ATR_PERIOD)
-    candle_range = high - low
-    ma           = close.rolling(MA_PERIOD, min_periods=1).mean()
-    vol_avg      = volume.rolling(VOLUME_LOOKBACK).mean().shift(1)
-
-    # ── Raw SFP condition: wick below pivot low, close back above, bullish body
-    sfp_raw = (
-        (low  < pivot_low) &
-        (close > pivot_low) &
-        (close > open_)
-    )
+# ── Streaming engine ──────────────────────────────────────────────────────────
+class SignalEngine:
+    """
+    Incremental version of compute_signals: feed one closed candle at a time.
 
-    # ── Full entry filter ─────────────────────────────────────────────────────
-    entry_series = (
-        sfp_raw &
-        (ma > ma.shift(1)).fillna(False) &                      # MA rising
-        (distance_from_low >= MIN_DISTANCE).fillna(False) &     # not at fresh pivot
-        (volume > vol_avg.fillna(np.inf)) &                     # above-avg volume
-        (candle_range < ATR_MULTIPLIER * atr)                   # not a blow-off spike
-    )
+    Every rolling window is maintained in O(1) amortised per bar — monotonic
+    deques for the swing-low window, pivot low and pivot high, running sums for
+    ATR and the volume baseline, and a close ring for the MA slope. After each
+    update() the result equals compute_signals() on all bars seen so far.
+    """
+
+    def __init__(self,
+                 swing_n: int = SWING_N,
+                 pivot_window: int = PIVOT_WINDOW,
+                 ma_period: int = MA_PERIOD,
+                 min_distance: int = MIN_DISTANCE,
+                 volume_lookback: int = VOLUME_LOOKBACK,
+                 atr_period: int = ATR_PERIOD,
+                 atr_multiplier: float = ATR_MULTIPLIER,
+                 htf: str | None = HTF_TIMEFRAME,
+                 htf_ma_period: int = HTF_MA_PERIOD,
+                 base_timeframe: str = BASE_TIMEFRAME):
+        self.swing_n         = swing_n
+        self.pivot_window    = pivot_window
+        self.ma_period       = ma_period
+        self.min_distance    = min_distance
+        self.volume_lookback = volume_lookback
+        self.atr_period      = atr_period
+        self.atr_multiplier  = atr_multiplier
+        self.base_ms         = timeframe_ms(base_timeframe)
+        self._htf = HTFTrend(htf, htf_ma_period, base_timeframe) if htf else None
+
+        self.n: int = 0                                   # bars seen so far
+        self.last_ts: int | None = None
+        self._lows        = deque(maxlen=2 * swing_n + 1)
+        self._swing_win   = deque()                       # (pos, low) ascending lows
+        self._pivot_lows  = deque()                       # (pos, confirmed low) ascending
+        self._pivot_highs = deque()                       # (pos, high) descending
+        self._last_pivot_pos: int | None = None
+        self._closes      = deque(maxlen=ma_period + 1)
+        self._ma_sum      = 0.0
+        self._trs         = deque(maxlen=atr_period)
+        self._tr_sum      = 0.0
+        self._vols        = deque(maxlen=volume_lookback)
+        self._vol_sum     = 0.0
+        self._prev_close: float | None = None
+        self._last: dict = {"entry": False, "invalidation": None, "tp": None, "pivot_low": None}
+
+    @classmethod
+    def from_df(cls, df: "pd.DataFrame", **params) -> "SignalEngine":
+        """Warm the engine up on an OHLCV DataFrame of closed candles."""
+        ts = df["ts"].to_numpy() if "ts" in df else np.arange(len(df))
+        return cls.from_arrays(ts, *(df[c].to_numpy(dtype=float)
+                                     for c in ("open", "high", "low", "close", "volume")), **params)
+
+    @classmethod
+    def from_arrays(cls, ts, open_, high, low, close, volume, **params) -> "SignalEngine":
+        """Same as from_df, from plain column arrays (e.g. OHLCVBuffer views)."""
+        eng = cls(**params)
+        for i in range(len(ts)):
+            eng.update(int(ts[i]), float(open_[i]), float(high[i]), float(low[i]),
+                       float(close[i]), float(volume[i]))
+        return eng
+
+    def signals(self) -> dict:
+        """Signal dict for the last bar fed in (same keys as compute_signals)."""
+        return dict(self._last)
+
+    def update(self, ts: int, open_: float, high: float, low: float,
+               close: float, volume: float) -> dict:
+        """Consume one closed candle and return the signal dict for it."""
+        t = self.n
+        n = self.swing_n
+        w = self.pivot_window
+
+        # ── Swing low confirmed at t - SWING_N (window low[t-2N .. t]) ────────
+        self._lows.append(low)
+        while self._swing_win and self._swing_win[-1][1] > low:
+            self._swing_win.pop()
+        self._swing_win.append((t, low))
+        while self._swing_win[0][0] < t - 2 * n:
+            self._swing_win.popleft()
+        confirmed = None
+        if t >= 2 * n and self._lows[n] == self._swing_win[0][1]:
+            confirmed = self._lows[n]
+
+        # ── Pivot low / pivot high over the previous PIVOT_WINDOW bars ────────
+        while self._pivot_lows and self._pivot_lows[0][0] < t - w:
+            self._pivot_lows.popleft()
+        pivot_low = self._pivot_lows[0][1] if self._pivot_lows else None
+
+        while self._pivot_highs and self._pivot_highs[0][0] < t - w:
+            self._pivot_highs.popleft()
+        tp = self._pivot_highs[0][1] if t >= w else float("nan")
+
+        if confirmed is not None:
+            while self._pivot_lows and self._pivot_lows[-1][1] >= confirmed:
+                self._pivot_lows.pop()
+            self._pivot_lows.append((t, confirmed))
+            self._last_pivot_pos = t
+        while self._pivot_highs and self._pivot_highs[-1][1] <= high:
+            self._pivot_highs.pop()
+        self._pivot_highs.append((t, high))
+
+        # ── Indicators ────────────────────────────────────────────────────────
+        pc = self._prev_close
+        tr = high - low if pc is None else max(high - low, abs(high - pc), abs(low - pc))
+        if len(self._trs) == self._trs.maxlen:
+            self._tr_sum -= self._trs[0]
+        self._trs.append(tr)
+        self._tr_sum += tr
+        atr = self._tr_sum / len(self._trs)
+
+        # MA rising: full window → close[t] > close[t-MA]; warm-up → close > prev MA
+        closes = self._closes
+        if t == 0:
+            ma_rising = False
+        elif len(closes) == closes.maxlen:
+            ma_rising = close > closes[1]
+        else:
+            ma_rising = close > self._ma_sum / len(closes)
+        if len(closes) == closes.maxlen:
+            self._ma_sum -= closes[0]
+        closes.append(close)
+        self._ma_sum += close
+
+        vol_ok = (len(self._vols) == self.volume_lookback and
+                  volume > self._vol_sum / self.volume_lookback)
+        if len(self._vols) == self._vols.maxlen:
+            self._vol_sum -= self._vols[0]
+        self._vols.append(volume)
+        self._vol_sum += volume
+
+        distance_ok = (self._last_pivot_pos is not None and
+                       t - self._last_pivot_pos >= self.min_distance)
+        htf_ok = self._htf.update(ts, open_, high, low, close, volume) if self._htf else True
+
+        # Re-sum once per full wrap so float drift in the running sums stays bounded
+        if t % self.atr_period == 0:
+            self._tr_sum = sum(self._trs)
+        if t % self.volume_lookback == 0:
+            self._vol_sum = sum(self._vols)
+        if t % self.ma_period == 0:
+            self._ma_sum = sum(closes)
+
+        self.n           = t + 1
+        self.last_ts     = ts
+        self._prev_close = close
+
+        if self.n < self.ma_period + self.swing_n + 10:
+            self._last = {"entry": False, "invalidation": None, "tp": None, "pivot_low": None}
+            return self.signals()
+
+        entry = (
+            pivot_low is not None and
+            low < pivot_low and close > pivot_low and close > open_ and
+            ma_rising and distance_ok and vol_ok and htf_ok and
+            (high - low) < self.atr_multiplier * atr
+        )
+        self._last = {
+            "entry":        bool(entry),
+            "invalidation": float(low),
+            "tp":           float(tp),
+            "pivot_low":    float(pivot_low) if pivot_low is not None else None,
+        }
+        return self.signals()
+
+    def prearm(self) -> "ArmedSignal":
+        """
+        Everything the next bar's entry decision needs except that bar itself:
+        pivot low / high, swing-low candidate, MA / volume / ATR thresholds.
+        ArmedSignal.check() on the bar's OHLCV then gives what update() would.
+        """
+        t = self.n
+        n = self.swing_n
+        w = self.pivot_window
+
+        # low[t-N] becomes a confirmed swing at t if it is the minimum of
+        # low[t-2N .. t-1] and the new bar's low does not undercut it
+        swing_candidate = None
+        if t >= 2 * n:
+            hist = list(self._lows)[-2 * n:]
+            if hist[n] == min(hist):
+                swing_candidate = hist[n]
+
+        pivot_low = next((v for p, v in self._pivot_lows if p >= t - w), None)
+        tp = next((v for p, v in self._pivot_highs if p >= t - w), None) if t >= w else float("nan")
+
+        full_tr = len(self._trs) == self._trs.maxlen
+        closes  = self._closes
+        if t == 0:
+            ma_threshold = float("inf")
+        elif len(closes) == closes.maxlen:
+            ma_threshold = closes[1]
+        else:
+            ma_threshold = self._ma_sum / len(closes)
+
+        htf_threshold, htf_ok = None, True
+        if self._htf is not None and self.last_ts is not None:
+            htf_threshold, htf_ok = self._htf.prearm(self.last_ts + self.base_ms)
+
+        return ArmedSignal(
+            after_ts=self.last_ts,
+            ready=t + 1 >= self.ma_period + self.swing_n + 10,
+            pivot_low=pivot_low,
+            tp=tp,
+            swing_candidate=swing_candidate,
+            distance=None if self._last_pivot_pos is None else t - self._last_pivot_pos,
+            min_distance=self.min_distance,
+            ma_threshold=ma_threshold,
+            vol_threshold=(self._vol_sum / self.volume_lookback
+                           if len(self._vols) == self.volume_lookback else float("inf")),
+            prev_close=self._prev_close,
+            tr_base=self._tr_sum - (self._trs[0] if full_tr else 0.0),
+            tr_count=len(self._trs) if full_tr else len(self._trs) + 1,
+            atr_multiplier=self.atr_multiplier,
+            htf_threshold=htf_threshold,
+            htf_ok=htf_ok,
+        )
+
+
+class ArmedSignal:
+    """
+    Entry thresholds for one not-yet-closed bar (see SignalEngine.prearm).
+
+    check(open, high, low, close, volume) is a handful of scalar comparisons
+    and returns the same dict compute_signals() would for that bar.
+    """
+
+    __slots__ = ("after_ts", "ready", "pivot_low", "tp", "swing_candidate", "distance",
+                 "min_distance", "ma_threshold", "vol_threshold", "prev_close",
+                 "tr_base", "tr_count", "atr_multiplier", "htf_threshold", "htf_ok")
+
+    def __init__(self, **fields):
+        for k in self.__slots__:
+            setattr(self, k, fields[k])
+
+    def check(self, open_: float, high: float, low: float,
+              close: float, volume: float) -> dict:
+        if not self.ready:
+            return {"entry": False, "invalidation": None, "tp": None, "pivot_low": None}
+
+        pc = self.prev_close
+        tr = high - low if pc is None else max(high - low, abs(high - pc), abs(low - pc))
+        atr = (self.tr_base + tr) / self.tr_count
+
+        if self.swing_candidate is not None and low >= self.swing_candidate:
+            distance = 0                                  # swing confirmed on this bar
+        else:
+            distance = self.distance
+        pivot_low = self.pivot_low
 
-    entry = bool(entry_series.iloc[-1])
+        entry = (
+            pivot_low is not None and
+            low < pivot_low and close > pivot_low and close > open_ and
+            close > self.ma_threshold and
+            distance is not None and distance >= self.min_distance and
+            volume > self.vol_threshold and
+            (close > self.htf_threshold if self.htf_threshold is not None else self.htf_ok) and
+            (high - low) < self.atr_multiplier * atr
+        )
+        return {
+            "entry":        bool(entry),
+            "invalidation": float(low),
+            "tp":           float(self.tp),
+            "pivot_low":    float(pivot_low) if pivot_low is not None else None,
+        }
 
-    # ── Levels for the current bar ────────────────────────────────────────────
-    invalidation = float(low.iloc[-1])                                          # entry candle low
-    tp           = float(high.rolling(PIVOT_WINDOW).max().shift(1).iloc[-1])   # rolling pivot high
-    pivot_low_val = float(pivot_low.iloc[-1]) if not pd.isna(pivot_low.iloc[-1]) else None
 
-    return {
-        "entry":        entry,
-        "invalidation": invalidation,
-        "tp":           tp,
-        "pivot_low":    pivot_low_val,
-    }
\ No newline at end of file
+def prearm(df: "pd.DataFrame", **params) -> ArmedSignal:
+    """Arm the bar following the last (closed) candle in df."""
+    return SignalEngine.from_df(df, **params).prearm()
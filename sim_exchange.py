@@ -0,0 +1,356 @@
+import time as _time
+import bisect
+import random
+from datetime import datetime, date, timezone
+
+import numpy as np
+import pandas as pd
+
+from backtest import TAKER_FEE, MAKER_FEE, LEVERAGE
+
+MARKET = {
+    "id": "BTCUSDT", "symbol": "BTC/USDT:USDT", "base": "BTC", "quote": "USDT",
+    "settle": "USDT", "type": "swap", "swap": True, "contract": True, "linear": True,
+    "contractSize": 1,
+    "precision": {"price": 0.1, "amount": 0.0001},
+    "limits": {"amount": {"min": 0.0001}},
+}
+TICK_SIZE_MODE = 4
+
+
+class ReplayFinished(BaseException):
+    """Raised by the clock once the replay runs past the last candle.
+    BaseException so the bot's `except Exception` loop handlers let it through."""
+
+
+class SimClock:
+    """
+    Virtual clock standing in for the `time` module: time() returns virtual
+    seconds and sleep() advances them instantly. Attributes the bot does not
+    need virtualised fall through to the real time module.
+    """
+
+    def __init__(self, start_s: float, end_s: float | None = None):
+        self.now   = float(start_s)
+        self.end_s = end_s
+        self.slept = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.now   += seconds
+            self.slept += seconds
+        if self.end_s is not None and self.now > self.end_s:
+            raise ReplayFinished()
+
+    def __getattr__(self, name):
+        return getattr(_time, name)
+
+    # ── Replacements for datetime / date / threading.Event ───────────────────
+    def datetime_cls(self):
+        clock = self
+
+        class SimDatetime(datetime):
+            @classmethod
+            def utcnow(cls):
+                return datetime.fromtimestamp(clock.now, timezone.utc).replace(tzinfo=None)
+
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.fromtimestamp(clock.now, tz or timezone.utc)
+        return SimDatetime
+
+    def date_cls(self):
+        clock = self
+
+        class SimDate(date):
+            @classmethod
+            def today(cls):
+                return datetime.fromtimestamp(clock.now, timezone.utc).date()
+        return SimDate
+
+    def event(self) -> "SimEvent":
+        return SimEvent(self)
+
+
+class SimEvent:
+    """threading.Event whose wait() just advances the virtual clock."""
+
+    def __init__(self, clock: SimClock):
+        self.clock = clock
+        self._flag = False
+
+    def set(self):
+        self._flag = True
+
+    def clear(self):
+        self._flag = False
+
+    def is_set(self) -> bool:
+        return self._flag
+
+    def wait(self, timeout: float | None = None) -> bool:
+        if not self._flag and timeout:
+            self.clock.sleep(timeout)
+        return self._flag
+
+
+class SimExchange:
+    """
+    Bitget-like USDT-M swap account replayed over historical candles.
+
+    Implements the ccxt methods sfp_bot calls. Only candles that have opened
+    by clock.now are visible; the forming one is reported flat at its open, so
+    there is no lookahead. Market orders fill at the forming candle's open
+    (plus `slippage`, a fraction). When a candle closes, resting reduce-only
+    limit sells fill if its high reaches them, at max(price, open). The
+    position-attached stop (the stopLoss param) fills if its low reaches it,
+    at min(stop, open). As in backtest.simulate the TP wins when both are hit
+    in one candle. Fees are TAKER_FEE for market orders and stops and
+    MAKER_FEE for limit fills. A reduce-only TP left open after the stop
+    filled stays on the book (it cannot fill) until the bot cancels it.
+
+    fail_next(method, after_execute) and fault_rate inject ccxt.NetworkError;
+    with after_execute the order is executed before the error is raised,
+    which is the silent fill place_order guards against.
+    """
+
+    precisionMode = TICK_SIZE_MODE
+
+    def __init__(self, df: pd.DataFrame, clock: SimClock, balance: float = 1_000.0,
+                 leverage: int = LEVERAGE, slippage: float = 0.0,
+                 fault_rate: float = 0.0, seed: int = 0, timeframe_ms: int = 30 * 60 * 1000):
+        self.clock    = clock
+        self.tf_ms    = timeframe_ms
+        self.ts       = df["ts"].to_numpy(dtype=np.int64)
+        self.ohlcv    = df[["open", "high", "low", "close", "volume"]].to_numpy(dtype=float)
+        self.cash     = float(balance)
+        self.leverage = leverage
+        self.slippage = slippage
+        self.markets  = {MARKET["symbol"]: MARKET}
+        self.position: dict | None = None         # {"contracts", "entryPrice", "stop"}
+        self.orders:   dict = {}
+        self.fills:    list = []                  # (ts, side, price, qty, fee, reason)
+        self.calls:    dict = {}
+        self.fault_rate = fault_rate
+        self._faults: dict = {}                   # method -> [after_execute, ...]
+        self._rng     = random.Random(seed)
+        self._next_id = 1
+        self._settled = -1                        # last candle index whose range was applied
+
+    # ── ccxt surface ──────────────────────────────────────────────────────────
+    def market(self, symbol: str) -> dict:
+        return MARKET
+
+    def load_markets(self, reload: bool = False) -> dict:
+        return self.markets
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return self.tf_ms // 1000
+
+    def set_leverage(self, leverage, symbol=None, params=None):
+        self.leverage = int(leverage)
+
+    def set_margin_mode(self, margin_mode, symbol=None, params=None):
+        pass
+
+    def fetch_time(self, params=None) -> int:
+        self._call("fetch_time")
+        return self._now_ms()
+
+    def fetch_ohlcv(self, symbol, timeframe=None, since=None, limit=None, params=None):
+        self._call("fetch_ohlcv")
+        self._settle()
+        cur   = self._current()
+        limit = limit or 1000
+        lo    = 0 if since is None else bisect.bisect_left(self.ts, since)
+        hi    = cur + 1
+        if since is None:
+            lo = max(0, hi - limit)
+        rows = []
+        for i in range(lo, min(hi, lo + limit)):
+            o, h, l, c, v = self.ohlcv[i]
+            if i == cur:                           # still forming: nothing after the open is known
+                h = l = c = o
+                v = 0.0
+            rows.append([int(self.ts[i]), o, h, l, c, v])
+        return rows
+
+    def fetch_positions(self, symbols=None, params=None):
+        self._call("fetch_positions")
+        self._settle()
+        p = self.position
+        if p is None:
+            return []
+        mark = self._price()
+        return [{
+            "symbol": MARKET["symbol"], "side": "long", "contracts": p["contracts"],
+            "entryPrice": p["entryPrice"], "markPrice": mark,
+            "unrealizedPnl": (mark - p["entryPrice"]) * p["contracts"],
+            "info": {"symbol": MARKET["id"], "total": str(p["contracts"]),
+                     "openPriceAvg": str(p["entryPrice"])},
+        }]
+
+    def fetch_balance(self, params=None):
+        self._call("fetch_balance")
+        self._settle()
+        used  = 0.0
+        upnl  = 0.0
+        if self.position:
+            p     = self.position
+            used  = p["contracts"] * p["entryPrice"] / self.leverage
+            upnl  = (self._price() - p["entryPrice"]) * p["contracts"]
+        total = self.cash + upnl
+        free  = max(0.0, total - used)
+        return {"USDT": {"free": free, "used": used, "total": total},
+                "free": {"USDT": free}, "used": {"USDT": used}, "total": {"USDT": total}}
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        self._call("fetch_open_orders")
+        self._settle()
+        return [dict(o) for o in self.orders.values() if o["status"] == "open"]
+
+    def fetch_order(self, id, symbol=None, params=None):
+        self._call("fetch_order")
+        self._settle()
+        o = self.orders.get(str(id))
+        if o is None:
+            import ccxt
+            raise ccxt.OrderNotFound(f"sim: order {id} not found")
+        return dict(o)
+
+    def cancel_order(self, id, symbol=None, params=None):
+        self._call("cancel_order")
+        self._settle()
+        o = self.orders.get(str(id))
+        if o is None or o["status"] != "open":
+            import ccxt
+            raise ccxt.OrderNotFound(f"sim: order {id} not open")
+        o["status"] = "canceled"
+        return dict(o)
+
+    def create_market_buy_order(self, symbol, amount, params=None):
+        return self._market("buy", amount, params or {})
+
+    def create_market_sell_order(self, symbol, amount, params=None):
+        return self._market("sell", amount, params or {})
+
+    def create_limit_sell_order(self, symbol, amount, price, params=None):
+        params = params or {}
+        self._settle()
+
+        def execute():
+            return self._new_order("sell", "limit", amount, price, "open",
+                                   reduce_only=bool(params.get("reduceOnly")))
+        return self._with_faults("create_limit_sell_order", execute)
+
+    # ── Fault injection ───────────────────────────────────────────────────────
+    def fail_next(self, method: str, after_execute: bool = False, times: int = 1):
+        """Raise ccxt.NetworkError on the next `times` calls to `method`."""
+        self._faults.setdefault(method, []).extend([after_execute] * times)
+
+    def _with_faults(self, method: str, execute):
+        self._call(method)
+        queued = self._faults.get(method)
+        if queued:
+            after = queued.pop(0)
+        elif self.fault_rate and self._rng.random() < self.fault_rate:
+            after = self._rng.random() < 0.5
+        else:
+            return execute()
+        import ccxt
+        if after:
+            execute()
+        raise ccxt.NetworkError(f"sim: injected network error in {method}")
+
+    # ── Matching engine ───────────────────────────────────────────────────────
+    def _market(self, side: str, amount: float, params: dict):
+        self._settle()
+
+        def execute():
+            px = self._price() * (1 + self.slippage if side == "buy" else 1 - self.slippage)
+            if side == "buy":
+                stop = (params.get("stopLoss") or {}).get("triggerPrice")
+                self._open(amount, px, float(stop) if stop is not None else None)
+            else:
+                if params.get("reduceOnly") and not self.position:
+                    return self._new_order(side, "market", amount, px, "canceled", reduce_only=True)
+                self._close(px, TAKER_FEE, "market")
+            return self._new_order(side, "market", amount, px, "closed",
+                                   reduce_only=bool(params.get("reduceOnly")))
+        return self._with_faults(f"create_market_{side}_order", execute)
+
+    def _open(self, amount: float, price: float, stop: float | None):
+        fee = amount * price * TAKER_FEE
+        self.cash -= fee
+        p = self.position
+        if p is None:
+            self.position = {"contracts": amount, "entryPrice": price, "stop": stop}
+        else:
+            total = p["contracts"] + amount
+            p["entryPrice"] = (p["entryPrice"] * p["contracts"] + price * amount) / total
+            p["contracts"]  = total
+            if stop is not None:
+                p["stop"] = stop
+        self.fills.append((self._now_ms(), "buy", price, amount, fee, "market"))
+
+    def _close(self, price: float, fee_rate: float, reason: str):
+        p = self.position
+        if p is None:
+            return
+        fee = p["contracts"] * price * fee_rate
+        self.cash += (price - p["entryPrice"]) * p["contracts"] - fee
+        self.fills.append((self._now_ms(), "sell", price, p["contracts"], fee, reason))
+        self.position = None
+
+    def _settle(self):
+        """Apply every candle that has closed since the last call to resting exits."""
+        last_closed = bisect.bisect_right(self.ts, self._now_ms() - self.tf_ms) - 1
+        while self._settled < last_closed:
+            self._settled += 1
+            o, h, l, _, _ = self.ohlcv[self._settled]
+            if self.position is None:
+                continue
+            filled_at = int(self.ts[self._settled]) + self.tf_ms - 1    # inside the candle
+            tp = next((x for x in self.orders.values() if x["status"] == "open"
+                       and x["side"] == "sell" and h >= x["price"]), None)
+            if tp is not None:
+                px = max(tp["price"], o)
+                tp.update(status="closed", filled=tp["amount"], remaining=0.0, average=px,
+                          lastTradeTimestamp=filled_at)
+                self._close(px, MAKER_FEE, "limit")
+            elif self.position["stop"] is not None and l <= self.position["stop"]:
+                px = min(self.position["stop"], o)
+                stop = self._new_order("sell", "market", self.position["contracts"], px, "closed",
+                                       reduce_only=True)
+                self.orders[stop["id"]]["lastTradeTimestamp"] = filled_at
+                self._close(px, TAKER_FEE, "stop")
+
+    def _new_order(self, side, type_, amount, price, status, reduce_only=False) -> dict:
+        oid = str(self._next_id)
+        self._next_id += 1
+        done = status == "closed"
+        o = {"id": oid, "symbol": MARKET["symbol"], "side": side, "type": type_,
+             "amount": amount, "price": price, "status": status,
+             "filled": amount if done else 0.0, "remaining": 0.0 if done else amount,
+             "average": price if done else None, "reduceOnly": reduce_only,
+             "timestamp": self._now_ms(), "lastTradeTimestamp": self._now_ms() if done else None,
+             "info": {"orderId": oid}}
+        self.orders[oid] = o
+        return dict(o)
+
+    # ── Helpers ───────────────────────────────────────────────────────────────
+    def _call(self, method: str):
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+    def _now_ms(self) -> int:
+        return int(self.clock.now * 1000)
+
+    def _current(self) -> int:
+        """Index of the candle containing now (the forming one)."""
+        return bisect.bisect_right(self.ts, self._now_ms()) - 1
+
+    def _price(self) -> float:
+        return float(self.ohlcv[max(0, self._current()), 0])
@@ -0,0 +1,257 @@
+import argparse
+import itertools
+import math
+
+import numpy as np
+import pandas as pd
+
+import kernels
+import dataset
+from sfp_signals import SIGNAL_PARAMS
+
+# ── Defaults ──────────────────────────────────────────────────────────────────
+PARAM_NAMES = [
+    "swing_n", "pivot_window", "ma_period", "min_distance",
+    "volume_lookback", "atr_period", "atr_multiplier",
+]
+DEFAULT_PARAMS = {k: SIGNAL_PARAMS[k] for k in PARAM_NAMES}
+FEES       = 0.0005
+CHUNK_SIZE = 256         # combinations per 2-D signal block (bounds memory)
+
+
+# ── Shared rolling primitives (one per distinct parameter value) ─────────────
+class _Primitives:
+    """Lazily computed, cached indicator arrays keyed by the parameters they depend on."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.open   = df["open"].to_numpy(dtype=float)
+        self.high   = df["high"].to_numpy(dtype=float)
+        self.low    = df["low"].to_numpy(dtype=float)
+        self.close  = df["close"].to_numpy(dtype=float)
+        self.volume = df["volume"].to_numpy(dtype=float)
+        self.range  = self.high - self.low
+        self.sfp_body = self.close > self.open
+        self._cache: dict = {}
+
+    def _get(self, key, fn):
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    def confirmed(self, swing_n: int) -> np.ndarray:
+        return self._get(("confirmed", swing_n), lambda: kernels.swing_lows(self.low, swing_n))
+
+    def pivot_low(self, swing_n: int, pivot_window: int) -> np.ndarray:
+        return self._get(("pivot_low", swing_n, pivot_window), lambda: (
+            kernels.pivot_low(self.confirmed(swing_n), pivot_window)))
+
+    def distance(self, swing_n: int) -> np.ndarray:
+        return self._get(("distance", swing_n), lambda: kernels.bars_since(self.confirmed(swing_n)))
+
+    def pivot_high(self, pivot_window: int) -> np.ndarray:
+        return self._get(("pivot_high", pivot_window), lambda: (
+            kernels.pivot_high(self.high, pivot_window)))
+
+    def atr(self, atr_period: int) -> np.ndarray:
+        return self._get(("atr", atr_period), lambda: (
+            kernels.atr(self.high, self.low, self.close, atr_period)))
+
+    def ma_rising(self, ma_period: int) -> np.ndarray:
+        return self._get(("ma_rising", ma_period), lambda: kernels.ma_rising(self.close, ma_period))
+
+    def volume_ok(self, volume_lookback: int) -> np.ndarray:
+        return self._get(("volume_ok", volume_lookback), lambda: (
+            kernels.above_mean(self.volume, volume_lookback)))
+
+
+# ── Grid helpers ──────────────────────────────────────────────────────────────
+def make_grid(**ranges) -> list[dict]:
+    """Cartesian product of parameter ranges; unspecified params use the live defaults."""
+    unknown = set(ranges) - set(PARAM_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+    axes = [list(ranges.get(k, [DEFAULT_PARAMS[k]])) for k in PARAM_NAMES]
+    return [dict(zip(PARAM_NAMES, combo)) for combo in itertools.product(*axes)]
+
+
+def warmup_bars(params: dict) -> int:
+    """Bars before compute_signals can return an entry (its length guard)."""
+    return params["ma_period"] + params["swing_n"] + 9
+
+
+def _stack(combos: list[dict], fn, *keys) -> np.ndarray:
+    """Gather the cached 1-D primitive for each combo into a (bars, combos) array."""
+    cols = {}
+    for p in combos:
+        k = tuple(p[x] for x in keys)
+        if k not in cols:
+            cols[k] = fn(*k)
+    return np.column_stack([cols[tuple(p[x] for x in keys)] for p in combos])
+
+
+def entry_matrix(prim: _Primitives, combos: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Entry signals for a block of combos as a (bars, combos) bool array, plus
+    the matching pivot-high (TP) matrix. Same conditions as compute_signals,
+    including no entries during each combo's warm-up (warmup_bars).
+    """
+    pivot_low = _stack(combos, prim.pivot_low, "swing_n", "pivot_window")
+    low   = prim.low[:, None]
+    close = prim.close[:, None]
+    with np.errstate(invalid="ignore"):
+        entries = (low < pivot_low) & (close > pivot_low) & prim.sfp_body[:, None]
+    entries &= _stack(combos, prim.ma_rising, "ma_period")
+    entries &= _stack(combos, prim.volume_ok, "volume_lookback")
+    min_dist  = np.array([p["min_distance"] for p in combos])
+    entries  &= _stack(combos, prim.distance, "swing_n") >= min_dist
+    atr_mult  = np.array([p["atr_multiplier"] for p in combos], dtype=float)
+    entries  &= prim.range[:, None] < _stack(combos, prim.atr, "atr_period") * atr_mult
+    entries  &= np.arange(len(prim.low))[:, None] >= np.array([warmup_bars(p) for p in combos])
+    tp = _stack(combos, prim.pivot_high, "pivot_window")
+    return entries, tp
+
+
+def exit_matrix(prim: _Primitives, entries: np.ndarray, tp: np.ndarray) -> np.ndarray:
+    """Research-script exits: close below the last entry low, or high through its TP."""
+    n    = entries.shape[0]
+    last = np.maximum.accumulate(np.where(entries, np.arange(n)[:, None], -1), axis=0)
+    has  = last >= 0
+    safe = np.where(has, last, 0)
+    inv_level = np.where(has, prim.low[safe], np.nan)
+    tp_level  = np.where(has, np.take_along_axis(tp, safe, axis=0), np.nan)
+    with np.errstate(invalid="ignore"):
+        return (prim.close[:, None] < inv_level) | (prim.high[:, None] >= tp_level)
+
+
+# ── Per-combo trade walk and stats ────────────────────────────────────────────
+def _trades(entries: np.ndarray, exits: np.ndarray) -> list[tuple[int, int]]:
+    """
+    Long-only from_signals walk: bars with both signals are ignored, entry on
+    a flat bar, exit on the first later exit bar. Open trades close on the last bar.
+    """
+    ent = np.flatnonzero(entries & ~exits)
+    ext = np.flatnonzero(exits & ~entries)
+    out, i = [], 0
+    while i < len(ent):
+        e = ent[i]
+        j = np.searchsorted(ext, e, side="right")
+        x = int(ext[j]) if j < len(ext) else len(entries) - 1
+        if x > e:
+            out.append((int(e), x))
+        i = np.searchsorted(ent, x, side="right")
+    return out
+
+
+def _stats(close: np.ndarray, trades: list[tuple[int, int]], fees: float) -> dict:
+    if not trades:
+        return {"trades": 0, "win_rate": np.nan, "total_return_pct": 0.0,
+                "max_drawdown_pct": 0.0, "profit_factor": np.nan, "avg_trade_pct": np.nan}
+    e = np.array([t[0] for t in trades])
+    x = np.array([t[1] for t in trades])
+    rets = close[x] / close[e] * (1 - fees) / (1 + fees) - 1
+
+    # Mark-to-market equity: log returns while held, fees at entry/exit bars
+    logr  = np.zeros(len(close))
+    held  = np.zeros(len(close) + 1, dtype=np.int64)
+    np.add.at(held, e + 1, 1)
+    np.add.at(held, x + 1, -1)
+    held  = np.cumsum(held[:-1]) > 0
+    bar_r = np.r_[0.0, np.log(close[1:] / close[:-1])]
+    logr[held] = bar_r[held]
+    logr[e] += math.log(1 / (1 + fees))
+    logr[x] += math.log(1 - fees)
+    equity = np.exp(np.cumsum(logr))
+    peak   = np.maximum.accumulate(np.maximum(equity, 1.0))
+    gains  = rets[rets > 0].sum()
+    losses = -rets[rets < 0].sum()
+    return {
+        "trades":           len(trades),
+        "win_rate":         float((rets > 0).mean() * 100),
+        "total_return_pct": float((equity[-1] - 1) * 100),
+        "max_drawdown_pct": float(((peak - equity) / peak).max() * 100),
+        "profit_factor":    float(gains / losses) if losses > 0 else np.inf,
+        "avg_trade_pct":    float(rets.mean() * 100),
+    }
+
+
+def sweep(df: pd.DataFrame, combos: list[dict] | None = None,
+          fees: float = FEES, chunk_size: int = CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Evaluate many parameter sets over one OHLCV history in a single pass.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Columns open, high, low, close, volume (lowercase), oldest first.
+    combos : list of dict
+        Parameter sets, e.g. from make_grid(). Defaults to the live parameters.
+    fees : float
+        Per-side fee fraction, as in the research scripts.
+    chunk_size : int
+        Combinations evaluated per 2-D block.
+
+    Returns
+    -------
+    pd.DataFrame — one row per combo: the parameters plus trades, win_rate,
+    total_return_pct, max_drawdown_pct, profit_factor, avg_trade_pct;
+    sorted by total_return_pct descending.
+    """
+    combos = combos or make_grid()
+    prim   = _Primitives(df)
+    rows   = []
+    for start in range(0, len(combos), chunk_size):
+        block = combos[start:start + chunk_size]
+        entries, tp = entry_matrix(prim, block)
+        exits       = exit_matrix(prim, entries, tp)
+        for k, p in enumerate(block):
+            rows.append({**p, **_stats(prim.close, _trades(entries[:, k], exits[:, k]), fees)})
+    out = pd.DataFrame(rows)
+    return out.sort_values("total_return_pct", ascending=False, ignore_index=True)
+
+
+def load_csv(path: str) -> pd.DataFrame:
+    """
+    Load a research CSV export (timestamp, Open, High, ...) the way the scripts
+    do. A dataset directory (python dataset.py ingest) is opened as memmaps
+    instead, skipping the parse and clean-up.
+    """
+    if dataset.is_dataset(path):
+        return dataset.load(path)
+    data = pd.read_csv(path, index_col="timestamp", parse_dates=True)
+    data = data.sort_index()
+    data = data[~data.index.duplicated(keep="first")]
+    data = data.dropna(subset=["Open", "High", "Low", "Close"])
+    return data.rename(columns=str.lower)
+
+
+def _int_list(s: str) -> list[int]:
+    return [int(x) for x in s.split(",")]
+
+
+def _float_list(s: str) -> list[float]:
+    return [float(x) for x in s.split(",")]
+
+
+def add_grid_args(ap: argparse.ArgumentParser):
+    """Comma-separated --<param> options for every sweepable parameter."""
+    for name in PARAM_NAMES:
+        ap.add_argument("--" + name.replace("_", "-"),
+                        type=_float_list if name == "atr_multiplier" else _int_list)
+
+
+def grid_from_args(args: argparse.Namespace) -> list[dict]:
+    return make_grid(**{k: v for k, v in vars(args).items()
+                        if k in PARAM_NAMES and v is not None})
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Parameter sweep for the bullish SFP strategy")
+    ap.add_argument("csv", nargs="?", default="BTC_30m_binance.csv")
+    add_grid_args(ap)
+    ap.add_argument("--out", help="write results to this CSV")
+    args = ap.parse_args()
+
+    results = sweep(load_csv(args.csv), grid_from_args(args))
+    print(results.head(20).to_string())
+    if args.out:
+        results.to_csv(args.out, index=False)
@@ -0,0 +1,159 @@
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from sweep import (
+    CHUNK_SIZE, _Primitives, entry_matrix, make_grid, load_csv,
+    add_grid_args, grid_from_args,
+)
+from backtest import INITIAL_BALANCE, simulate, summarize, warmup_bars
+
+# ── Defaults ──────────────────────────────────────────────────────────────────
+IS_BARS    = 48 * 365        # one year of 30m candles in-sample
+OOS_BARS   = 48 * 90         # one quarter out-of-sample
+OBJECTIVE  = "total_return_pct"
+MIN_TRADES = 5               # combos with fewer IS trades are not eligible
+COLS       = ["open", "high", "low", "close", "volume"]
+
+_shared: dict = {}           # per-worker attachment to the shared OHLCV block
+
+
+def make_folds(n: int, is_bars: int, oos_bars: int, warmup: int) -> list[dict]:
+    """Rolling folds: IS window, then the next OOS window; step = oos_bars."""
+    folds, start = [], warmup
+    while start + is_bars + oos_bars <= n:
+        folds.append({
+            "fold":      len(folds),
+            "is_start":  start,
+            "is_end":    start + is_bars,
+            "oos_start": start + is_bars,
+            "oos_end":   start + is_bars + oos_bars,
+        })
+        start += oos_bars
+    return folds
+
+
+def _window(arr: np.ndarray, start: int, end: int, warmup: int) -> tuple[pd.DataFrame, int]:
+    """OHLCV frame for [start - warmup, end) and the offset of `start` inside it."""
+    lo = max(0, start - warmup)
+    return pd.DataFrame({c: arr[i, lo:end] for i, c in enumerate(COLS)}), start - lo
+
+
+def _evaluate(df: pd.DataFrame, offset: int, combos: list[dict],
+              initial_balance: float = INITIAL_BALANCE) -> list[dict]:
+    """Simulate every combo on df, taking entries only from `offset` on."""
+    prim, out = _Primitives(df), []
+    for s in range(0, len(combos), CHUNK_SIZE):
+        block = combos[s:s + CHUNK_SIZE]
+        entries, tp = entry_matrix(prim, block)
+        for k, p in enumerate(block):
+            ent = entries[:, k].copy()
+            ent[: max(offset, warmup_bars(p))] = False
+            trades = simulate(df, ent, tp[:, k], initial_balance=initial_balance)
+            out.append({"params": p, "trades": trades,
+                        "stats": summarize(trades, initial_balance)})
+    return out
+
+
+# ── Worker side ───────────────────────────────────────────────────────────────
+def _attach(name: str, shape: tuple):
+    shm = shared_memory.SharedMemory(name=name)
+    _shared["shm"] = shm
+    _shared["arr"] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+
+def _search_fold(fold: dict, combos: list[dict], warmup: int,
+                 objective: str, min_trades: int) -> dict:
+    df, offset = _window(_shared["arr"], fold["is_start"], fold["is_end"], warmup)
+    results = _evaluate(df, offset, combos)
+    eligible = [r for r in results if r["stats"]["trades"] >= min_trades] or results
+    best = max(eligible, key=lambda r: np.nan_to_num(r["stats"][objective], nan=-np.inf))
+    return {**fold, "params": best["params"],
+            **{f"is_{k}": v for k, v in best["stats"].items()}}
+
+
+# ── Driver ────────────────────────────────────────────────────────────────────
+def walk_forward(df: pd.DataFrame, combos: list[dict] | None = None,
+                 is_bars: int = IS_BARS, oos_bars: int = OOS_BARS,
+                 objective: str = OBJECTIVE, min_trades: int = MIN_TRADES,
+                 workers: int | None = None,
+                 initial_balance: float = INITIAL_BALANCE) -> dict:
+    """
+    Walk-forward optimisation with live-bot execution rules.
+
+    Each fold's IS parameter search runs in a worker process; the OHLCV
+    block lives in shared memory, so workers attach to it instead of
+    receiving a pickled copy. The chosen parameters are then simulated on
+    each OOS window in order, carrying the balance forward. A trade still
+    open at the end of a window is not counted.
+
+    Returns
+    -------
+    dict with keys:
+        folds  (pd.DataFrame) — per fold: windows, chosen params, IS and OOS stats
+        trades (pd.DataFrame) — stitched OOS trades
+        equity (pd.Series)    — OOS balance after each trade, indexed by exit time
+    """
+    combos = combos or make_grid()
+    warmup = max(warmup_bars(p) + p["pivot_window"] + p["swing_n"] for p in combos)
+    folds  = make_folds(len(df), is_bars, oos_bars, warmup)
+    if not folds:
+        raise ValueError(f"Need at least {warmup + is_bars + oos_bars} bars, got {len(df)}")
+
+    data = np.ascontiguousarray(df[COLS].to_numpy(dtype=np.float64).T)
+    shm  = shared_memory.SharedMemory(create=True, size=data.nbytes)
+    try:
+        np.ndarray(data.shape, dtype=np.float64, buffer=shm.buf)[:] = data
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 initializer=_attach, initargs=(shm.name, data.shape)) as pool:
+            chosen = list(pool.map(_search_fold, folds,
+                                   [combos] * len(folds), [warmup] * len(folds),
+                                   [objective] * len(folds), [min_trades] * len(folds)))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    balance, rows, all_trades = initial_balance, [], []
+    for f in chosen:
+        win, offset = _window(data, f["oos_start"], f["oos_end"], warmup)
+        win.index   = df.index[f["oos_start"] - offset: f["oos_end"]]
+        res = _evaluate(win, offset, [f["params"]], balance)[0]
+        balance = res["stats"]["final_balance"]
+        if not res["trades"].empty:
+            t = res["trades"].assign(fold=f["fold"])
+            t[["entry_idx", "exit_idx"]] += f["oos_start"] - offset
+            all_trades.append(t)
+        rows.append({**{k: v for k, v in f.items() if k != "params"}, **f["params"],
+                     **{f"oos_{k}": v for k, v in res["stats"].items()}})
+
+    trades = pd.concat(all_trades, ignore_index=True) if all_trades else pd.DataFrame()
+    equity = (pd.Series(trades["balance"].to_numpy(), index=trades["exit_time"], name="equity")
+              if not trades.empty else pd.Series(dtype=float, name="equity"))
+    return {"folds": pd.DataFrame(rows), "trades": trades, "equity": equity}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Walk-forward optimisation of the SFP strategy")
+    ap.add_argument("csv", nargs="?", default="BTC_30m_binance.csv")
+    ap.add_argument("--is-bars",    type=int, default=IS_BARS)
+    ap.add_argument("--oos-bars",   type=int, default=OOS_BARS)
+    ap.add_argument("--objective",  default=OBJECTIVE)
+    ap.add_argument("--min-trades", type=int, default=MIN_TRADES)
+    ap.add_argument("--workers",    type=int)
+    ap.add_argument("--out", help="prefix for <out>_folds.csv / _trades.csv / _equity.csv")
+    add_grid_args(ap)
+    args = ap.parse_args()
+
+    result = walk_forward(load_csv(args.csv), grid_from_args(args),
+                          is_bars=args.is_bars, oos_bars=args.oos_bars,
+                          objective=args.objective, min_trades=args.min_trades,
+                          workers=args.workers)
+    print(result["folds"].to_string())
+    if args.out:
+        result["folds"].to_csv(f"{args.out}_folds.csv", index=False)
+        result["trades"].to_csv(f"{args.out}_trades.csv", index=False)
+        result["equity"].to_csv(f"{args.out}_equity.csv")